@@ -0,0 +1,529 @@
+"""
+Micro-benchmarks for the CV extraction / template hot paths.
+Usage: python benchmark.py [name ...]   (no args runs everything)
+"""
+import os
+import re
+import sys
+import glob
+import time
+import logging
+
+logging.disable(logging.CRITICAL)
+
+from main import preprocess_image, get_cv_segments, extract_skills_it, extract_name_and_contact, SKILL_TAXONOMY
+from extraction_engine import parse_document, TABLE_STRATEGIES, PARALLEL_WORKERS
+from taxonomy import SkillTaxonomy
+
+INPUT_DIR = "input"
+
+def _timeit(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def _sample_cvs():
+    cvs = []
+    for path in sorted(glob.glob(os.path.join(INPUT_DIR, "*.pdf"))):
+        with open(path, "rb") as f:
+            cvs.append((os.path.basename(path), preprocess_image(f.read(), path)))
+    return cvs
+
+def _skill_fragments(pre):
+    skills_seg = get_cv_segments(pre)["skills"]
+    lines = skills_seg["text"].split("\n") + [str(v) for t in skills_seg["tables"] for r in t["rows"] for v in r.values()]
+    return skills_seg, [p.strip(" .()[]/\\").lower() for l in lines for p in re.split(r'[,\u2022•;|]', l) if p.strip()]
+
+def _legacy_skill_scan(fragments, terms):
+    # Pre-taxonomy behaviour: one fresh word-boundary search per vocabulary term
+    hits = 0
+    for t_low in fragments:
+        for c in terms:
+            if re.search(r'\b' + re.escape(c) + r'\b', t_low): hits += 1
+    return hits
+
+def _taxonomy_scan(fragments, taxonomy):
+    return sum(len(taxonomy.find(t_low)) for t_low in fragments)
+
+def bench_skills():
+    """Skill dictionary matching: per-term regex loop vs the indexed skill taxonomy."""
+    terms = [e.synonyms[0] for e in SKILL_TAXONOMY.entries]
+    for name, pre in _sample_cvs():
+        skills_seg, fragments = _skill_fragments(pre)
+        legacy = _timeit(lambda: _legacy_skill_scan(fragments, terms))
+        indexed = _timeit(lambda: _taxonomy_scan(fragments, SKILL_TAXONOMY))
+        full = _timeit(lambda: extract_skills_it(skills_seg))
+        print(f"{name[:40]:40} fragments={len(fragments):4}  legacy={legacy*1000:8.2f}ms  "
+              f"taxonomy={indexed*1000:7.2f}ms  speedup={legacy / max(indexed, 1e-9):5.1f}x  extract_skills_it={full*1000:6.2f}ms")
+
+def bench_taxonomy_scale():
+    """Per-CV matching cost as the vocabulary grows (synthetic catalog entries)."""
+    cvs = _sample_cvs()
+    fragments = [f for _, pre in cvs for f in _skill_fragments(pre)[1]]
+    base = [{"canonical": e.canonical, "kind": e.kind, "categories": list(e.categories), "synonyms": list(e.synonyms[1:])}
+            for e in SKILL_TAXONOMY.entries]
+    for extra in (0, 1000, 5000):
+        synthetic = [{"canonical": f"CatalogSkill{i}", "kind": "tech"} for i in range(extra)]
+        taxonomy = SkillTaxonomy({"version": "bench", "skills": base + synthetic})
+        elapsed = _timeit(lambda: _taxonomy_scan(fragments, taxonomy), repeat=3)
+        print(f"vocabulary={len(taxonomy.index):5} terms  per-CV={elapsed * 1000 / len(cvs):6.2f}ms")
+
+def _pdf_uploads():
+    uploads = []
+    for path in sorted(glob.glob(os.path.join(INPUT_DIR, "*.pdf"))):
+        with open(path, "rb") as f:
+            uploads.append((os.path.basename(path), f.read()))
+    return uploads
+
+def bench_parse():
+    """PDF access per request: separate opens for text/tables and name/contact vs one ParsedDocument."""
+    for name, content in _pdf_uploads():
+        twice = _timeit(lambda: (preprocess_image(content, name), extract_name_and_contact(content, name)), repeat=3)
+        once = _timeit(lambda: extract_name_and_contact(parse_document(content, name), name), repeat=3)
+        print(f"{name[:40]:40} separate={twice*1000:8.2f}ms  single-parse={once*1000:8.2f}ms")
+
+def bench_tables():
+    """Table detection cost per strategy (always / never / first-n-pages / heuristic)."""
+    for name, content in _pdf_uploads():
+        cols = []
+        for strategy in TABLE_STRATEGIES:
+            elapsed = _timeit(lambda: parse_document(content, name, table_strategy=strategy), repeat=3)
+            scanned = parse_document(content, name, table_strategy=strategy).table_pages_scanned
+            cols.append(f"{strategy}={elapsed*1000:7.1f}ms/{len(scanned)}p")
+        print(f"{name[:40]:40} " + "  ".join(cols))
+
+def bench_parallel():
+    """Long PDFs: sequential page loop vs process-pool page ranges (sample CVs concatenated)."""
+    import fitz
+    merged = fitz.open()
+    for _, content in _pdf_uploads():
+        with fitz.open(stream=content, filetype="pdf") as doc:
+            merged.insert_pdf(doc)
+    content = merged.tobytes()
+    parse_document(content, "long.pdf", page_limit=2, parallel=True, workers=PARALLEL_WORKERS) # warm the pool
+    seq = _timeit(lambda: parse_document(content, "long.pdf", parallel=False), repeat=3)
+    par = _timeit(lambda: parse_document(content, "long.pdf", parallel=True, workers=PARALLEL_WORKERS), repeat=3)
+    print(f"pages={merged.page_count} workers={PARALLEL_WORKERS}  sequential={seq*1000:8.1f}ms  parallel={par*1000:8.1f}ms")
+
+def bench_fill():
+    """Template load per fill: Document(path) vs a clone from the skeleton cache, and the full fill_template call."""
+    import io
+    from docx import Document
+    from main import extract_cv_data
+    from template_engine.template_models import TemplateSchema
+    from template_engine.template_mapper import fill_template
+    from template_engine.template_cache import skeleton_cache
+    cv = extract_cv_data(_pdf_uploads()[0][1], "cv.pdf")
+    for path in sorted(glob.glob(os.path.join("templates", "*.docx")))[:4]:
+        schema = TemplateSchema(template_name="bench", template_file=path, sections=[])
+        with open(path, "rb") as f:
+            raw = f.read()
+        reopen = _timeit(lambda: Document(path), repeat=10)
+        cached = _timeit(lambda: skeleton_cache.get(path), repeat=10)
+        fill_reopen = _timeit(lambda: fill_template(schema, cv, io.BytesIO(), template_bytes=raw), repeat=2)
+        fill_cached = _timeit(lambda: fill_template(schema, cv, io.BytesIO()), repeat=2)
+        print(f"{os.path.basename(path)[:40]:40} open={reopen*1000:6.1f}ms  clone={cached*1000:6.1f}ms  "
+              f"fill(reopen)={fill_reopen*1000:8.1f}ms  fill(cached)={fill_cached*1000:8.1f}ms")
+    print(f"skeleton cache: {skeleton_cache.stats()}")
+
+def bench_plan():
+    """fill_template with the precomputed template plan vs dynamic header detection on every fill."""
+    import io
+    from main import extract_cv_data
+    from template_engine import template_mapper
+    from template_engine.template_models import TemplateSchema
+    from template_engine.template_plan import build_plan_for_file, HeaderClassifier, header_classifier_for
+    cv = extract_cv_data(_pdf_uploads()[0][1], "cv.pdf")
+    for path in sorted(glob.glob(os.path.join("templates", "*.docx")))[:4]:
+        schema = TemplateSchema(template_name="bench", template_file=path, sections=[], plan=build_plan_for_file(path))
+        template_mapper.header_classifier_for = lambda *args: HeaderClassifier()
+        dynamic = _timeit(lambda: template_mapper.fill_template(schema, cv, io.BytesIO()), repeat=2)
+        template_mapper.header_classifier_for = header_classifier_for
+        planned = _timeit(lambda: template_mapper.fill_template(schema, cv, io.BytesIO()), repeat=2)
+        print(f"{os.path.basename(path)[:40]:40} dynamic={dynamic*1000:8.1f}ms  planned={planned*1000:8.1f}ms  "
+              f"speedup={dynamic / planned:4.1f}x")
+
+def _legacy_header_scan(text_clean):
+    # Pre-index behaviour: exact check + fuzz.token_set_ratio against every synonym
+    from fuzzywuzzy import fuzz
+    from template_engine.template_extractor import SECTION_SYNONYMS
+    best = 0
+    for synonyms in SECTION_SYNONYMS.values():
+        for syn in synonyms:
+            if text_clean.lower() == syn.lower(): return 100
+            best = max(best, fuzz.token_set_ratio(text_clean.upper(), syn.upper()))
+    return best
+
+def _indexed_header_scan(text_clean):
+    from template_engine.template_extractor import HEADER_MATCHER
+    if HEADER_MATCHER.exact(text_clean) is not None: return 100
+    return HEADER_MATCHER.best_match(text_clean.upper())[1]
+
+def bench_headers():
+    """Section-header synonym scoring over every paragraph in templates/: per-synonym fuzz vs the indexed matcher."""
+    from docx import Document
+    from template_engine.template_extractor import HEADER_MATCHER, iterate_doc_content
+    for path in sorted(glob.glob(os.path.join("templates", "*.docx"))):
+        texts = [e.text.strip() for t, e in iterate_doc_content(Document(path)) if t != 'table' and e.text.strip()]
+        legacy = _timeit(lambda: [_legacy_header_scan(t) for t in texts], repeat=3)
+        def indexed_cold():
+            HEADER_MATCHER.best_match.cache_clear()
+            return [_indexed_header_scan(t) for t in texts]
+        cold = _timeit(indexed_cold, repeat=3)
+        warm = _timeit(lambda: [_indexed_header_scan(t) for t in texts], repeat=3)
+        print(f"{os.path.basename(path)[:40]:40} paragraphs={len(texts):4}  legacy={legacy*1000:7.1f}ms  "
+              f"indexed={cold*1000:6.1f}ms  cached={warm*1000:5.2f}ms  speedup={legacy / max(cold, 1e-9):4.1f}x")
+
+def bench_classify():
+    """is_section_header calls per template upload (extract + clean) and per fill, with the per-document cache."""
+    import io
+    from docx import Document
+    from main import extract_cv_data
+    from template_engine import template_mapper
+    from template_engine.template_models import TemplateSchema
+    from template_engine.template_extractor import extract_template_schema, header_cache_for
+    from template_engine.template_cleaner import clean_template_content
+    from template_engine.template_plan import HeaderClassifier, header_classifier_for
+    cv = extract_cv_data(_pdf_uploads()[0][1], "cv.pdf")
+    classifiers = []
+    def dynamic_classifier(schema, doc, fingerprint):
+        classifiers.append(HeaderClassifier())
+        doc._header_cache = classifiers[-1]
+        return classifiers[-1]
+    template_mapper.header_classifier_for = dynamic_classifier
+    for path in sorted(glob.glob(os.path.join("templates", "*.docx"))):
+        doc = Document(path)
+        clean_template_content(doc, extract_template_schema(path, "bench", doc=doc))
+        upload = header_cache_for(doc).stats()
+        template_mapper.fill_template(TemplateSchema(template_name="bench", template_file=path, sections=[]), cv, io.BytesIO())
+        fill = classifiers[-1].stats()
+        print(f"{os.path.basename(path)[:40]:40} upload: calls={upload['calls']:4} classified={upload['misses']:4}  "
+              f"fill: calls={fill['calls']:4} classified={fill['misses']:4}")
+    template_mapper.header_classifier_for = header_classifier_for
+
+def bench_labels():
+    """First-column label checks for every table paragraph: scanning all rows vs the per-table index."""
+    from docx import Document
+    from template_engine.template_extractor import iterate_doc_content
+    from template_engine.table_index import TableIndex
+    for path in sorted(glob.glob(os.path.join("templates", "*.docx"))):
+        cells = [e for t, e in iterate_doc_content(Document(path)) if t == 'table_cell']
+        if not cells: continue
+        legacy = _timeit(lambda: [any(e.text.strip() == r.cells[0].text.strip() for r in e._parent_table.rows) for e in cells], repeat=2)
+        def indexed():
+            indexes = {}
+            for e in cells:
+                tbl = e._parent_table._tbl
+                if tbl not in indexes: indexes[tbl] = TableIndex(e._parent_table)
+                indexes[tbl].is_label(e.text.strip())
+        fast = _timeit(indexed, repeat=2)
+        print(f"{os.path.basename(path)[:40]:40} cell paragraphs={len(cells):4}  scan={legacy*1000:8.1f}ms  "
+              f"index={fast*1000:6.1f}ms  speedup={legacy / fast:5.1f}x")
+
+def _legacy_iterate_doc_content(doc):
+    # Pre-iter_doc_items traversal: python-docx rows/cells, wrappers and an id() set for everything
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+    from docx.document import Document as DocClass
+    yielded_ids = set()
+    def _process_container(container, parent_table=None, container_id=None):
+        container_id = id(container) if container_id is None else container_id
+        xml_body = container.element.body if isinstance(container, DocClass) else container._element
+        for child in xml_body.iterchildren():
+            if child.tag.endswith('}p'):
+                p = Paragraph(child, doc)
+                if (container_id, id(p._element)) not in yielded_ids:
+                    yielded_ids.add((container_id, id(p._element)))
+                    if parent_table: setattr(p, '_parent_table', parent_table)
+                    yield ('table_cell' if parent_table else 'para', p)
+            elif child.tag.endswith('}tbl'):
+                t = Table(child, doc)
+                if id(t._element) not in yielded_ids:
+                    yielded_ids.add(id(t._element))
+                    yield ('table', t)
+                    for row in t.rows:
+                        for cell in row.cells:
+                            yield from _process_container(cell, parent_table=t, container_id=id(cell))
+    for section in doc.sections:
+        for h in [section.header, section.first_page_header, section.even_page_header,
+                  section.footer, section.first_page_footer, section.even_page_footer]:
+            yield from _process_container(h)
+    yield from _process_container(doc)
+
+def bench_traverse():
+    """Document traversal + reading every paragraph's text: legacy wrappers vs iter_doc_items."""
+    from docx import Document
+    from template_engine.template_extractor import iter_doc_items, iterate_doc_content
+    for path in sorted(glob.glob(os.path.join("templates", "*.docx"))):
+        doc = Document(path)
+        legacy = _timeit(lambda: [e.text for k, e in list(_legacy_iterate_doc_content(doc)) if k != 'table'], repeat=3)
+        wrapped = _timeit(lambda: [e.text for k, e in list(iterate_doc_content(doc)) if k != 'table'], repeat=3)
+        lean = _timeit(lambda: [i.text for i in list(iter_doc_items(doc)) if i.kind != 'table'], repeat=3)
+        print(f"{os.path.basename(path)[:40]:40} legacy={legacy*1000:7.1f}ms  wrappers={wrapped*1000:6.1f}ms  "
+              f"lean={lean*1000:6.1f}ms  speedup={legacy / lean:4.1f}x")
+
+_PERSONAL_MAP = {"[fill Name here]": "Jane Doe", "[NAME]": "Jane Doe", "{{name}}": "Jane Doe",
+                 "{{email}}": "jane@example.com", "{{phone}}": "+1 555 0100", "{{linkedin}}": ""}
+
+def _legacy_personal_replace(doc):
+    # Pre-placeholders behaviour: every key against every paragraph, rebuilding runs via p.text
+    paragraphs = list(doc.paragraphs) + [p for t in doc.tables for r in t.rows for c in r.cells for p in c.paragraphs]
+    for p in paragraphs:
+        for k, v in _PERSONAL_MAP.items():
+            if k.lower() in p.text.lower():
+                p.text = p.text.replace(k, v)
+
+def bench_placeholders():
+    """Personal-info placeholder substitution: per-key p.text rewrites vs the single-pass w:t engine."""
+    from template_engine.template_cache import skeleton_cache
+    from template_engine.placeholders import replace_placeholders
+    for path in sorted(glob.glob(os.path.join("templates", "*.docx"))):
+        legacy = _timeit(lambda: _legacy_personal_replace(skeleton_cache.get(path)), repeat=3)
+        single = _timeit(lambda: replace_placeholders(skeleton_cache.get(path), _PERSONAL_MAP), repeat=3)
+        clone = _timeit(lambda: skeleton_cache.get(path), repeat=3)
+        print(f"{os.path.basename(path)[:40]:40} legacy={max(legacy - clone, 0)*1000:7.1f}ms  "
+              f"single-pass={max(single - clone, 0)*1000:6.1f}ms  (excluding {clone*1000:.1f}ms clone)")
+
+def bench_extract_cache():
+    """extract_cv_data for a repeated upload: full parse vs the content-hash extraction cache (temporary cache file)."""
+    import tempfile
+    import cv_pipeline
+    from extraction_engine import ExtractionCache
+    shared = cv_pipeline.extraction_cache
+    with tempfile.TemporaryDirectory() as tmp:
+        cv_pipeline.extraction_cache = ExtractionCache(os.path.join(tmp, "extraction.db"), 64 * 1024 * 1024)
+        try:
+            for name, content in _pdf_uploads():
+                parse = _timeit(lambda: cv_pipeline.extract_cv_data(content, name, use_cache=False), repeat=3)
+                cv_pipeline.extract_cv_data(content, name)
+                cached = _timeit(lambda: cv_pipeline.extract_cv_data(content, name))
+                print(f"{name[:40]:40} parse={parse*1000:8.2f}ms  cached={cached*1000:6.2f}ms  "
+                      f"speedup={parse / max(cached, 1e-9):6.0f}x")
+        finally:
+            cv_pipeline.extraction_cache = shared
+
+def _llm_stub_server(fail_first: int = 0, delay: float = 0.0, response: str = None, chunks: int = 1,
+                     per_char: float = 0.0):
+    """
+    Ollama-style stub on a free local port (keep-alive). It answers after `delay`
+    seconds plus `per_char` per prompt character (generation time grows with the
+    text to extract) with `response` (default: JSON echoing the prompt), and counts
+    connections, requests and the most requests it had in flight at once.
+    "stream": true requests get NDJSON in `chunks` pieces spread over `delay`.
+    """
+    import json
+    import socket
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    state = {"connections": 0, "requests": 0, "in_flight": 0, "max_in_flight": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            # Headers and body go out as separate writes; without this, delayed ACKs stall keep-alive calls
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            state["connections"] += 1
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            with lock:
+                state["requests"] += 1
+                state["in_flight"] += 1
+                state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+                failing = state["requests"] <= fail_first
+            text = response or json.dumps({"ok": True, "prompt": payload.get("prompt")})
+            if payload.get("stream") and not failing:
+                self._stream(text)
+                with lock:
+                    state["in_flight"] -= 1
+                return
+            time.sleep(delay + per_char * len(payload.get("prompt") or ""))
+            with lock:
+                state["in_flight"] -= 1
+            if failing:
+                status, body = 429, b'{"error": "rate limited"}'
+            else:
+                status, body = 200, json.dumps({"response": text}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, text):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            size = -(-len(text) // chunks)
+            pieces = [text[i:i + size] for i in range(0, len(text), size)]
+            for i, piece in enumerate(pieces):
+                time.sleep(delay / len(pieces))
+                line = json.dumps({"response": piece, "done": i == len(pieces) - 1}).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/generate", state
+
+def bench_llm_session():
+    """LLMService transport against a local stub: a new connection per call (requests.post) vs the pooled session."""
+    import requests
+    from jd_optimizer.llm_service import LLMService, build_http_session
+    calls = 200
+    server, url, state = _llm_stub_server()
+    try:
+        def per_call_connection():
+            for i in range(calls):
+                requests.post(url, json={"prompt": str(i)}, timeout=(10, 300)).json()
+        llm = LLMService(base_url=url, use_cache=False, session=build_http_session())
+        def pooled():
+            for i in range(calls):
+                llm.call_llm(str(i))
+        before = state["connections"]
+        fresh = _timeit(per_call_connection, repeat=3)
+        fresh_conns, before = state["connections"] - before, state["connections"]
+        pool = _timeit(pooled, repeat=3)
+        pool_conns = state["connections"] - before
+        print(f"{calls} calls x3  requests.post={fresh / calls * 1000:6.3f}ms/call ({fresh_conns} connections)  "
+              f"pooled={pool / calls * 1000:6.3f}ms/call ({pool_conns} connections)  "
+              f"saved={(fresh - pool) / calls * 1000:6.3f}ms/call (plain HTTP; TLS handshakes cost more)")
+    finally:
+        server.shutdown()
+    server, url, state = _llm_stub_server(fail_first=2)
+    try:
+        text = LLMService(base_url=url, use_cache=False, session=build_http_session(backoff_factor=0)).call_llm("retry")
+        print(f"429 x2 then 200: {state['requests']} requests, response={text}")
+    finally:
+        server.shutdown()
+
+def bench_llm_async():
+    """One CV against many JDs through a stub with 50ms latency: serial analyze_match vs aanalyze_matches fan-out."""
+    import asyncio
+    from jd_optimizer.llm_service import LLMService, build_http_session
+    from jd_optimizer.llm_limits import set_provider_limits, PROVIDER_LIMITS
+    from jd_optimizer.analysis import JDOptimizer
+    jds = [f"JD {i}" for i in range(50)]
+    cv = {"full_name": "A", "skills": ["python"]}
+    saved = PROVIDER_LIMITS["ollama"]
+    server, url, state = _llm_stub_server(delay=0.05)
+    try:
+        optimizer = JDOptimizer(LLMService(base_url=url, use_cache=False, session=build_http_session()))
+        t0 = time.perf_counter()
+        serial = [optimizer.analyze_match(cv, jd) for jd in jds]
+        serial_t = time.perf_counter() - t0
+        for concurrency, rate in ((2, 0), (8, 0), (8, 40)):
+            set_provider_limits("ollama", concurrency, rate)
+            state["max_in_flight"] = 0
+            t0 = time.perf_counter()
+            fanned = asyncio.run(optimizer.aanalyze_matches(cv, jds))
+            fan_t = time.perf_counter() - t0
+            ordered = all(f"JD {i}\n" in r["prompt"] for i, r in enumerate(fanned))
+            print(f"{len(jds)} JDs  serial={serial_t*1000:7.1f}ms  concurrency={concurrency} rate={rate or '-':>3}/s  "
+                  f"fan-out={fan_t*1000:7.1f}ms  max_in_flight={state['max_in_flight']}  in_order={ordered}  "
+                  f"same_as_serial={[r['ok'] for r in fanned] == [r['ok'] for r in serial]}")
+    finally:
+        set_provider_limits("ollama", *saved)
+        server.shutdown()
+
+def bench_llm_stream():
+    """Analysis streamed from a stub generating for 1s: time until scores / missing_keywords vs the full response."""
+    import json
+    from jd_optimizer.llm_service import LLMService, build_http_session
+    from jd_optimizer.analysis import JDOptimizer
+    from jd_optimizer.json_stream import STREAM_DONE
+    answer = json.dumps({
+        "scores": {"technical": 72, "experience": 64, "overall": 68},
+        "analysis": "Solid backend profile; little cloud exposure.",
+        "missing_keywords": ["kubernetes", "terraform", "gcp"],
+        "suggestions": [{"section": "skills", "type": "Add", "suggested_text": f"Skill {i}",
+                         "reason": "Mentioned in the JD as a requirement. " * 4} for i in range(20)]
+    })
+    cv = {"full_name": "A", "skills": ["python"]}
+    server, url, state = _llm_stub_server(delay=1.0, response=answer, chunks=200)
+    try:
+        optimizer = JDOptimizer(LLMService(base_url=url, use_cache=False, session=build_http_session()))
+        t0 = time.perf_counter()
+        blocking = optimizer.analyze_match(cv, "JD")
+        blocking_t = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        seen = {}
+        for key, value in optimizer.stream_analyze_match(cv, "JD"):
+            seen[key] = time.perf_counter() - t0
+            if key == STREAM_DONE:
+                streamed = value
+        print(f"{len(answer)} chars in 200 chunks over 1s  blocking={blocking_t*1000:7.1f}ms  "
+              f"streamed: scores={seen['scores']*1000:6.1f}ms  missing_keywords={seen['missing_keywords']*1000:6.1f}ms  "
+              f"suggestions={seen['suggestions']*1000:7.1f}ms  "
+              f"same_result={ {k: v for k, v in streamed.items() if k != 'llm_meta'} == {k: v for k, v in blocking.items() if k != 'llm_meta'} }")
+    finally:
+        server.shutdown()
+
+def bench_shred_chunked():
+    """A 40-job CV through a stub that takes 0.1ms per prompt char: single truncated prompt vs chunked sections."""
+    from jd_optimizer.llm_service import LLMService, build_http_session
+    from jd_optimizer.llm_limits import set_provider_limits, PROVIDER_LIMITS
+    from jd_optimizer.cv_shredder import CVShredder, SECTION_CHARS
+    jobs = 40
+    cv = ("Jane Doe\njane@example.com\nBackend engineer.\nWORK EXPERIENCE\n"
+          + "\n".join(f"Engineer at Company {i}\n2010 - 2011\n" + "Built and ran services. " * 30 for i in range(jobs))
+          + "\nSKILLS\nPython, Go, SQL\nEDUCATION\nBSc Computer Science\n")
+    saved = PROVIDER_LIMITS["ollama"]
+    server, url, state = _llm_stub_server(per_char=0.0001)
+    try:
+        shredder = CVShredder(LLMService(base_url=url, use_cache=False, session=build_http_session()))
+        t0 = time.perf_counter()
+        shredder.shred_cv(cv)
+        single_t = time.perf_counter() - t0
+        single_jobs = shredder._user_prompt(cv).count("Engineer at")
+        pieces = shredder._chunk_jobs(cv, SECTION_CHARS)
+        chunk_jobs = sum(text.count("Engineer at") for _, _, text in pieces)
+        for concurrency in (2, 8):
+            set_provider_limits("ollama", concurrency)
+            t0 = time.perf_counter()
+            shredder.shred_cv_chunked(cv)
+            chunked_t = time.perf_counter() - t0
+            print(f"{len(cv)} chars  single={single_t*1000:6.1f}ms ({single_jobs}/{jobs} jobs sent)  "
+                  f"chunked concurrency={concurrency}: {chunked_t*1000:6.1f}ms ({len(pieces)} calls, "
+                  f"longest prompt {max(len(t) for _, _, t in pieces)} chars, {chunk_jobs}/{jobs} jobs sent)")
+    finally:
+        set_provider_limits("ollama", *saved)
+        server.shutdown()
+
+BENCHMARKS = {
+    "skills": bench_skills,
+    "taxonomy_scale": bench_taxonomy_scale,
+    "parse": bench_parse,
+    "tables": bench_tables,
+    "parallel": bench_parallel,
+    "fill": bench_fill,
+    "plan": bench_plan,
+    "headers": bench_headers,
+    "classify": bench_classify,
+    "labels": bench_labels,
+    "traverse": bench_traverse,
+    "placeholders": bench_placeholders,
+    "extract_cache": bench_extract_cache,
+    "llm_session": bench_llm_session,
+    "llm_async": bench_llm_async,
+    "llm_stream": bench_llm_stream,
+    "shred_chunked": bench_shred_chunked,
+}
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for key in selected:
+        print(f"== {key}: {BENCHMARKS[key].__doc__}")
+        BENCHMARKS[key]()
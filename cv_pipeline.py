@@ -0,0 +1,1000 @@
+"""
+CV extraction and the blocking stages behind the API endpoints.
+
+Kept apart from main.py so that the spawned worker processes only import what
+they run: importing this module builds no FastAPI app, creates no directories,
+loads no models and starts no job queue.
+"""
+import os
+import io
+import re
+import logging
+from typing import List, Dict, Any, Optional
+from docx import Document
+from fuzzywuzzy import fuzz
+
+from template_engine.template_models import TemplateSchema
+from template_engine.template_extractor import extract_template_schema
+from template_engine.template_manager import register_template, get_template_schema
+from template_engine.template_mapper import fill_template, render_template
+from template_engine.template_cleaner import clean_template_content
+from taxonomy import get_skill_taxonomy
+from extraction_engine import ParsedDocument, parse_document, DEFAULT_TABLE_STRATEGY, DEFAULT_TABLE_PAGES
+from extraction_engine import ExtractionCache, extraction_key, CACHE_DIR, DEFAULT_CACHE_MB
+from extraction_engine import get_cv_segments, disable_parallel_parsing
+
+logger = logging.getLogger("CV-Reformatter-MVP")
+
+OUTPUT_DIR = "output"
+TEMPLATES_DIR = "templates"
+
+def configure_logging():
+    """Log to debug/app.log and the console (the API process and every worker)."""
+    os.makedirs("debug", exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO, 
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("debug/app.log"),
+            logging.StreamHandler()
+        ]
+    )
+
+def init_worker():
+    """Initializer of the API's worker processes."""
+    configure_logging()
+    # The pool already spreads CVs across cores; a page pool per worker would oversubscribe them
+    disable_parallel_parsing()
+
+class TemplateNotFoundError(LookupError):
+    """Raised by the worker stages; the endpoints turn it into a 404."""
+
+# Robust Section Detection keywords
+SECTION_KEYWORDS = [
+    "summary", "profile", "experience", "education", "projects", "skills", 
+    "tools", "certifications", "declaration", "languages", "personal"
+]
+
+# Hard-coded Section Boundaries
+SECTION_HEADERS = [
+    "profile summary", "work experience", "professional experience", 
+    "education", "project details", "projects", "key skills", 
+    "other skills", "tools", "certifications", "declaration", "summary", "key skills and knowledge"
+]
+
+def is_any_section_header(line: str) -> bool:
+    """Strictly checks for section transitions."""
+    l = line.strip().lower()
+    if not l or len(l) > 40: return False
+    # Exact match for common headers
+    if l in SECTION_HEADERS: return True
+    # Startswith match for headers that often have dates/extra text
+    for k in ["education", "experience", "projects", "skills"]:
+        if l.startswith(k) and len(l) < 25: return True
+    return False
+
+SECTION_HEAD_SUMMARY_RE = re.compile(r'^\s*(Profile\s+)?Summary\b|^\s*Profile\b', re.I)
+SECTION_HEAD_EDUCATION_RE = re.compile(r'^\s*Education\b', re.I)
+SECTION_HEAD_PROJECTS_RE = re.compile(r'^\s*Projects?|^\s*Project\s+Details\b', re.I)
+SECTION_HEAD_SKILLS_RE = re.compile(r'^\s*(Key\s+)?Skills?\b|^\s*Tools\b', re.I)
+SECTION_HEAD_EXPERIENCE_RE = re.compile(r'^\s*Experience|^\s*Work\s+Experience\b', re.I)
+SECTION_HEAD_CERTS_RE = re.compile(r'^\s*(certifications?|courses?|awards?|training and certifications?|training)\b', re.I)
+DATE_RE = re.compile(r'\b(19|20)\d{2}\b|\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\b', re.I)
+
+# Deprecated fallback
+TOP_SECTION_RE = re.compile(r'^(Summary|Profile|Experience|Education|Projects|Skills|Certifications|Tools)\b', re.I)
+
+
+# Preprocessing Helpers
+
+def detect_section(line: str) -> Optional[str]:
+    """Helper to detect CV sections using fuzzy matching."""
+    if not line or len(line) > 50: return None
+    
+    # Normalize: lowercase and strip punctuation
+    clean = re.sub(r'[^\w\s]', '', line.lower().strip())
+    if not clean: return None
+
+    mapping = {
+        "experience": ["work experience", "professional experience", "experience", "employment history", "career history", "experience timeline", "internship experience"],
+        "projects": ["projects", "project details", "academic projects", "featured projects", "major projects", "key projects"],
+        "skills": ["skills", "technical skills", "key skills", "core skills", "skills & tools", "tech stack", "tools & technologies", "key skills and knowledge", "other skills", "tools", "technical skills matrix", "technology matrix", "technical competencies"]
+    }
+
+    for section, variants in mapping.items():
+        for v in variants:
+            # High threshold for fuzzy match to avoid false positives on list items
+            if v == clean or fuzz.ratio(clean, v) > 85:
+                return section
+    return None
+
+def preprocess_image(image_bytes: bytes, filename: str = "", table_strategy: str = DEFAULT_TABLE_STRATEGY,
+                     table_pages: int = DEFAULT_TABLE_PAGES) -> Dict[str, Any]:
+    """Extracts text and structural table data from PDF or Image."""
+    return preprocessed_from(parse_document(image_bytes, filename, table_strategy=table_strategy, table_pages=table_pages))
+
+def preprocessed_from(parsed: ParsedDocument) -> Dict[str, Any]:
+    """{'text', 'tables'} view of an already parsed document."""
+    results = parsed.as_dict()
+    if parsed.error:
+        results["text"] = "Error extracting text"
+    return results
+
+def extract_name_and_contact(source: Any, filename: str = "") -> Dict[str, str]:
+    """Uses font-size heuristics to extract name and regex for contact info.
+    Accepts a ParsedDocument, or raw upload bytes (only the first page is parsed)."""
+    results = {"name": "Applicant", "email": "N/A", "phone": "N/A", "linkedin": "N/A"}
+    
+    parsed = source if isinstance(source, ParsedDocument) else parse_document(source, filename, page_limit=1, table_strategy="never")
+    if not parsed.is_pdf:
+        return results
+
+    try:
+        spans = parsed.first_page_spans
+        
+        if not spans: return results
+        
+        # 1. Identify NAME: All spans with the max font size in the top area
+        candidate_spans = [s for s in spans if len(s['text'].strip()) > 2 and re.search('[a-zA-Z]', s['text'])]
+        if candidate_spans:
+            max_size = max(s['size'] for s in candidate_spans)
+            # Find all spans within 1pt of max_size
+            name_parts = [s['text'].strip() for s in candidate_spans if abs(s['size'] - max_size) < 1.0]
+            # Join them
+            full_name = " ".join(dict.fromkeys(name_parts))
+            
+            # GUARD: A valid name is usually 1-4 words and < 50 chars
+            if len(full_name.split()) <= 4 and len(full_name) < 50:
+                 results["name"] = full_name
+            else:
+                 # If too long, try the VERY FIRST high-confidence span only
+                 first_span = candidate_spans[0]['text'].strip()
+                 if len(first_span.split()) <= 4:
+                     results["name"] = first_span
+                 else:
+                     results["name"] = "Applicant"
+            
+        # 2. Identify CONTACT: Use regex on the raw text of the first page
+        raw_text = parsed.first_page_text
+        email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', raw_text)
+        phone_match = re.search(r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4,}', raw_text)
+        linkedin_match = re.search(r'linkedin\.com/in/[\w\.-]+', raw_text)
+        
+        if email_match: results["email"] = email_match.group(0)
+        if phone_match: results["phone"] = phone_match.group(0)
+        if linkedin_match: results["linkedin"] = linkedin_match.group(0)
+            
+    except Exception as e:
+        logger.error(f"Error extracting name: {e}")
+        
+    return results
+
+def is_responsibility_line(line: str) -> bool:
+    """Detects if a line represents an action or responsibility."""
+    # Strip bullets and symbols
+    clean = line.lstrip("▪•- *").strip()
+    if not clean: return False
+    
+    # Rule 1: Starts with a bullet point
+    if any(line.lstrip().startswith(b) for b in ["▪", "•", "-", "*"]):
+        return True
+    
+    # Rule 2: Starts with a strong action verb
+    verbs = ["designed", "developed", "implemented", "built", "led", "managed", 
+             "created", "optimized", "improved", "migrated", "architected", "configured"]
+    
+    first_word = re.sub(r'[^\w]', '', clean.split()[0].lower()) if clean.split() else ""
+    if first_word in verbs:
+        return True
+        
+    return False
+
+def is_location(text: str) -> bool:
+    """Heuristic to detect if a string is likely a location."""
+    if not text: return False
+    places = ["kochi", "bangalore", "mumbai", "india", "trivandrum", "ireland", "us", "thailand", "san francisco", "ca", "calicut"]
+    text_lower = text.lower()
+    
+    # Check if any place is a standalone word or the string ends with it
+    for p in places:
+        if p in text_lower and len(text.split()) <= 3:
+            return True
+    if text_lower.endswith(", india") or text_lower.endswith(", us"):
+        return True
+    return False
+
+def extract_summary(input_data: Any) -> str:
+    """Standard summary extraction - Stable Version."""
+    text = input_data["text"] if isinstance(input_data, dict) else str(input_data)
+    
+    noise_re = re.compile(r'^[•▪\-\*▪\t\s]+')
+    sentences = []
+    
+    text = text.replace("[FILL HERE]", "").strip()
+    for line in text.split('\n'):
+        l = noise_re.sub('', line).strip()
+        if not l or len(l) < 10: continue
+        
+        candidates = re.split(r'(?<=[.!?])\s+', l)
+        for cand in candidates:
+            cand = cand.strip()
+            if not cand: continue
+            if not any(fuzz.ratio(cand.lower(), ex.lower()) > 85 for ex in sentences):
+                sentences.append(cand)
+                
+    result = " ".join(sentences)
+    if result and result[-1].isalnum():
+        result += "."
+    return result
+
+def extract_skills_it(input_data: Any, candidate_name: str = "") -> Dict[str, List[str]]:
+    """Industry-standard technical skill and tool extraction."""
+    if isinstance(input_data, dict):
+        text = input_data.get("text", "")
+        tables = input_data.get("tables", [])
+    else:
+        text = str(input_data)
+        tables = []
+
+    # Skill/tool vocabulary: loaded from taxonomy/skills.json and indexed once per process
+    taxonomy = get_skill_taxonomy()
+    tech_skills = []
+    tech_tools = []
+    noise_re = re.compile(r'^[•▪\-\*▪\x00-\x1f\x7f-\x9f\s\t/]+')
+    name_parts = candidate_name.lower().split() if candidate_name else []
+    
+    # Junk to discard (Soft skills or non-IT fluff)
+    junk_filters = ["communication", "team work", "interpersonal", "fast learning", "highly adaptive", "flexible", "team player", "problem solving", "other skills", "knowledge"]
+
+    # Collect all items to process (from text lines and table cells)
+    source_items = text.split('\n')
+    for table in tables:
+        for row in table.get("rows", []):
+            source_items.extend(row.values())
+
+    for line in source_items:
+        line = str(line).strip()
+        if not line or len(line) > 1000: continue
+        if name_parts and any(p in line.lower() for p in name_parts if len(p) > 2): continue
+        
+        line = noise_re.sub('', line).strip()
+        # Handle both comma/bullet separated and space-separated if long
+        parts = re.split(r'[,\u2022•;|]', line)
+        for part in parts:
+            t = part.strip(" .()[]/\\")
+            if not t or len(t) < 2: continue
+            
+            t_low = t.lower()
+            if any(j in t_low for j in junk_filters): continue
+
+            # Check for location or section header bleed
+            if is_location(t) or t_low in SECTION_HEADERS:
+                continue
+
+            # Match against the skill taxonomy to avoid noise
+            is_tech = False
+            is_tool = False
+            # Don't stop at the first hit, a line might contain multiple known skills
+            for entry in taxonomy.find(t_low):
+                val = entry.canonical
+                if entry.kind == "tool":
+                    if val not in tech_tools: tech_tools.append(val)
+                    is_tool = True
+                else:
+                    if val not in tech_skills: tech_skills.append(val)
+                    is_tech = True
+            
+            # Fallback: If it wasn't a known "Tech" or "Tool", but it appeared in this section...
+            # and it's short and not junk, treat it as a generic skill.
+            if not is_tech and not is_tool and len(t) < 30:
+                if t not in tech_skills:
+                    tech_skills.append(t)
+                    is_tool = True
+            
+            if not is_tech and not is_tool:
+                # Fallback for acronyms or capitalized products not in our small dicts
+                if len(t) <= 15 and any(c.isupper() for c in t) and not is_location(t):
+                     t_low = t.lower()
+                     if t_low not in tech_skills and t_low not in ["other", "skills", "knowledge", "role", "duration", "tech stack", "project", "details", "description"]:
+                        # Strict check: ignore patterns like 'Project #1', 'Project Title', 'Duration:'
+                        if "project" in t_low or "title" in t_low or "duration" in t_low or "#" in t_low:
+                            continue
+                        tech_skills.append(t)
+
+    return {"skills": tech_skills, "tools": tech_tools}
+
+    return {"skills": tech_skills, "tools": tech_tools}
+
+# Alias for backward compatibility
+extract_skills = extract_skills_it
+
+def is_valid_institution(text: str) -> bool:
+    """Strict institution validation."""
+    if not text or len(text) < 5: return False
+    l_low = text.lower()
+    
+    # Aggressive block list
+    block_words = ["training", "certification", "experience", "summary", "project", "details", "highlights", "profile", "career", "technical"]
+    if any(x in l_low for x in block_words):
+        return False
+        
+    # Valid indicators
+    inst_keywords = ["university", "college", "institute", "school", "academy", "vidyalaya", "management", "science", "technology"]
+    if any(k in l_low for k in inst_keywords):
+        return True
+    
+    # Length and casing check
+    words = text.split()
+    if 2 <= len(words) <= 8 and all(w[0].isupper() for w in words if w.isalpha()):
+        return True
+        
+    return False
+
+def is_likely_role(text: str) -> bool:
+    """Check if text contains role-related keywords."""
+    roles = ["engineer", "developer", "manager", "lead", "architect", "analyst", "coder", "designer", "specialist", "intern", "trainee"]
+    text_lower = text.lower()
+    return any(r in text_lower for r in roles)
+
+def extract_work_experience(input_data: Any) -> List[Dict[str, str]]:
+    """Standard experience extraction - Stable Phase 2 Version."""
+    if isinstance(input_data, dict):
+        text = input_data.get("text", "")
+        tables = input_data.get("tables", [])
+    else:
+        text = str(input_data)
+        tables = []
+
+    experience = []
+
+    # 1. Structural Table Extraction (High Fidelity)
+    for table in tables:
+        headers = [h.lower() for h in table.get("headers", [])]
+        rows = table.get("rows", [])
+        
+        # Check if this table looks like an experience grid
+        exp_markers = ["company", "employer", "organization", "period", "duration", "role", "designation"]
+        if any(m in " ".join(headers) for m in exp_markers):
+            for row in rows:
+                item = {"company": "N/A", "role": "N/A", "duration": "N/A", "location": "N/A", "responsibilities": ""}
+                for k, v in row.items():
+                    kl = k.lower()
+                    if "company" in kl or "employer" in kl: item["company"] = v
+                    elif "role" in kl or "designation" in kl: item["role"] = v
+                    elif "duration" in kl or "period" in kl: item["duration"] = v
+                    elif "location" in kl: item["location"] = v
+                    elif "responsibilities" in kl or "description" in kl or "details" in kl: item["responsibilities"] = v
+                
+                if item["company"] != "N/A" or item["role"] != "N/A":
+                    experience.append(item)
+
+    # 2. Legacy Regex-based Extraction
+    lines = text.split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if not line:
+            i += 1
+            continue
+            
+        has_date = bool(DATE_RE.search(line))
+        has_sep = any(s in line for s in ['|', '-', '–', ',', '\t'])
+        
+        if has_date and has_sep and len(line) < 150:
+            if not is_responsibility_line(line):
+                # Split using pipes or dashes first, as they are cleaner field separators
+                parts = [p.strip() for p in re.split(r'\s*[|–-]\s*|\t+', line) if p.strip()]
+                
+                # Intelligent Field Assignment
+                company = parts[0]
+                role = "N/A"
+                duration = "N/A"
+                location = "N/A"
+                
+                # If we have multiple parts, try to identify which is which
+                other_parts = parts[1:]
+                for p in other_parts:
+                    if bool(DATE_RE.search(p)):
+                        duration = p
+                    elif is_likely_role(p):
+                        role = p
+                    elif is_location(p) or "india" in p.lower():
+                        location = p
+                
+                # If role is still N/A, take the first non-date, non-location part
+                if role == "N/A":
+                    for p in other_parts:
+                        if p != duration and p != location:
+                            role = p; break
+
+                # Fallback for comma-separated single line: "Company, Role, Date"
+                if role == "N/A" and ',' in company:
+                    c_parts = [cp.strip() for cp in company.split(',')]
+                    if len(c_parts) >= 2:
+                        company = c_parts[0]
+                        role = c_parts[1]
+                        if len(c_parts) > 2 and duration == "N/A":
+                            duration = c_parts[-1]
+
+                # Role Lookahead
+                if role == "N/A" and i + 1 < len(lines):
+                    next_l = lines[i+1].strip()
+                    if next_l and not is_responsibility_line(next_l) and not DATE_RE.search(next_l):
+                        role = next_l
+                        i += 1
+                
+                resps = []
+                j = i + 1
+                while j < len(lines):
+                    l_sub = lines[j].strip()
+                    if not l_sub or is_any_section_header(l_sub): break
+                    
+                    # Stop if a new job header is detected
+                    if bool(DATE_RE.search(l_sub)) and any(s in l_sub for s in ['|', '-', '–', '\t', ',']):
+                        break
+                        
+                    if is_responsibility_line(l_sub) or len(l_sub) > 20:
+                        resps.append(l_sub.lstrip("▪•- *").strip())
+                    j += 1
+                
+                # Check for duplicates before adding
+                is_dup = False
+                for existing in experience:
+                    if fuzz.ratio(company.lower(), existing["company"].lower()) > 85 and \
+                       fuzz.ratio(role.lower(), existing["role"].lower()) > 85:
+                        is_dup = True
+                        break
+                
+                if not is_dup:
+                    experience.append({
+                        "company": company,
+                        "role": role,
+                        "duration": duration,
+                        "location": location,
+                        "responsibilities": " ".join(resps)
+                    })
+                i = j
+                continue
+        i += 1
+    return experience
+
+def extract_projects(input_data: Any, companies: List[str] = None) -> List[Dict[str, Any]]:
+    """Identifies projects while filtering out company names from experience."""
+    if isinstance(input_data, dict):
+        text = input_data.get("text", "")
+        tables = input_data.get("tables", [])
+    else:
+        text = str(input_data)
+        tables = []
+
+    projects = []
+    
+    # 1. Structural Table Extraction
+    for table in tables:
+        headers = [h.lower() for h in table.get("headers", [])]
+        rows = table.get("rows", [])
+        
+        proj_markers = ["project", "client", "tech", "role", "description"]
+        if any(m in " ".join(headers) for m in proj_markers):
+            for row in rows:
+                item = {"title": "Project", "tech": "N/A", "duration": "N/A", "role": "N/A", "details": ""}
+                for k, v in row.items():
+                    kl = k.lower()
+                    if "title" in kl or "project" in kl: item["title"] = v
+                    elif "stack" in kl or "technolog" in kl: item["tech"] = v
+                    elif "role" in kl: item["role"] = v
+                    elif "duration" in kl or "period" in kl: item["duration"] = v
+                    elif "description" in kl or "details" in kl or "summary" in kl: item["details"] = v
+                    elif "responsibilities" in kl: item["responsibilities"] = v
+                
+                # Pradeep's CV specific cleanup: If title is empty but we have 'Project #1:', fix it
+                if item["title"].lower().startswith("project") and not v and ":" in k:
+                     # This handles cases where the key is "Project #1:" and value is empty
+                     item["title"] = k.rstrip(":")
+
+                if item["title"] != "Project" or item["details"] or item["tech"] != "N/A":
+                    projects.append(item)
+
+    # 2. Legacy Extraction
+    lines = text.split('\n')
+    current = None
+    
+    company_names = [c.lower() for c in (companies or [])]
+    
+    def start_new(title):
+        return {"title": title, "tech": "N/A", "duration": "N/A", "role": "N/A", "desc": [], "role_text": ""}
+
+    def flush_project():
+        nonlocal current
+        if current:
+            # Validate: Title shouldn't be a company name or section header
+            t_low = current['title'].lower()
+            if any(c in t_low for c in company_names) and len(t_low) < 50:
+                 current = None
+                 return
+            
+            if len(current['title']) < 3 or is_any_section_header(current['title']):
+                current = None
+                return
+
+            # Check for duplicates from tables
+            is_dup = False
+            for p in projects:
+                if fuzz.ratio(current['title'].lower(), p['title'].lower()) > 90:
+                    is_dup = True
+                    break
+            if is_dup:
+                current = None
+                return
+
+            desc_str = " ".join(current['desc'])
+            # Basic cleanup of desc
+            desc_str = desc_str.replace("Responsibilities:", "").strip()
+            
+            projects.append({
+                "title": current['title'],
+                "tech": current['tech'] if current.get('tech') != "N/A" else current.get('stack', 'N/A'),
+                "duration": current['duration'],
+                "role": current.get('role_text', current['role']),
+                "responsibilities": current.get('responsibilities', ""),
+                "details": desc_str
+            })
+            current = None
+
+    # Metadata patterns
+    META_KEYS = {
+        "client": re.compile(r'^(client|customer|organization)\s*:', re.I),
+        "role": re.compile(r'^(role|position)\s*:', re.I),
+        "tech": re.compile(r'^(tech stack|technologies|environment|tools|stack)\s*:', re.I),
+        "duration": re.compile(r'^(duration|period|time)\s*:', re.I),
+        "responsibilities": re.compile(r'^(responsibilities|tasks|duties|roles and responsibilities)\s*:', re.I),
+        "overview": re.compile(r'^(project overview|description|summary|details)\s*:', re.I)
+    }
+
+    for i, line in enumerate(lines):
+        l = re.sub(r'^[•▪\-\*▪\x00-\x1f\x7f-\x9f\s]+', '', line).strip()
+        if not l: continue
+        l_low = l.lower()
+        
+        # Meta Check
+        is_meta = False
+        for key, ptrn in META_KEYS.items():
+            if ptrn.match(l):
+                is_meta = True
+                val = l.split(":", 1)[1].strip()
+                if not current: current = start_new("Project")
+                
+                if key == "tech": current['tech'] = val
+                elif key == "duration": current['duration'] = val
+                elif key == "role": current['role_text'] = val
+                elif key == "responsibilities": 
+                    current['responsibilities'] = val
+                    if not current['desc']: current['desc'].append(val) # Fallback to desc
+                elif key == "overview": current['desc'].append(val)
+                break
+        
+        if is_meta: continue
+        
+        # Piped Header Check (Role | Project | Date)
+        if '|' in l and len(l) < 120:
+            flush_project()
+            parts = l.split('|')
+            current = start_new(parts[0].strip())
+            if len(parts) > 1: 
+                p2 = parts[1].strip()
+                # Heuristic: If it contains tech keywords, it's tech, not role
+                if any(k in p2.lower() for k in ["code", "git", "php", "aws", "stack", "env", "sql", "js"]):
+                    current['tech'] = p2
+                else:
+                    current['role_text'] = p2
+            continue
+            
+        # Title detection
+        if 5 < len(l) < 100 and not l.endswith('.') and l[0].isupper():
+             # If next line looks like project meta, it's definitely a title
+             is_def_title = False
+             if i + 1 < len(lines):
+                  nl = lines[i+1].strip().lower()
+                  if any(k in nl for k in ["role:", "tech stack:", "technologies:", "project overview:"]):
+                      is_def_title = True
+             
+             if is_def_title:
+                 flush_project()
+                 current = start_new(l)
+                 continue
+
+        if current:
+            if is_any_section_header(l):
+                flush_project()
+            else:
+                if l not in current['desc']:
+                    current['desc'].append(l)
+
+    flush_project()
+    return projects
+
+def extract_education(input_data: Any) -> List[Dict[str, str]]:
+    """Strict education extraction - requires both degree keyword AND reasonable context."""
+    if isinstance(input_data, dict):
+        text = input_data.get("text", "")
+        tables = input_data.get("tables", [])
+    else:
+        text = str(input_data)
+        tables = []
+
+    education = []
+
+    # 1. Table Extraction
+    for table in tables:
+        headers = [h.lower() for h in table.get("headers", [])]
+        rows = table.get("rows", [])
+        
+        edu_markers = ["degree", "qualification", "university", "college", "institute", "year", "pass"]
+        if any(m in " ".join(headers) for m in edu_markers):
+            for row in rows:
+                item = {"degree": "N/A", "institution": "N/A", "duration": "N/A"}
+                for k, v in row.items():
+                    kl = k.lower()
+                    if "degree" in kl or "qualification" in kl: item["degree"] = v
+                    elif "university" in kl or "college" in kl or "institute" in kl: item["institution"] = v
+                    elif "year" in kl or "pass" in kl or "duration" in kl: item["duration"] = v
+                
+                if item["degree"] != "N/A" or item["institution"] != "N/A":
+                    education.append(item)
+
+    # 2. Legacy Regex Logic
+    lines = text.split('\n')
+    degree_keywords = ["bachelor", "master", "degree", "diploma", "b.a", "b.s", "m.a", "m.s", "btech", "mtech", "b.tech", "m.tech", "bca", "mca", "b.sc", "m.sc", "graduate", "certificate"]
+    
+    for i, line in enumerate(lines):
+        l = re.sub(r'^[•▪\-\*▪\s\t]+', '', line).strip()
+        if not l or len(l) < 5: continue
+        l_low = l.lower()
+        
+        if not any(k in l_low for k in degree_keywords): continue
+        if "|" in l or " - " in l:
+            if any(r in l_low for r in ["engineer", "developer", "manager", "lead", "architect", "analyst", "technologies", "informatics"]):
+                continue
+
+        if len(l.split()) > 15: continue
+
+        year_match = re.search(r'\b(19|20)\d{2}\b', l)
+        year = year_match.group(0) if year_match else "N/A"
+        
+        title = l.replace(year, "").strip(" -–,|•▪")
+        parts = re.split(r'[–-]|\|', title)
+        degree = parts[0].strip()
+        inst = "N/A"
+        
+        if len(parts) > 1:
+            inst = parts[1].strip()
+        else:
+            for k in range(max(0, i-1), min(i+3, len(lines))):
+                if k == i: continue
+                nl = lines[k].strip()
+                if nl and is_valid_institution(nl) and not any(kw in nl.lower() for kw in degree_keywords):
+                    inst = nl
+                    break
+        
+        if degree:
+            # Deduplicate
+            is_dup = False
+            for existing in education:
+                if fuzz.partial_ratio(degree.lower(), existing["degree"].lower()) > 85:
+                    is_dup = True; break
+            if not is_dup:
+                education.append({"degree": degree, "institution": inst, "duration": year})
+
+    return education
+
+def extract_certifications(input_data: Any) -> List[Dict[str, str]]:
+    """Generic certification extraction handling wrapped lines/URLs."""
+    if isinstance(input_data, dict):
+        text = input_data.get("text", "")
+        tables = input_data.get("tables", [])
+    else:
+        text = str(input_data)
+        tables = []
+
+    cert_lines = []
+    
+    # Process tables if they contain certifications
+    for table in tables:
+        headers = " ".join(table.get("headers", [])).lower()
+        if "cert" in headers or "course" in headers or "award" in headers:
+            for row in table.get("rows", []):
+                cert_lines.append(" - ".join([str(v) for v in row.values() if v]))
+
+    lines = text.split('\n')
+    for line in lines:
+        line = line.strip()
+        if not line: continue
+        
+        is_bullet = any(line.startswith(b) for b in ["•", "-", "*"])
+        if is_bullet:
+            cert_lines.append(line.lstrip("•- *").strip())
+        elif line.lower().startswith("http"):
+            if cert_lines: cert_lines[-1] += " " + line
+            else: cert_lines.append(line)
+        else:
+            if cert_lines: cert_lines[-1] += " " + line
+            else: cert_lines.append(line)
+                 
+    certs = []
+    for raw in cert_lines:
+        url = "N/A"
+        url_match = re.search(r'https?://[^\s,]+', raw)
+        title = raw
+        issuer = "N/A"
+        
+        if url_match:
+            url = url_match.group(0)
+            title = raw.replace(url, "").strip(" -–,")
+            
+        if '-' in title or '–' in title:
+             parts = re.split(r'[–-]', title, maxsplit=1)
+             if len(parts) >= 2:
+                 title = parts[0].strip()
+                 issuer = parts[1].strip()
+        
+        if title:
+            certs.append({"title": title, "issuer": issuer, "url": url})
+        
+    return certs
+
+# Bump when an extractor change alters extract_cv_data output, so cached results are not served
+EXTRACTOR_VERSION = "1"
+
+# Extraction results keyed by the upload's content hash (EXTRACTION_CACHE_MB=0 disables it).
+# The cache file is shared by every worker process.
+extraction_cache = ExtractionCache(os.path.join(CACHE_DIR, "extraction.db"),
+                                   int(float(os.environ.get("EXTRACTION_CACHE_MB", DEFAULT_CACHE_MB)) * 1024 * 1024))
+
+def extract_cv_data(source: Any, filename: Optional[str] = None, table_strategy: str = DEFAULT_TABLE_STRATEGY,
+                    table_pages: int = DEFAULT_TABLE_PAGES, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Full CV extraction from a file path, raw upload bytes or a ParsedDocument.
+    The PDF is opened and parsed once; every extractor reads from that parse.
+    `extraction_meta` records how the document was parsed (e.g. which pages were scanned for tables).
+    Bytes and paths are looked up in the extraction cache first, so a CV seen
+    before (under any filename) is not parsed again.
+    """
+    cache_key = None
+    if isinstance(source, ParsedDocument):
+        parsed = source
+    else:
+        if isinstance(source, (str, os.PathLike)):
+            filename = filename or os.path.basename(source)
+            with open(source, "rb") as f:
+                source = f.read()
+        if use_cache and extraction_cache.enabled:
+            cache_key = extraction_key(source, filename or "", EXTRACTOR_VERSION,
+                                       table_strategy=table_strategy, table_pages=table_pages)
+            cached = extraction_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        parsed = parse_document(source, filename or "", table_strategy=table_strategy, table_pages=table_pages)
+
+    # 0. Personal Info Extraction
+    personal = extract_name_and_contact(parsed)
+    
+    # 1. Segmented Extraction
+    segs = get_cv_segments(preprocessed_from(parsed))
+    skills_obj = extract_skills_it(segs.get("skills", ""), personal.get("name", "Applicant"))
+    
+    # Collect company names to filter projects
+    work_exp = extract_work_experience(segs.get("experience", ""))
+    companies = [job.get("company", "") for job in work_exp if job.get("company")]
+
+    result = {
+        "full_name": personal.get("name", "Applicant"),
+        "email": personal.get("email", "N/A"),
+        "phone": personal.get("phone", "N/A"),
+        "linkedin": personal.get("linkedin", "N/A"),
+        "summary": extract_summary(segs.get("summary", "")),
+        "skills": skills_obj["skills"],
+        "tools": skills_obj["tools"],
+        "work_experience": work_exp,
+        "projects": extract_projects(segs.get("projects", ""), companies),
+        "education": extract_education(segs.get("education", "")),
+        "certifications": extract_certifications(segs.get("certifications", "")),
+        "extraction_meta": parsed.meta()
+    }
+    # A failed parse may be transient (e.g. a truncated upload); only complete results are kept
+    if cache_key is not None and not parsed.error:
+        extraction_cache.put(cache_key, result)
+    return result
+
+def generate_docx(data: Dict[str, Any], template_path: str, output_path: str):
+    """Builds a premium, modern standard CV with invisible table layouts."""
+    try:
+        from docx.shared import Pt, RGBColor
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        
+        doc = Document()
+        
+        # Header Section: Name & Contact
+        name = data.get("full_name", "Applicant")
+        header = doc.add_paragraph()
+        header.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        run = header.add_run(name.upper())
+        run.bold = True
+        run.font.size = Pt(22)
+        run.font.color.rgb = RGBColor(41, 128, 185) # Modern Blue
+        
+        contact_line = []
+        if data.get("email") and data.get("email") != "N/A": contact_line.append(data["email"])
+        if data.get("phone") and data.get("phone") != "N/A": contact_line.append(data["phone"])
+        if data.get("linkedin") and data.get("linkedin") != "N/A": contact_line.append(data["linkedin"])
+        
+        contact_p = doc.add_paragraph(" | ".join(contact_line))
+        contact_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        contact_p.paragraph_format.space_after = Pt(20)
+
+        # 1. Summary Section
+        if data.get("summary"):
+            doc.add_heading('PROFESSIONAL SUMMARY', level=1)
+            doc.add_paragraph(data["summary"])
+        
+        # 2. Skills Section
+        if data.get("skills"):
+            doc.add_heading('TECHNICAL SKILLS', level=1)
+            skills_str = ", ".join(data.get("skills", []))
+            doc.add_paragraph(skills_str)
+        
+        # 3. Experience Section - Invisible Table
+        doc.add_heading('PROFESSIONAL EXPERIENCE', level=1)
+        for job in data.get("work_experience", []):
+            exp_table = doc.add_table(rows=1, cols=2)
+            exp_table.autofit = True
+            
+            # Left Column: Role & Company
+            role_cell = exp_table.rows[0].cells[0]
+            r_para = role_cell.paragraphs[0]
+            r_run = r_para.add_run(f"{job.get('role', 'Role')}\n")
+            r_run.bold = True
+            r_para.add_run(job.get('company', 'Company'))
+            
+            # Right Column: Dates & Location
+            date_cell = exp_table.rows[0].cells[1]
+            date_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+            date_cell.text = f"{job.get('duration', 'N/A')}\n{job.get('location', '')}"
+            
+            # Responsibilities as bullets
+            resps = job.get("responsibilities", "") or job.get("resps", "")
+            if resps:
+                # Basic cleaning of the text before splitting
+                clean_resps = resps.replace("[FILL HERE]", "").strip()
+                for sentence in re.split(r'(?<=[\.\!\?])\s+', clean_resps):
+                    if len(sentence.strip()) > 10:
+                        p = doc.add_paragraph(style='List Bullet')
+                        p.text = sentence.strip()
+                        p.paragraph_format.space_after = Pt(2)
+            
+            doc.add_paragraph() # Spacer
+
+        # 4. Projects Section
+        if data.get("projects"):
+            doc.add_heading('PROJECT PORTFOLIO', level=1)
+            for item in data.get("projects", []):
+                p_head = doc.add_paragraph()
+                p_run = p_head.add_run(f"{item.get('title', 'Project')} | {item.get('tech', 'N/A')}")
+                p_run.bold = True
+                
+                # Role and Details
+                if item.get("role") and item.get("role") != "N/A":
+                    doc.add_paragraph(f"Role: {item['role']}")
+                
+                details = item.get("details", "")
+                if details:
+                    # Clean the details up
+                    clean_details = details.replace("[FILL HERE]", "").strip()
+                    for sentence in re.split(r'(?<=[\.\!\?])\s+', clean_details):
+                        if len(sentence.strip()) > 10:
+                            p = doc.add_paragraph(style='List Bullet')
+                            p.text = sentence.strip()
+                            p.paragraph_format.space_after = Pt(2)
+                doc.add_paragraph()
+            
+        # 5. Education Section
+        if data.get("education"):
+            doc.add_heading('EDUCATION', level=1)
+            for edu in data.get("education", []):
+                p = doc.add_paragraph()
+                e_run = p.add_run(f"{edu.get('degree', 'Degree')} ")
+                e_run.bold = True
+                p.add_run(f"- {edu.get('institution', 'N/A')} ({edu.get('duration', 'N/A')})")
+        
+        # Clean up borders for all tables (Invisible Table Theme)
+        for table in doc.tables:
+            table.style = 'Normal Table'
+            
+        # Versioning/Success Stamp in Footer
+        section = doc.sections[0]
+        footer = section.footer
+        p = footer.paragraphs[0]
+        p.text = "Engineered by CV Reformatter v1.1 | Final Processed Layout"
+        p.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        
+        doc.save(output_path)
+        logger.info(f"Generated Premium Standard CV at {output_path}")
+    except Exception as e:
+        logger.error(f"Premium DOCX Generation Error: {e}")
+        raise
+
+def run_template_upload(content: bytes, filename: str, template_name: str) -> Dict[str, Any]:
+    """Blocking stage of /templates/upload: save, extract schema, clean and register."""
+    temp_path = os.path.join(TEMPLATES_DIR, filename)
+    
+    # 1. Save Original Temporarily
+    with open(temp_path, "wb") as f:
+        f.write(content)
+        
+    # 2. Open Document Instance ONCE (to keep object IDs consistent)
+    doc = Document(temp_path)
+    
+    # 3. Extract Schema
+    schema = extract_template_schema(temp_path, template_name, doc=doc)
+    
+    # 4. Clean Template (REMOVE DUPLICATES)
+    doc = clean_template_content(doc, schema)
+    doc.save(temp_path)
+    
+    # 5. Register
+    register_template(temp_path, template_name)
+    
+    return {"status": "success", "template_name": template_name, "sections_found": len(schema.sections), "schema": schema.dict()}
+
+def run_process_to_template(content: bytes, filename: str, template_name: str,
+                            table_strategy: str = DEFAULT_TABLE_STRATEGY, table_pages: int = DEFAULT_TABLE_PAGES):
+    """Blocking stage of /process-to-template. Returns (extracted, docx_bytes); the fill stays in memory."""
+    # 1. Extract CV Data (Reuse Phase 1 Logic, single PDF parse)
+    extracted = extract_cv_data(content, filename, table_strategy=table_strategy, table_pages=table_pages)
+    
+    # 2. Load Template
+    schema = get_template_schema(template_name)
+    if not schema:
+        raise TemplateNotFoundError(f"Template '{template_name}' not found")
+        
+    # 3. Fill Template (bytes go back to the caller, not through a file in output/)
+    return extracted, render_template(schema, extracted)
+
+def run_process(content: bytes, filename: str, job_id: str,
+                table_strategy: str = DEFAULT_TABLE_STRATEGY, table_pages: int = DEFAULT_TABLE_PAGES):
+    """Blocking stage of /process. Returns (extracted, output_filename)."""
+    # 1. Preprocess & Extract (single PDF parse)
+    extracted = extract_cv_data(content, filename, table_strategy=table_strategy, table_pages=table_pages)
+
+    # 2. Use Extractor_Master Template (Phase 2 Engine)
+    # Ensure the template exists first
+    template_name = "Extractor_Master"
+    schema = get_template_schema(template_name)
+    
+    output_filename = f"{job_id}.docx"
+    output_path = os.path.join(OUTPUT_DIR, output_filename)
+    
+    if schema:
+        fill_template(schema, extracted, output_path)
+        logger.info("Using Extractor_Master template for Standard Process.")
+    else:
+        # Fallback (Should not happen if setup correctly)
+        logger.warning("Extractor_Master not found. Creating empty doc.")
+        Document().save(output_path)
+    return extracted, output_filename
+
+def run_batch_item(content: bytes, filename: str, schema: TemplateSchema,
+                   table_strategy: str = DEFAULT_TABLE_STRATEGY, table_pages: int = DEFAULT_TABLE_PAGES) -> bytes:
+    """Blocking stage of a batch: extract one CV and fill the template in memory."""
+    extracted = extract_cv_data(content, filename, table_strategy=table_strategy, table_pages=table_pages)
+    # The parsed template comes from each worker's skeleton cache, so it is opened once per worker
+    return render_template(schema, extracted)
+
+def run_v3_fill(schema: TemplateSchema, data: Dict[str, Any]) -> bytes:
+    """Blocking stage of /v3/fill-template: fills with the isolated mapper into memory."""
+    from jd_optimizer.core.template_mapper import fill_template as v3_fill
+    buffer = io.BytesIO()
+    # The isolated mapper logs and swallows its errors, leaving the buffer empty
+    v3_fill(schema, data, buffer)
+    if not buffer.getvalue():
+        raise RuntimeError("Template fill failed")
+    return buffer.getvalue()
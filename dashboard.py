@@ -341,37 +341,20 @@ elif st.session_state["active_module"] == "extract":
                     # Direct import instead of API call
                     from main import extract_cv_data
                     from template_engine.template_manager import get_template_schema
-                    from template_engine.template_mapper import fill_template
-                    import tempfile
+                    from template_engine.template_mapper import render_template
                     
-                    # Save uploaded PDF temporarily
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_pdf:
-                        tmp_pdf.write(uploaded_file.read())
-                        pdf_path = tmp_pdf.name
-                    
-                    # Extract data
-                    extracted_data = extract_cv_data(pdf_path)
+                    # Extract data straight from the upload bytes
+                    extracted_data = extract_cv_data(uploaded_file.read(), uploaded_file.name)
                     
                     # Use Extractor_Master template
                     schema = get_template_schema("Extractor_Master")
                     
-                    # Generate output
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp_out:
-                        output_path = tmp_out.name
-                    
-                    final_path = fill_template(schema, extracted_data, output_path)
-                    
-                    # Store result
-                    with open(final_path, "rb") as f:
-                        st.session_state['extract_docx'] = f.read()
-                        st.session_state['extract_data'] = extracted_data
+                    # Generate output in memory
+                    st.session_state['extract_docx'] = render_template(schema, extracted_data)
+                    st.session_state['extract_data'] = extracted_data
                     
                     st.success("Extraction Complete.")
                     
-                    # Cleanup temp files
-                    import os
-                    os.remove(pdf_path)
-                    
                 except Exception as e:
                     st.error(f"Extraction failed: {str(e)}")
                     import traceback
@@ -403,7 +386,7 @@ elif st.session_state["active_module"] == "design":
         t_name = tc2.text_input("Template Name", "My_Layout_v1")
         if t_file and st.button("Register Template"):
             try:
-                from template_engine.template_extractor import extract_template_schema
+                from template_engine.template_manager import register_template
                 import tempfile
                 import os
                 
@@ -415,21 +398,8 @@ elif st.session_state["active_module"] == "design":
                 with open(template_path, "wb") as f:
                     f.write(t_file.read())
                 
-                # Extract schema
-                schema = extract_template_schema(template_path, t_name)
-                
-                # Save schema to index.json
-                index_path = os.path.join(template_dir, "index.json")
-                if os.path.exists(index_path):
-                    with open(index_path, "r") as f:
-                        index = json.load(f)
-                else:
-                    index = {}
-                
-                index[t_name] = schema.dict()
-                
-                with open(index_path, "w") as f:
-                    json.dump(index, f, indent=2)
+                # Extract schema and store it in the template registry
+                register_template(template_path, t_name)
                 
                 st.success(f"Template '{t_name}' Registered.")
             except Exception as e:
@@ -452,36 +422,19 @@ elif st.session_state["active_module"] == "design":
                 try:
                     from main import extract_cv_data
                     from template_engine.template_manager import get_template_schema
-                    from template_engine.template_mapper import fill_template
-                    import tempfile
-                    import os
-                    
-                    # Save PDF temporarily
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_pdf:
-                        tmp_pdf.write(cv_file.read())
-                        pdf_path = tmp_pdf.name
+                    from template_engine.template_mapper import render_template
                     
-                    # Extract data
-                    extracted_data = extract_cv_data(pdf_path)
+                    # Extract data straight from the upload bytes
+                    extracted_data = extract_cv_data(cv_file.read(), cv_file.name)
                     
                     # Get schema
                     schema = get_template_schema(sel_temp)
                     
-                    # Generate output
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp_out:
-                        output_path = tmp_out.name
-                    
-                    final_path = fill_template(schema, extracted_data, output_path)
-                    
-                    # Read result
-                    with open(final_path, "rb") as f:
-                        docx_bytes = f.read()
+                    # Generate output in memory
+                    docx_bytes = render_template(schema, extracted_data)
                     
                     st.download_button("⬇ Download Filled Doc", docx_bytes, f"Render_{sel_temp}.docx")
                     
-                    # Cleanup
-                    os.remove(pdf_path)
-                    
                 except Exception as e:
                     st.error(f"Generation failed: {str(e)}")
                     import traceback
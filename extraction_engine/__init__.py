@@ -0,0 +1,31 @@
+"""
+Extraction Engine Package
+Single-parse PDF access shared by the CV extractors, CV section segmentation,
+and the on-disk cache of extraction results.
+"""
+
+from .parsed_document import (
+    ParsedDocument, parse_document, extract_page_tables,
+    TABLE_STRATEGIES, DEFAULT_TABLE_STRATEGY, DEFAULT_TABLE_PAGES,
+    PARALLEL_PAGE_THRESHOLD, PARALLEL_WORKERS, shutdown_pool, disable_parallel_parsing
+)
+from .segments import get_cv_segments
+from .result_cache import ExtractionCache, extraction_key, CACHE_DIR, DEFAULT_CACHE_MB
+
+__all__ = [
+    'ParsedDocument',
+    'parse_document',
+    'extract_page_tables',
+    'TABLE_STRATEGIES',
+    'DEFAULT_TABLE_STRATEGY',
+    'DEFAULT_TABLE_PAGES',
+    'PARALLEL_PAGE_THRESHOLD',
+    'PARALLEL_WORKERS',
+    'shutdown_pool',
+    'disable_parallel_parsing',
+    'get_cv_segments',
+    'ExtractionCache',
+    'extraction_key',
+    'CACHE_DIR',
+    'DEFAULT_CACHE_MB'
+]
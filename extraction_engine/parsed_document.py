@@ -0,0 +1,322 @@
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+import fitz  # PyMuPDF
+
+logger = logging.getLogger("ParsedDocument")
+
+# Table detection strategies for find_tables (by far the slowest PyMuPDF call per page)
+#   always        - every page
+#   never         - skip table detection
+#   first-n-pages - only the first `table_pages` pages
+#   heuristic     - only pages whose vector graphics or text alignment could form a grid
+TABLE_STRATEGIES = ("always", "never", "first-n-pages", "heuristic")
+DEFAULT_TABLE_STRATEGY = "always"
+DEFAULT_TABLE_PAGES = 2
+# page_may_have_table: a grid needs this many distinct rulings in one direction, and
+# aligned text this many rows sharing two or more cell columns
+TABLE_MIN_LINES = 3
+# Horizontal gap (points) between two words that starts a new cell in aligned text
+TABLE_CELL_GAP = 12
+
+# Long documents (portfolios, academic CVs) are split into page ranges and parsed
+# in a process pool. Each worker reopens the PDF from the upload bytes.
+# One pool of PARALLEL_WORKERS processes is shared by every caller.
+PARALLEL_PAGE_THRESHOLD = 30
+PARALLEL_WORKERS = min(4, os.cpu_count() or 1)
+PARALLEL_MIN_CHUNK = 4
+
+# Switched off in processes that are themselves pool workers (see disable_parallel_parsing)
+_parallel_enabled = True
+
+def disable_parallel_parsing():
+    """
+    Parse every document sequentially in this process. Used as the initializer of
+    the API's CV worker processes: they already run CVs side by side, and a page
+    pool in each of them would start CV_WORKERS x PARALLEL_WORKERS processes.
+    """
+    global _parallel_enabled
+    _parallel_enabled = False
+
+def extract_page_tables(page) -> List[Dict[str, Any]]:
+    """Structural table data for one PDF page as header/row dicts."""
+    results = []
+    tabs = page.find_tables()
+    for table in tabs:
+        headers = [h.replace("\n", " ").strip() if h else f"Col{i}" for i, h in enumerate(table.header.names)]
+        table_data = table.extract() # List of lists of strings
+        
+        rows = []
+        # Usually table.extract() includes the header row as the first element.
+        # If table.header.names is populated, the first element of extract() is often those names.
+        for r_idx, row in enumerate(table_data):
+            if r_idx == 0 and not table.header.external:
+                continue # Skip header row
+            
+            row_dict = {}
+            for i, cell in enumerate(row):
+                h = headers[i] if i < len(headers) else f"Col{i}"
+                row_dict[h] = cell.replace("\n", " ").strip() if cell else ""
+                
+            if any(row_dict.values()):
+                rows.append(row_dict)
+        
+        if rows:
+            results.append({
+                "headers": headers,
+                "rows": rows,
+                "page": page.number + 1
+            })
+    return results
+
+def page_may_have_table(page, textpage=None) -> bool:
+    """
+    Cheap pre-check for find_tables: True if the page's vector rulings (lines and
+    rectangle edges) could form a grid, or failing that if its text is laid out in
+    aligned columns (a borderless table). A single box (two rulings each way) is
+    not a grid; at least TABLE_MIN_LINES rulings are needed in one direction.
+    """
+    return _rulings_form_grid(page) or _text_is_aligned(page, textpage)
+
+def _rulings_form_grid(page) -> bool:
+    rows, cols = set(), set()
+    for path in page.get_cdrawings():
+        for item in path["items"]:
+            if item[0] == "l":
+                p1, p2 = item[1], item[2]
+                if abs(p1[1] - p2[1]) < 1: rows.add(round(p1[1]))
+                elif abs(p1[0] - p2[0]) < 1: cols.add(round(p1[0]))
+            elif item[0] in ("re", "qu"):
+                r = fitz.Rect(item[1]) if item[0] == "re" else fitz.Quad(item[1]).rect
+                rows.update((round(r.y0), round(r.y1)))
+                cols.update((round(r.x0), round(r.x1)))
+            if len(rows) >= 2 and len(cols) >= 2 and max(len(rows), len(cols)) >= TABLE_MIN_LINES:
+                return True
+    return False
+
+def _text_is_aligned(page, textpage=None) -> bool:
+    """At least TABLE_MIN_LINES text rows split into cells that start at two or more shared x positions."""
+    lines: Dict[int, List[Tuple[float, float]]] = {}
+    for x0, y0, x1, y1, *_ in page.get_text("words", textpage=textpage):
+        lines.setdefault(round(y1), []).append((x0, x1))
+    column_rows: Dict[int, int] = {}
+    for words in lines.values():
+        words.sort()
+        starts = {round(words[0][0])}
+        for (_, prev_x1), (x0, _) in zip(words, words[1:]):
+            if x0 - prev_x1 >= TABLE_CELL_GAP:
+                starts.add(round(x0))
+        if len(starts) < 2:
+            continue
+        for x in starts:
+            column_rows[x] = column_rows.get(x, 0) + 1
+    return sum(count >= TABLE_MIN_LINES for count in column_rows.values()) >= 2
+
+def should_scan_tables(page, strategy: str = DEFAULT_TABLE_STRATEGY, table_pages: int = DEFAULT_TABLE_PAGES,
+                       textpage=None) -> bool:
+    if strategy == "always": return True
+    if strategy == "never": return False
+    if strategy == "first-n-pages": return page.number < table_pages
+    if strategy == "heuristic": return page_may_have_table(page, textpage)
+    raise ValueError(f"Unknown table strategy '{strategy}'. Expected one of {TABLE_STRATEGIES}")
+
+def _page_spans(page_dict: Dict[str, Any]) -> List[Dict[str, Any]]:
+    spans = []
+    for b in page_dict["blocks"]:
+        if "lines" in b:
+            for l in b["lines"]:
+                for s in l["spans"]:
+                    spans.append(s)
+    return spans
+
+class ParsedDocument:
+    """
+    A CV opened and parsed exactly once.
+    Holds per-page raw text, the extracted tables and the font spans of the first
+    page(s), so every downstream extractor works from the same single parse.
+    """
+    def __init__(self, filename: str = "", page_texts: List[str] = None, tables: List[Dict[str, Any]] = None,
+                 page_spans: List[List[Dict[str, Any]]] = None, error: Optional[str] = None,
+                 table_strategy: str = DEFAULT_TABLE_STRATEGY, table_pages_scanned: List[int] = None):
+        self.filename = filename
+        self.page_texts = page_texts or []
+        self.tables = tables or []
+        self.page_spans = page_spans or []
+        self.error = error
+        self.table_strategy = table_strategy
+        self.table_pages_scanned = table_pages_scanned or [] # 1-based page numbers passed to find_tables
+
+    @property
+    def is_pdf(self) -> bool:
+        return self.filename.lower().endswith('.pdf')
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_texts)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.page_texts)
+
+    @property
+    def first_page_text(self) -> str:
+        return self.page_texts[0] if self.page_texts else ""
+
+    @property
+    def first_page_spans(self) -> List[Dict[str, Any]]:
+        return self.page_spans[0] if self.page_spans else []
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The {'text', 'tables'} shape consumed by get_cv_segments and the extractors."""
+        return {"text": self.text, "tables": self.tables}
+
+    def meta(self) -> Dict[str, Any]:
+        """How the document was parsed, for API responses and logs."""
+        return {
+            "page_count": self.page_count,
+            "table_strategy": self.table_strategy,
+            "table_pages_scanned": list(self.table_pages_scanned)
+        }
+
+def parse_document(content: bytes, filename: str = "", span_pages: int = 1, page_limit: Optional[int] = None,
+                   table_strategy: str = DEFAULT_TABLE_STRATEGY, table_pages: int = DEFAULT_TABLE_PAGES,
+                   parallel: Optional[bool] = None, workers: Optional[int] = None) -> ParsedDocument:
+    """
+    Opens the upload once and extracts text, tables and font spans in a single pass per page.
+    One TextPage per page is shared by the plain-text and span extraction.
+    `table_strategy` decides which pages go through find_tables (see TABLE_STRATEGIES).
+    `parallel` splits the pages across a process pool: None switches it on from
+    PARALLEL_PAGE_THRESHOLD pages, True/False force it. `workers` is the number of
+    page ranges (at most PARALLEL_WORKERS, the size of the shared pool).
+    The result is identical either way.
+    """
+    if table_strategy not in TABLE_STRATEGIES:
+        raise ValueError(f"Unknown table strategy '{table_strategy}'. Expected one of {TABLE_STRATEGIES}")
+    parsed = ParsedDocument(filename=filename, table_strategy=table_strategy)
+    if not parsed.is_pdf:
+        # Simple placeholder for OCR - in production we use pytesseract
+        parsed.page_texts = ["OCR Text Placeholder"]
+        return parsed
+
+    try:
+        with fitz.open(stream=content, filetype="pdf") as doc:
+            page_count = doc.page_count if page_limit is None else min(doc.page_count, page_limit)
+            if _use_parallel(page_count, parallel, workers):
+                chunks = _parse_parallel(content, page_count, span_pages, table_strategy, table_pages,
+                                             min(workers or PARALLEL_WORKERS, PARALLEL_WORKERS))
+            else:
+                chunks = [_parse_pages(doc, 0, page_count, span_pages, table_strategy, table_pages)]
+    except Exception as e:
+        chunks = [_PageRange(error=str(e))]
+
+    # Merge in page order. A failing range ends the document, exactly as in the sequential loop.
+    for chunk in chunks:
+        parsed.page_texts.extend(chunk.page_texts)
+        parsed.page_spans.extend(chunk.page_spans)
+        parsed.tables.extend(chunk.tables)
+        parsed.table_pages_scanned.extend(chunk.table_pages_scanned)
+        if chunk.error:
+            logger.error(f"Error parsing PDF {filename}: {chunk.error}")
+            parsed.error = chunk.error
+            break
+    return parsed
+
+class _PageRange:
+    """Extraction result for a contiguous page range (picklable, returned by pool workers)."""
+    __slots__ = ("page_texts", "page_spans", "tables", "table_pages_scanned", "error")
+
+    def __init__(self, error: Optional[str] = None):
+        self.page_texts: List[str] = []
+        self.page_spans: List[List[Dict[str, Any]]] = []
+        self.tables: List[Dict[str, Any]] = []
+        self.table_pages_scanned: List[int] = []
+        self.error = error
+
+def _parse_pages(doc, start: int, stop: int, span_pages: int, table_strategy: str, table_pages: int) -> _PageRange:
+    result = _PageRange()
+    try:
+        for pno in range(start, stop):
+            page = doc[pno]
+            textpage = page.get_textpage(flags=fitz.TEXTFLAGS_TEXT)
+            # 1. Get raw text
+            result.page_texts.append(page.get_text(textpage=textpage))
+            # 2. Font spans (name heuristics only need the top of the CV)
+            if page.number < span_pages:
+                result.page_spans.append(_page_spans(page.get_text("dict", textpage=textpage)))
+            # 3. Extract tables
+            if should_scan_tables(page, table_strategy, table_pages, textpage):
+                result.table_pages_scanned.append(page.number + 1)
+                result.tables.extend(extract_page_tables(page))
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+def _parse_pages_worker(content: bytes, start: int, stop: int, span_pages: int, table_strategy: str, table_pages: int) -> _PageRange:
+    """Pool entry point: reopen the PDF from the shared bytes and parse one page range."""
+    try:
+        with fitz.open(stream=content, filetype="pdf") as doc:
+            return _parse_pages(doc, start, stop, span_pages, table_strategy, table_pages)
+    except Exception as e:
+        return _PageRange(error=str(e))
+
+def _use_parallel(page_count: int, parallel: Optional[bool], workers: Optional[int]) -> bool:
+    if not _parallel_enabled or min(workers or PARALLEL_WORKERS, PARALLEL_WORKERS) < 2 or page_count < 2:
+        return False
+    if parallel is None:
+        return page_count >= PARALLEL_PAGE_THRESHOLD
+    return parallel
+
+def _page_ranges(page_count: int, workers: int) -> List[Tuple[int, int]]:
+    size = max(PARALLEL_MIN_CHUNK, -(-page_count // workers))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a threaded server (uvicorn, Streamlit) is not safe
+            _pool = ProcessPoolExecutor(max_workers=PARALLEL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drops a broken pool, unless another thread has already replaced it."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+def shutdown_pool():
+    """Stops the page-extraction worker processes (also registered with atexit)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+atexit.register(shutdown_pool)
+
+def _parse_parallel(content: bytes, page_count: int, span_pages: int, table_strategy: str, table_pages: int,
+                    workers: int) -> List[_PageRange]:
+    ranges = _page_ranges(page_count, workers)
+    pool = _get_pool()
+    try:
+        futures = [pool.submit(_parse_pages_worker, content, start, stop, span_pages, table_strategy, table_pages)
+                   for start, stop in ranges]
+        return [f.result() for f in futures]
+    except BrokenProcessPool as e:
+        logger.warning(f"Page extraction pool failed ({e}); parsing sequentially")
+        _discard_pool(pool)
+    except RuntimeError as e:
+        # "cannot schedule new futures after shutdown": another thread discarded the pool
+        # (or the interpreter is exiting) between _get_pool and submit
+        logger.warning(f"Page extraction pool unavailable ({e}); parsing sequentially")
+    return [_parse_pages_worker(content, 0, page_count, span_pages, table_strategy, table_pages)]
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("ExtractionCache")
+
+CACHE_DIR = "cache"
+DEFAULT_CACHE_MB = 256
+# A hit only rewrites last_used when the stored value is older than this. Eviction
+# order does not need finer resolution, and most hits then stay read-only instead
+# of queueing every reader on the database's single write lock.
+TOUCH_INTERVAL_SECONDS = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+def extraction_key(content: bytes, filename: str, version: str, **options) -> str:
+    """
+    SHA-256 of the upload bytes plus everything else the result depends on: the
+    extractor version, the parse options and whether the file is treated as a PDF
+    (decided by its extension). The rest of the filename does not matter, so the
+    same CV uploaded under a new name is still a hit.
+    """
+    h = hashlib.sha256(content)
+    h.update(json.dumps({"version": version, "pdf": (filename or "").lower().endswith(".pdf"), **options},
+                        sort_keys=True).encode())
+    return h.hexdigest()
+
+class ExtractionCache:
+    """
+    On-disk LRU of extraction results keyed by extraction_key(). Results are
+    stored as zlib-compressed JSON in one SQLite file, so every worker process
+    shares it safely. Once the stored size exceeds `max_bytes` the least
+    recently used results are evicted (to within `touch_interval` seconds).
+    max_bytes=0 disables the cache.
+    """
+    def __init__(self, path: str, max_bytes: int, timeout: float = 30.0,
+                 touch_interval: float = TOUCH_INTERVAL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            # See TemplateStore._enable_wal: the switch does not wait on the busy timeout
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    break
+                except sqlite3.OperationalError as e:
+                    if "locked" not in str(e) or time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.05)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT data, last_used FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            if now - row[1] >= self.touch_interval:
+                conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(zlib.decompress(row[0]))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            # A broken cache must never fail an extraction
+            logger.error(f"Extraction cache read failed: {e}")
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        if not self.enabled:
+            return
+        try:
+            data = zlib.compress(json.dumps(result, separators=(",", ":")).encode())
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT OR REPLACE INTO results (key, data, size, last_used) VALUES (?, ?, ?, ?)",
+                             (key, data, len(data), time.time()))
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"Extraction cache write failed: {e}")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM results WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            self._connect().execute("DELETE FROM results")
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of this process only (each worker process has its own)."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "max_bytes": self.max_bytes}
+
+    def usage(self) -> Dict[str, int]:
+        """What the shared cache file holds, whichever process filled it."""
+        entries = size = 0
+        if self.enabled and os.path.exists(self.path):
+            try:
+                entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Extraction cache usage query failed: {e}")
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes}
@@ -0,0 +1,95 @@
+import re
+import json
+import logging
+from typing import Any, Dict
+
+# Same logger as main.py, where this used to live, so segment switches still show up in debug/app.log
+logger = logging.getLogger("CV-Reformatter-MVP")
+
+def get_cv_segments(input_data: Any) -> Dict[str, Dict[str, Any]]:
+    """Splits raw CV text and tables into logical section blocks."""
+    if isinstance(input_data, dict):
+        text = input_data.get("text", "")
+        raw_tables = input_data.get("tables", [])
+    else:
+        text = str(input_data)
+        raw_tables = []
+
+    lines = text.split('\n')
+    segments = {
+        "summary": {"text": [], "tables": []},
+        "experience": {"text": [], "tables": []},
+        "education": {"text": [], "tables": []},
+        "projects": {"text": [], "tables": []},
+        "skills": {"text": [], "tables": []},
+        "certifications": {"text": [], "tables": []},
+        "meta": {"text": [], "tables": []}
+    }
+    
+    current_key = "summary"
+    
+    # Section Header Detection Patterns
+    SECT_MAP = {
+        "experience": ["work experience", "professional experience", "employment history", "career history", "experience summary", "employment details"],
+        "education": ["education", "academic qualification", "academic profile", "academic background", "academics", "educational qualification"],
+        "projects": ["projects", "key projects", "project details", "project portfolio", "technical projects", "major projects", "project profile"],
+        "skills": ["skills", "technical skills", "key skills", "skill set", "core competencies", "tools", "technologies", "tech stack", "software skills", "other skills", "key skills and knowledge"],
+        "certifications": ["certifications", "training", "courses", "awards", "achievement"],
+        "summary": ["profile summary", "professional summary", "summary", "profile", "profile highlights", "career highlights", "professional profile"],
+        "experience_junk": ["chipsnbytes", "technolog", "developer", "engineer", "designer"]
+    }
+
+    # 1. Segment Text
+    for line in lines:
+        l_orig = line.strip()
+        if not l_orig: continue
+        
+        l_clean = re.sub(r'^[•▪\-\*▪➢\d\.\s\t]+', '', l_orig).strip().lower()
+        
+        found_new = False
+        if 2 < len(l_clean) < 45:
+             for key, synonyms in SECT_MAP.items():
+                  # A label like 'Tools:' in projects should NOT switch the section back to skills
+                  if key == "skills" and current_key in ["projects", "experience"] and ":" in l_orig:
+                      continue
+                      
+                  if any(l_clean == s or l_clean.startswith(s + " ") or l_clean.startswith(s + ":") or (s in l_clean and len(l_clean) < len(s) + 5) for s in synonyms):
+                      if key == "experience_junk" and current_key == "skills":
+                          current_key = "meta"
+                          found_new = True
+                          break
+                      if key != current_key and key != "experience_junk":
+                          logger.info(f"Segment Switch: {current_key} -> {key} at line: '{l_orig}'")
+                          current_key = key
+                          found_new = True
+                          break
+                      if key == current_key:
+                          found_new = True
+                          break
+        
+        if not found_new:
+            segments[current_key]["text"].append(line)
+            
+    # Join text lists
+    for k in segments:
+        segments[k]["text"] = "\n".join(segments[k]["text"])
+
+    # 2. Associate Tables with Sections
+    # Purely heuristic: If a table contains keywords for a section, put it there.
+    for table in raw_tables:
+        table_str = json.dumps(table).lower()
+        matched = False
+        for key, synonyms in SECT_MAP.items():
+            if any(s in table_str for s in synonyms if len(s) > 4):
+                if key != "experience_junk":
+                    segments[key]["tables"].append(table)
+                    matched = True
+                    break
+        
+        if not matched:
+            # Fallback: Put in current section if it was experience or projects
+            if "project" in table_str: segments["projects"]["tables"].append(table)
+            elif "experience" in table_str or "employer" in table_str: segments["experience"]["tables"].append(table)
+            else: segments["experience"]["tables"].append(table) # Default to experience for structured data
+
+    return segments
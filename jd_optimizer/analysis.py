@@ -1,6 +1,9 @@
 
 import json
-from .llm_service import LLMService
+import asyncio
+from typing import Any, Iterator, List, Tuple
+from .llm_service import LLMService, strip_json_fences
+from .json_stream import IncrementalJSONParser, STREAM_DONE
 
 SYSTEM_PROMPT = """
 You are a JD Match Optimizer Expert. Your task is to analyze a candidate's CV (in JSON format) against a Job Description (JD).
@@ -49,7 +52,37 @@ class JDOptimizer:
         self.llm = llm_service
 
     def analyze_match(self, cv_json, jd_text, target_score=85):
-        user_prompt = f"""
+        return self._parse(*self.llm.call_llm_with_meta(self._user_prompt(cv_json, jd_text, target_score), SYSTEM_PROMPT))
+
+    def stream_analyze_match(self, cv_json, jd_text, target_score=85) -> Iterator[Tuple[str, Any]]:
+        """
+        analyze_match that yields (key, value) for each top-level field as soon as the
+        model has generated it ("scores" and "missing_keywords" come before the long
+        "suggestions"), then (STREAM_DONE, result) with analyze_match's result.
+        """
+        chunks, meta = self.llm.stream_llm_with_meta(self._user_prompt(cv_json, jd_text, target_score), SYSTEM_PROMPT)
+        parser = IncrementalJSONParser()
+        for chunk in chunks:
+            yield from parser.feed(chunk)
+        yield STREAM_DONE, self._parse(parser.buffer, meta)
+
+    async def aanalyze_match(self, cv_json, jd_text, target_score=85):
+        """Async analyze_match (see LLMService.acall_llm)."""
+        return self._parse(*await self.llm.acall_llm_with_meta(self._user_prompt(cv_json, jd_text, target_score), SYSTEM_PROMPT))
+
+    async def aanalyze_matches(self, cv_json, jd_texts: List[str], target_score=85) -> List[dict]:
+        """Scores one CV against many JDs concurrently (within the provider's limits); results are in input order."""
+        return list(await asyncio.gather(*(self.aanalyze_match(cv_json, jd, target_score) for jd in jd_texts)))
+
+    def analyze_matches(self, cv_json, jd_texts: List[str], target_score=85) -> List[dict]:
+        """Blocking aanalyze_matches for scripts and batch jobs (not callable from a running event loop)."""
+        return asyncio.run(self.aanalyze_matches(cv_json, jd_texts, target_score))
+
+    @staticmethod
+    def _user_prompt(cv_json, jd_text, target_score) -> str:
+        # llm_meta describes how the CV was shredded; leaving it out keeps the prompt (and its cache key) stable
+        cv_json = {k: v for k, v in cv_json.items() if k != "llm_meta"}
+        return f"""
 TARGET SCORE: {target_score}%
 JOB DESCRIPTION:
 {jd_text}
@@ -59,17 +92,17 @@ CANDIDATE CV (JSON):
 
 Analyze the fit and provide suggestions to reach the target score. Use JSON format.
 """
-        response_text = self.llm.call_llm(user_prompt, SYSTEM_PROMPT)
+
+    @staticmethod
+    def _parse(response_text: str, llm_meta: dict) -> dict:
         try:
             # Clean response if LLM adds markdown backticks
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].strip()
-            
-            return json.loads(response_text)
+            response_text = strip_json_fences(response_text)
+            result = json.loads(response_text)
+            result["llm_meta"] = llm_meta
+            return result
         except Exception as e:
-            return {"error": f"Failed to parse LLM response: {str(e)}", "raw": response_text}
+            return {"error": f"Failed to parse LLM response: {str(e)}", "raw": response_text, "llm_meta": llm_meta}
 
     def apply_optimizations(self, cv_json, selected_suggestions, edit_mode="tweak"):
         """
@@ -7,6 +7,7 @@ from docx import Document
 from docx.table import Table
 from docx.text.paragraph import Paragraph
 from .template_models import SectionType, TemplateSchema
+from taxonomy import get_skill_taxonomy
 from .template_extractor import iterate_doc_content, normalize_text, is_section_header, SECTION_SYNONYMS
 
 logger = logging.getLogger("TemplateMapper")
@@ -74,16 +75,8 @@ def fill_template(schema: TemplateSchema, data: Dict[str, Any], output_path: str
         
         logger.info(f"Detected {len(anchors)} anchors in document for mapping: {[a[1].name for a in anchors]}")
         
-        # Skill Categories for smart mapping
-        SKILL_CATEGORIES = {
-            "cloud": ["aws", "azure", "gcp", "lambda", "ec2", "s3", "cloud"],
-            "devops": ["docker", "kubernetes", "jenkins", "terraform", "ansible", "git", "github", "gitlab"],
-            "database": ["sql", "mysql", "postgres", "mongodb", "redis", "oracle", "elasticsearch"],
-            "os": ["linux", "windows", "unix", "ubuntu"],
-            "web": ["html", "css", "javascript", "react", "angular", "vue", "node", "express"],
-            "language": ["python", "java", "php", "c#", "ruby", "typescript"],
-            "design": ["figma", "photoshop", "illustrator", "sketch", "xd", "ui", "ux"]
-        }
+        # Skill buckets for smart mapping (shared taxonomy, indexed once per process)
+        taxonomy = get_skill_taxonomy()
         
         allocated_skills = set()
         section_processed = set() # Track unique anchor indices
@@ -204,19 +197,14 @@ def fill_template(schema: TemplateSchema, data: Dict[str, Any], output_path: str
                 
                 if is_skill_section:
                     # Skill Filtering Logic
-                    SKILL_CATEGORIES = {
-                        "category": ["category", "key skills"],
-                        "tools": ["tools", "technologies", "software"],
-                        "environment": ["environment", "tech stack", "stack"]
-                    }
-                    if label_text and any(k in label_text for k in ["category", "tools", "technologies", "environment"]):
+                    buckets = taxonomy.buckets_for_label(label_text)
+                    if buckets:
                         matches = []
-                        for cat_key, keywords in SKILL_CATEGORIES.items():
-                            if cat_key in label_text:
-                                for s in list_data:
-                                    if s not in allocated_skills and any(k in s.lower() for k in keywords):
-                                        matches.append(s)
-                                        allocated_skills.add(s)
+                        for bucket in buckets:
+                            for s in list_data:
+                                if s not in allocated_skills and taxonomy.in_bucket(s, bucket):
+                                    matches.append(s)
+                                    allocated_skills.add(s)
                         if matches: val = ", ".join(matches)
                     else:
                         # Generic skill list for the section
@@ -1,20 +1,20 @@
-
 import json
 import re
-from .llm_service import LLMService
+import asyncio
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from extraction_engine import get_cv_segments
+from .llm_service import LLMService, strip_json_fences
+from .json_stream import IncrementalJSONParser, STREAM_DONE
 
-class CVShredder:
-    def __init__(self, llm_service: LLMService):
-        self.llm = llm_service
+logger = logging.getLogger("JD_Optimizer_CVShredder")
 
-    def shred_cv(self, cv_text: str) -> dict:
-        """
-        Uses the LLM to parse raw CV text into structured JSON.
-        """
-        if not cv_text or len(cv_text) < 50:
-             return {"full_name": "Error: Empty CV Text", "skills": [], "work_experience": [], "projects": []}
+# shred_cv sends at most this much of the CV in its single prompt
+SINGLE_PROMPT_CHARS = 12000
+# Chunked mode sends one prompt per CV section; longer sections are split at line breaks
+SECTION_CHARS = 6000
 
-        system_prompt = """
+SYSTEM_PROMPT = """
 You are an expert CV Parser. Your goal is to extract structured data from a raw CV text into a JSON format.
 Ignore page headers/footers.
 
@@ -54,19 +54,194 @@ INSTRUCTIONS:
 3. Ensure "role" is the Job Title (e.g. "Manager") and "company" is the Organization.
 4. Output STRICT JSON. No markdown.
 """
-        
-        user_prompt = f"CV CONTENT:\n{cv_text[:12000]}\n\nOutput JSON:"
-        
-        response_text = self.llm.call_llm(user_prompt, system_prompt)
-        
+
+# Chunked mode: get_cv_segments section -> the part of the schema above it fills.
+# The summary segment is everything before the first heading plus anything under a heading
+# get_cv_segments does not know (a bare "EXPERIENCE", say), so it is shredded against the
+# full schema. "meta" collects role lines found under a skills heading; they are shredded as experience.
+SECTION_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "skills": {"skills": ["List", "Of", "All", "Technical", "Skills"], "tools": ["List", "Of", "Tools"]},
+    "experience": {"work_experience": [{"role": "Job Title", "company": "Company Name",
+                                        "duration": "Start - End (e.g. Jan 2020 - Present)",
+                                        "location": "City, Country", "responsibilities": "Full description of role..."}]},
+    "projects": {"projects": [{"title": "Project Name", "role": "Role in project",
+                               "technologies": "Tech Stack", "description": "Project details..."}]},
+    "education": {"education": [{"degree": "", "institution": "", "duration": ""}]},
+    "certifications": {"certifications": [{"title": "", "year": ""}]}
+}
+FULL_SCHEMA_SECTION = "summary"
+SEGMENT_SECTIONS = {"summary": "summary", "experience": "experience", "meta": "experience",
+                    "education": "education", "projects": "projects", "skills": "skills",
+                    "certifications": "certifications"}
+# Field order of the full schema, which the merged result follows
+SCHEMA_FIELDS = ["full_name", "email", "phone", "linkedin", "summary", "skills", "tools",
+                 "work_experience", "projects", "education", "certifications"]
+LIST_FIELDS = {"skills", "tools", "work_experience", "projects", "education", "certifications"}
+
+def section_system_prompt(section: str) -> str:
+    return f"""
+You are an expert CV Parser. The text you are given is the "{section}" section of a CV
+(or part of it). Extract it into a JSON object with exactly these keys:
+
+{json.dumps(SECTION_SCHEMAS[section], indent=4)}
+
+INSTRUCTIONS:
+1. Extract ALL items found. Do not summarize or skip older entries.
+2. Use an empty string or empty list for anything this text does not contain.
+3. Output STRICT JSON. No markdown.
+"""
+
+def split_text(text: str, limit: int) -> List[str]:
+    """Splits text at line breaks into pieces of at most `limit` chars (a longer single line is cut)."""
+    pieces, current = [], ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:limit])
+            line = line[limit:]
+        if current and len(current) + 1 + len(line) > limit:
+            pieces.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current.strip():
+        pieces.append(current)
+    return [p for p in pieces if p.strip()]
+
+class CVShredder:
+    def __init__(self, llm_service: LLMService):
+        self.llm = llm_service
+
+    def shred_cv(self, cv_text: str) -> dict:
+        """
+        Uses the LLM to parse raw CV text into structured JSON.
+        """
+        if not cv_text or len(cv_text) < 50:
+             return self._empty_result()
+        return self._parse(*self.llm.call_llm_with_meta(self._user_prompt(cv_text), SYSTEM_PROMPT))
+
+    def stream_shred_cv(self, cv_text: str) -> Iterator[Tuple[str, Any]]:
+        """
+        shred_cv that yields (section, value) as each top-level section of the
+        schema is generated, then (STREAM_DONE, result) with shred_cv's result.
+        """
+        if not cv_text or len(cv_text) < 50:
+             yield STREAM_DONE, self._empty_result()
+             return
+        chunks, meta = self.llm.stream_llm_with_meta(self._user_prompt(cv_text), SYSTEM_PROMPT)
+        parser = IncrementalJSONParser()
+        for chunk in chunks:
+            yield from parser.feed(chunk)
+        yield STREAM_DONE, self._parse(parser.buffer, meta)
+
+    async def ashred_cv(self, cv_text: str) -> dict:
+        """Async shred_cv (see LLMService.acall_llm)."""
+        if not cv_text or len(cv_text) < 50:
+             return self._empty_result()
+        return self._parse(*await self.llm.acall_llm_with_meta(self._user_prompt(cv_text), SYSTEM_PROMPT))
+
+    async def ashred_cv_chunked(self, cv_text: str, section_chars: int = SECTION_CHARS) -> dict:
+        """
+        Chunked shred_cv for long CVs: splits the text into sections with
+        get_cv_segments, shreds each section (split further past `section_chars`)
+        concurrently with a prompt for just its part of the schema, and merges the
+        results into the full schema. Nothing is truncated. The summary segment,
+        which holds the text before the first heading and under any unrecognised
+        one, is shredded against the full schema.
+        llm_meta gains "chunks" and, if any piece failed, "failed_sections".
+        """
+        if not cv_text or len(cv_text) < 50:
+             return self._empty_result()
+        jobs = self._chunk_jobs(cv_text, section_chars)
+        if not jobs:
+            # Nothing but whitespace to send
+            return self._empty_result()
+        replies = await asyncio.gather(*(self.llm.acall_llm_with_meta(self._section_prompt(text), system)
+                                         for _, system, text in jobs))
+        return self._merge(jobs, replies)
+
+    def shred_cv_chunked(self, cv_text: str, section_chars: int = SECTION_CHARS) -> dict:
+        """Blocking ashred_cv_chunked (not callable from a running event loop)."""
+        return asyncio.run(self.ashred_cv_chunked(cv_text, section_chars))
+
+    async def ashred_cvs(self, cv_texts: List[str]) -> List[dict]:
+        """Shreds many CVs concurrently (within the provider's limits); results are in input order."""
+        return list(await asyncio.gather(*(self.ashred_cv(t) for t in cv_texts)))
+
+    def shred_cvs(self, cv_texts: List[str]) -> List[dict]:
+        """Blocking ashred_cvs for scripts and batch jobs (not callable from a running event loop)."""
+        return asyncio.run(self.ashred_cvs(cv_texts))
+
+    @staticmethod
+    def _empty_result() -> dict:
+        return {"full_name": "Error: Empty CV Text", "skills": [], "work_experience": [], "projects": []}
+
+    @staticmethod
+    def _user_prompt(cv_text: str) -> str:
+        return f"CV CONTENT:\n{cv_text[:SINGLE_PROMPT_CHARS]}\n\nOutput JSON:"
+
+    @staticmethod
+    def _section_prompt(text: str) -> str:
+        return f"CV SECTION:\n{text}\n\nOutput JSON:"
+
+    @staticmethod
+    def _chunk_jobs(cv_text: str, section_chars: int) -> List[Tuple[Optional[str], str, str]]:
+        """(section or None for the full schema, system prompt, text) per LLM call, in CV order."""
+        segments = get_cv_segments(cv_text)
+        texts: Dict[str, List[str]] = {}
+        for segment, section in SEGMENT_SECTIONS.items():
+            if segments[segment]["text"].strip():
+                texts.setdefault(section, []).append(segments[segment]["text"])
+        if set(texts) <= {FULL_SCHEMA_SECTION}:
+            # No headings recognised: the summary segment holds the whole CV
+            return [(None, SYSTEM_PROMPT, piece) for piece in split_text(cv_text, section_chars)]
+        return [(section, SYSTEM_PROMPT if section == FULL_SCHEMA_SECTION else section_system_prompt(section), piece)
+                for section in [FULL_SCHEMA_SECTION, *SECTION_SCHEMAS] if section in texts
+                for piece in split_text("\n".join(texts[section]), section_chars)]
+
+    @classmethod
+    def _merge(cls, jobs, replies) -> dict:
+        result: Dict[str, Any] = {f: [] if f in LIST_FIELDS else "" for f in SCHEMA_FIELDS}
+        failed = []
+        for (section, _, _), (text, _) in zip(jobs, replies):
+            try:
+                data = json.loads(strip_json_fences(text))
+            except ValueError:
+                data = None
+            if not isinstance(data, dict) or "error" in data:
+                logger.error(f"Chunked shredding: {section or 'cv'} piece failed: {str(text)[:200]}")
+                failed.append(section or "cv")
+                continue
+            fields = SECTION_SCHEMAS.get(section, SCHEMA_FIELDS)
+            for field in fields:
+                value = data.get(field)
+                if field in LIST_FIELDS:
+                    if isinstance(value, list):
+                        # A skill listed in two pieces is kept once; entries (jobs, projects) are kept as is
+                        result[field].extend(v for v in value if isinstance(v, dict) or v not in result[field])
+                elif value and not result[field]:
+                    # Scalars: the first piece that has one wins (the contact lines come first)
+                    result[field] = value
+        metas = [meta for _, meta in replies]
+        llm_meta = {**metas[0], "cached": all(m.get("cached") for m in metas), "chunks": len(jobs)}
+        llm_meta.pop("cache_age_seconds", None)
+        if failed:
+            llm_meta["failed_sections"] = failed
+        if len(failed) == len(jobs):
+            return cls._parse("", llm_meta)
+        result["llm_meta"] = llm_meta
+        return result
+
+
+    @staticmethod
+    def _parse(response_text: str, llm_meta: dict) -> dict:
         try:
             # Clean response if LLM adds markdown backticks
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].strip()
-            
-            return json.loads(response_text)
+            result = json.loads(strip_json_fences(response_text))
+            result["llm_meta"] = llm_meta
+            return result
         except Exception as e:
             print(f"Shredder Error: {e}")
             # Ensure we return a valid dict even on error, to prevent UI crash
@@ -76,5 +251,6 @@ INSTRUCTIONS:
                 "skills": [],
                 "work_experience": [],
                 "projects": [],
-                "education": []
+                "education": [],
+                "llm_meta": llm_meta
             }
@@ -0,0 +1,71 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+# Key of the last item yielded by the stream_* methods: its value is the full
+# parsed result, exactly what the matching non-streaming call returns.
+STREAM_DONE = "__done__"
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON object that arrives in chunks (a streamed LLM response) and
+    reports each top-level member as soon as its value is complete, e.g.
+    "scores" long before the suggestions that follow it have been generated.
+    Text before the opening brace (a ```json fence, chatter) is skipped.
+    Only the root object's members are reported; nested values come whole.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0             # next character to scan
+        self._root = None         # index of the root '{'
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start: Optional[int] = None  # start of the current "key": value text
+        self.done = False
+        self.members: dict = {}
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Adds a chunk; returns the (key, value) members completed by it, in order."""
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+        i = self._pos
+        while i < len(buf) and not self.done:
+            c = buf[i]
+            if self._root is None:
+                if c == "{":
+                    self._root, self._depth, self._member_start = i, 1, i + 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete(buf[self._member_start:i], completed)
+                    self.done = True
+            elif c == "," and self._depth == 1:
+                self._complete(buf[self._member_start:i], completed)
+                self._member_start = i + 1
+            i += 1
+        self._pos = i
+        return completed
+
+    def _complete(self, text: str, completed: List[Tuple[str, Any]]):
+        if not text.strip():
+            return
+        try:
+            member = json.loads("{" + text + "}")
+        except ValueError:
+            # Malformed member; the caller's final parse of the whole text decides what happens
+            return
+        for key, value in member.items():
+            self.members[key] = value
+            completed.append((key, value))
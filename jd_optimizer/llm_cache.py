@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("JD_Optimizer_LLMCache")
+
+LLM_CACHE_PATH = os.path.join("cache", "llm.db")
+DEFAULT_TTL_HOURS = 24 * 7
+DEFAULT_CACHE_MB = 64
+# A hit rewrites last_used at most this often, so hot reads do not queue on the write lock
+TOUCH_INTERVAL_SECONDS = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+def _sha256(text: Optional[str]) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def llm_cache_key(provider: str, model: str, system_prompt: Optional[str], prompt: str,
+                  params: Optional[Dict[str, Any]] = None) -> str:
+    """(provider, model, system prompt hash, user prompt hash, generation params) as one digest."""
+    return _sha256(json.dumps({
+        "provider": provider,
+        "model": model,
+        "system": _sha256(system_prompt),
+        "prompt": _sha256(prompt),
+        "params": params or {}
+    }, sort_keys=True))
+
+class LLMResponseCache:
+    """
+    Persistent cache of raw LLM response texts in a local SQLite file.
+    Entries expire `ttl_seconds` after they were stored; once the stored text
+    exceeds `max_bytes` the least recently used entries are evicted (to within
+    `touch_interval` seconds). max_bytes=0 disables the cache.
+    """
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_HOURS * 3600,
+                 max_bytes: int = DEFAULT_CACHE_MB * 1024 * 1024, timeout: float = 30.0,
+                 touch_interval: float = TOUCH_INTERVAL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            # Switching to WAL does not wait on the busy timeout when several processes open a new file
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    break
+                except sqlite3.OperationalError as e:
+                    if "locked" not in str(e) or time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.05)
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """(response text, age in seconds) for a live entry, or None."""
+        if not self.enabled:
+            return None
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT response, created, last_used FROM responses WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[2] >= self.touch_interval:
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0], now - row[1]
+        except sqlite3.Error as e:
+            # The cache is an optimisation; a broken file must not stop an analysis
+            logger.error(f"LLM cache read failed: {e}")
+            return None
+
+    def put(self, key: str, response: str):
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT OR REPLACE INTO responses (key, response, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                             (key, response, len(response.encode("utf-8")), now, now))
+                self._evict(conn, now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.error(f"LLM cache write failed: {e}")
+
+    def _evict(self, conn, now: float):
+        if self.ttl_seconds:
+            self.evictions += conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            self._connect().execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "ttl_seconds": self.ttl_seconds, "max_bytes": self.max_bytes}
+
+_shared_cache: Optional[LLMResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+def get_llm_cache() -> LLMResponseCache:
+    """
+    The process-wide cache used by LLMService by default, configured from
+    LLM_CACHE_TTL_HOURS and LLM_CACHE_MB (0 disables it).
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMResponseCache(
+                LLM_CACHE_PATH,
+                ttl_seconds=float(os.environ.get("LLM_CACHE_TTL_HOURS", DEFAULT_TTL_HOURS)) * 3600,
+                max_bytes=int(float(os.environ.get("LLM_CACHE_MB", DEFAULT_CACHE_MB)) * 1024 * 1024)
+            )
+        return _shared_cache
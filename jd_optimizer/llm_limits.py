@@ -0,0 +1,72 @@
+import os
+import time
+import threading
+from typing import Dict, Tuple
+
+# Per-provider (max requests in flight, max requests started per second; 0 = unlimited),
+# shared by every LLMService in the process: blocking, async and streamed calls alike.
+# A local Ollama serves one or two generations at a time; hosted APIs take more.
+# LLM_MAX_CONCURRENCY / LLM_RATE_LIMIT override every provider.
+PROVIDER_LIMITS: Dict[str, Tuple[int, float]] = {
+    "ollama": (2, 0),
+    "gemini": (8, 0),
+    "external": (8, 0)
+}
+DEFAULT_LIMITS = (4, 0)
+
+def _env_limits(limits: Tuple[int, float]) -> Tuple[int, float]:
+    concurrency = int(os.environ.get("LLM_MAX_CONCURRENCY", 0)) or limits[0]
+    rate = float(os.environ.get("LLM_RATE_LIMIT", 0)) or limits[1]
+    return concurrency, rate
+
+class ProviderLimiter:
+    """
+    with limiter: at most `max_concurrency` requests in flight, and request starts
+    spaced at least 1/requests_per_second apart. Thread-based, so one limiter
+    covers every caller in the process: Streamlit sessions, batch threads and
+    each asyncio.run() of the async helpers (the async client enters it on its
+    executor threads).
+    """
+    def __init__(self, max_concurrency: int, requests_per_second: float = 0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests_per_second = requests_per_second
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._rate_lock = threading.Lock()
+        self._next_start = 0.0
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        try:
+            if self._interval:
+                # Reserve the next start slot before sleeping, so waiters start in order
+                with self._rate_lock:
+                    now = time.monotonic()
+                    start = max(now, self._next_start)
+                    self._next_start = start + self._interval
+                if start > now:
+                    time.sleep(start - now)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self._semaphore.release()
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def provider_limiter(provider: str) -> ProviderLimiter:
+    """The process-wide limiter of `provider`."""
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = _limiters[provider] = ProviderLimiter(*_env_limits(PROVIDER_LIMITS.get(provider, DEFAULT_LIMITS)))
+        return limiter
+
+def set_provider_limits(provider: str, max_concurrency: int, requests_per_second: float = 0):
+    """Changes a provider's limits; requests already holding a slot finish under the old ones."""
+    with _limiters_lock:
+        PROVIDER_LIMITS[provider] = (max_concurrency, requests_per_second)
+        _limiters.pop(provider, None)
@@ -1,19 +1,233 @@
 
+import os
+import asyncio
 import requests
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .llm_cache import LLMResponseCache, get_llm_cache, llm_cache_key
+from .llm_limits import provider_limiter
 
 logger = logging.getLogger("JD_Optimizer_LLM")
 logger.setLevel(logging.INFO)
 
+# HTTP settings shared by every LLMService in the process (UI sessions, batch jobs):
+#   LLM_POOL_SIZE       - keep-alive connections kept per host
+#   LLM_CONNECT_TIMEOUT - seconds to establish a connection
+#   LLM_READ_TIMEOUT    - seconds to wait for the response (generation can be slow)
+#   LLM_RETRIES         - retries on 429/5xx and connection errors, with exponential backoff
+LLM_POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", 10))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", 10))
+LLM_READ_TIMEOUT = float(os.environ.get("LLM_READ_TIMEOUT", 300))
+LLM_RETRIES = int(os.environ.get("LLM_RETRIES", 3))
+# Threads that carry the blocking HTTP calls of acall_llm; the provider limiters decide how many send at once
+LLM_ASYNC_THREADS = int(os.environ.get("LLM_ASYNC_THREADS", 32))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def build_http_session(pool_size: int = LLM_POOL_SIZE, retries: int = LLM_RETRIES,
+                       backoff_factor: float = 0.5) -> requests.Session:
+    """
+    A requests.Session with a sized keep-alive pool. Calls reuse open
+    connections instead of paying a TCP (and TLS) handshake each time. 429 and
+    5xx responses are retried with exponential backoff, honouring Retry-After.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0, # A read timeout means the model is still generating; resending would start over
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False # Hand the last response back so the callers report its status
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+_shared_session: Optional[requests.Session] = None
+_shared_session_lock = threading.Lock()
+
+def get_http_session() -> requests.Session:
+    """The process-wide session (and connection pool) used by LLMService by default."""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = build_http_session()
+        return _shared_session
+
+_async_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_async_executor() -> ThreadPoolExecutor:
+    global _async_executor
+    with _shared_session_lock:
+        if _async_executor is None:
+            _async_executor = ThreadPoolExecutor(max_workers=LLM_ASYNC_THREADS, thread_name_prefix="llm-call")
+        return _async_executor
+
+class LLMStreamError(Exception):
+    """A provider refused or broke off a streamed response."""
+
+def _iter_sse_data(response) -> Iterator[str]:
+    """The `data:` payloads of a server-sent event stream, up to an OpenAI-style [DONE]."""
+    # Decoded here: requests assumes ISO-8859-1 for text/event-stream without a charset
+    for line in response.iter_lines():
+        line = line.decode("utf-8") if isinstance(line, bytes) else line
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        if data:
+            yield data
+
+def strip_json_fences(text: str) -> str:
+    """The JSON inside a ```json fence (or a bare ``` fence); other text unchanged."""
+    if "```json" in text:
+        return text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        return text.split("```")[1].strip()
+    return text
+
+def _is_error_response(text: str) -> bool:
+    """The {"error": ...} payloads the provider calls below return instead of raising."""
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return False
+    return isinstance(data, dict) and "error" in data and set(data) <= {"error", "raw"}
+
+def _is_cacheable(text: str) -> bool:
+    """
+    Only a complete JSON object is worth replaying. Truncated or chatty generations,
+    Ollama's empty fallback and {"error": ...} payloads are not cached, so asking
+    again reaches the model instead of replaying the failure for the cache TTL.
+    """
+    try:
+        data = json.loads(strip_json_fences(text or ""))
+    except ValueError:
+        return False
+    return isinstance(data, dict) and not _is_error_response(text)
+
 class LLMService:
-    def __init__(self, provider="ollama", model="llama3.1", api_key=None, base_url=None):
+    def __init__(self, provider="ollama", model="llama3.1", api_key=None, base_url=None,
+                 cache: Optional[LLMResponseCache] = None, use_cache: bool = True,
+                 session: Optional[requests.Session] = None,
+                 timeout: Union[float, Tuple[float, float], None] = None):
         self.provider = provider
         self.model = model
         self.api_key = api_key
         self.base_url = base_url or ("http://localhost:11434/api/generate" if provider == "ollama" else None)
+        # One pooled session per process unless the caller brings its own
+        self.session = session or get_http_session()
+        # (connect, read) seconds; a single number applies to both
+        self.timeout = timeout or (LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT)
+        # Identical requests are answered from the local response cache (see llm_cache)
+        self.cache = (cache or get_llm_cache()) if use_cache else None
 
     def call_llm(self, prompt, system_prompt=None):
+        return self.call_llm_with_meta(prompt, system_prompt)[0]
+
+    def call_llm_with_meta(self, prompt, system_prompt=None) -> Tuple[str, Dict[str, Any]]:
+        """
+        call_llm plus `llm_meta`: provider, model and whether the response was
+        served from the cache (and how old it is). Error responses are never cached.
+        """
+        key, hit = self._cache_lookup(prompt, system_prompt)
+        if hit is not None:
+            return hit
+        return self._cache_store(key, self._limited_dispatch(prompt, system_prompt))
+
+    async def acall_llm(self, prompt, system_prompt=None):
+        return (await self.acall_llm_with_meta(prompt, system_prompt))[0]
+
+    async def acall_llm_with_meta(self, prompt, system_prompt=None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Async call_llm_with_meta. Many calls can be awaited together; the HTTP
+        call runs on a worker thread over the shared pooled session, inside the
+        provider's process-wide limiter (see llm_limits), which caps requests in
+        flight and how fast they start. Cache hits skip the limiter.
+        """
+        loop = asyncio.get_running_loop()
+        executor = _get_async_executor()
+        key, hit = await loop.run_in_executor(executor, self._cache_lookup, prompt, system_prompt)
+        if hit is not None:
+            return hit
+        text = await loop.run_in_executor(executor, self._limited_dispatch, prompt, system_prompt)
+        return await loop.run_in_executor(executor, self._cache_store, key, text)
+
+    def stream_llm(self, prompt, system_prompt=None) -> Iterator[str]:
+        return self.stream_llm_with_meta(prompt, system_prompt)[0]
+
+    def stream_llm_with_meta(self, prompt, system_prompt=None) -> Tuple[Iterator[str], Dict[str, Any]]:
+        """
+        Like call_llm_with_meta, but the response text arrives as an iterator
+        of chunks while it is generated (Ollama NDJSON, Gemini and OpenAI-style
+        SSE). A cache hit arrives as a single chunk. A response streamed to the
+        end is cached under the same key as call_llm's. A failure ends the
+        stream with an {"error": ...} chunk.
+        """
+        key, hit = self._cache_lookup(prompt, system_prompt)
+        if hit is not None:
+            return iter([hit[0]]), hit[1]
+        return self._stream_and_store(key, prompt, system_prompt), self._meta()
+
+    def _stream_and_store(self, key: Optional[str], prompt, system_prompt) -> Iterator[str]:
+        chunks = []
+        try:
+            # The slot is held until the stream ends or the consumer closes it
+            with provider_limiter(self.provider):
+                for chunk in self._dispatch_stream(prompt, system_prompt):
+                    chunks.append(chunk)
+                    yield chunk
+        except Exception as e:
+            logger.exception(f"{self.provider} stream failed")
+            yield json.dumps({"error": str(e)})
+            return
+        self._cache_store(key, "".join(chunks))
+
+    def _meta(self, **extra) -> Dict[str, Any]:
+        return {"provider": self.provider, "model": self.model, "cached": False, **extra}
+
+    def _cache_lookup(self, prompt, system_prompt) -> Tuple[Optional[str], Optional[Tuple[str, Dict[str, Any]]]]:
+        """(cache key or None, (text, meta) on a hit)."""
+        if self.cache is None or not self.cache.enabled:
+            return None, None
+        key = llm_cache_key(self.provider, self.model, system_prompt, prompt, self._generation_params())
+        hit = self.cache.get(key)
+        if hit is not None:
+            return key, (hit[0], self._meta(cached=True, cache_age_seconds=round(hit[1], 1)))
+        return key, None
+
+    def _cache_store(self, key: Optional[str], text: str) -> Tuple[str, Dict[str, Any]]:
+        if key is not None and _is_cacheable(text):
+            self.cache.put(key, text)
+        return text, self._meta()
+
+    def _generation_params(self) -> Dict[str, Any]:
+        """
+        Request settings besides model and prompts that shape the response; mirrors
+        the payloads below. Streamed calls share the key: the assembled text is the same.
+        """
+        if self.provider == "ollama":
+            return {"endpoint": self.base_url, "format": "json", "stream": False}
+        elif self.provider == "gemini":
+            return {"api": "v1beta", "response_mime_type": "application/json"}
+        return {"endpoint": self.base_url,
+                "response_format": None if "googleapis" in (self.base_url or "") else "json_object"}
+
+    def _limited_dispatch(self, prompt, system_prompt):
+        with provider_limiter(self.provider):
+            return self._dispatch(prompt, system_prompt)
+
+    def _dispatch(self, prompt, system_prompt):
         if self.provider == "ollama":
             return self._call_ollama(prompt, system_prompt)
         elif self.provider == "gemini":
@@ -21,14 +235,11 @@ class LLMService:
         else:
             return self._call_external_api(prompt, system_prompt)
 
-    def _call_google_gemini(self, prompt, system_prompt):
-        # Native Google Gemini REST API implementation
-        if not self.api_key:
-             return json.dumps({"error": "Gemini API Key is required"})
-             
+    def _gemini_request(self, prompt, system_prompt, stream=False) -> Tuple[str, Dict[str, Any]]:
         # Construct URL - default to v1beta if no specific base_url overrides
         # We ignore the OpenAI compat URL if it was passed by accident
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent?key={self.api_key}"
+        method = "streamGenerateContent?alt=sse&" if stream else "generateContent?"
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:{method}key={self.api_key}"
             
         payload = {
             "contents": [{
@@ -44,9 +255,16 @@ class LLMService:
              payload["system_instruction"] = {
                  "parts": [{"text": system_prompt}]
              }
+        return url, payload
+
+    def _call_google_gemini(self, prompt, system_prompt):
+        # Native Google Gemini REST API implementation
+        if not self.api_key:
+             return json.dumps({"error": "Gemini API Key is required"})
+        url, payload = self._gemini_request(prompt, system_prompt)
              
         try:
-            response = requests.post(url, json=payload, timeout=300)
+            response = self.session.post(url, json=payload, timeout=self.timeout)
             if response.status_code == 200:
                 result = response.json()
                 # Extract text from Candidate -> Content -> Parts
@@ -59,16 +277,19 @@ class LLMService:
         except Exception as e:
             return json.dumps({"error": str(e)})
 
+    def _ollama_payload(self, prompt, system_prompt, stream=False) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "system": system_prompt,
+            "stream": stream,
+            "format": "json"
+        }
+
     def _call_ollama(self, prompt, system_prompt):
         try:
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "system": system_prompt,
-                "stream": False,
-                "format": "json"
-            }
-            response = requests.post(self.base_url, json=payload, timeout=300)
+            payload = self._ollama_payload(prompt, system_prompt)
+            response = self.session.post(self.base_url, json=payload, timeout=self.timeout)
             if response.status_code == 200:
                 result = response.json()
                 return result.get("response", "")
@@ -79,11 +300,7 @@ class LLMService:
             logger.exception("Ollama connection failed")
             return json.dumps({"error": str(e)})
 
-    def _call_external_api(self, prompt, system_prompt):
-        # Placeholder for OpenAI/Groq or other OpenAI-compatible APIs
-        if not self.base_url:
-            return json.dumps({"error": "External API URL not set"})
-        
+    def _external_request(self, prompt, system_prompt, stream=False) -> Tuple[Dict[str, str], Dict[str, Any]]:
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}" if self.api_key else ""
@@ -102,9 +319,18 @@ class LLMService:
         # Google's OpenAI compat layer can sometimes be picky or returns 404s on models if features mismatch
         if "googleapis" not in self.base_url:
              payload["response_format"] = {"type": "json_object"}
+        if stream:
+            payload["stream"] = True
+        return headers, payload
+
+    def _call_external_api(self, prompt, system_prompt):
+        # Placeholder for OpenAI/Groq or other OpenAI-compatible APIs
+        if not self.base_url:
+            return json.dumps({"error": "External API URL not set"})
+        headers, payload = self._external_request(prompt, system_prompt)
         
         try:
-            response = requests.post(self.base_url, headers=headers, json=payload, timeout=300)
+            response = self.session.post(self.base_url, headers=headers, json=payload, timeout=self.timeout)
             if response.status_code == 200:
                 res_data = response.json()
                 return res_data["choices"][0]["message"]["content"]
@@ -112,3 +338,59 @@ class LLMService:
                 return json.dumps({"error": f"API returned {response.status_code}: {response.text}"})
         except Exception as e:
             return json.dumps({"error": str(e)})
+
+    # Streaming: the provider methods below yield text deltas and raise on errors;
+    # _stream_and_store turns a failure into the usual {"error": ...} payload.
+    def _dispatch_stream(self, prompt, system_prompt) -> Iterator[str]:
+        if self.provider == "ollama":
+            return self._stream_ollama(prompt, system_prompt)
+        elif self.provider == "gemini":
+            return self._stream_google_gemini(prompt, system_prompt)
+        else:
+            return self._stream_external_api(prompt, system_prompt)
+
+    def _stream_ollama(self, prompt, system_prompt) -> Iterator[str]:
+        # NDJSON: one {"response": delta, "done": bool} object per line
+        payload = self._ollama_payload(prompt, system_prompt, stream=True)
+        with self.session.post(self.base_url, json=payload, timeout=self.timeout, stream=True) as response:
+            if response.status_code != 200:
+                logger.error(f"Ollama error: {response.text}")
+                raise LLMStreamError(f"Ollama returned {response.status_code}")
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get("error"):
+                    raise LLMStreamError(event["error"])
+                if event.get("response"):
+                    yield event["response"]
+                if event.get("done"):
+                    break
+
+    def _stream_google_gemini(self, prompt, system_prompt) -> Iterator[str]:
+        if not self.api_key:
+            raise LLMStreamError("Gemini API Key is required")
+        url, payload = self._gemini_request(prompt, system_prompt, stream=True)
+        with self.session.post(url, json=payload, timeout=self.timeout, stream=True) as response:
+            if response.status_code != 200:
+                raise LLMStreamError(f"Gemini API {response.status_code}: {response.text}")
+            for data in _iter_sse_data(response):
+                event = json.loads(data)
+                try:
+                    yield event["candidates"][0]["content"]["parts"][0]["text"]
+                except (KeyError, IndexError):
+                    # e.g. a final chunk that only carries usage metadata
+                    continue
+
+    def _stream_external_api(self, prompt, system_prompt) -> Iterator[str]:
+        if not self.base_url:
+            raise LLMStreamError("External API URL not set")
+        headers, payload = self._external_request(prompt, system_prompt, stream=True)
+        with self.session.post(self.base_url, headers=headers, json=payload, timeout=self.timeout, stream=True) as response:
+            if response.status_code != 200:
+                raise LLMStreamError(f"API returned {response.status_code}: {response.text}")
+            for data in _iter_sse_data(response):
+                choices = json.loads(data).get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
@@ -5,10 +5,11 @@ import json
 import os
 from .analysis import JDOptimizer
 from .llm_service import LLMService
+from .json_stream import STREAM_DONE
 
 API_BASE_URL = "http://localhost:8000"
 
-from .cv_shredder import CVShredder
+from .cv_shredder import CVShredder, SINGLE_PROMPT_CHARS
 import fitz # PyMuPDF
 
 @st.cache_data
@@ -21,6 +22,18 @@ def get_local_templates():
         pass
     return []
 
+def _render_analysis_preview(early):
+    """Scores and missing keywords of an analysis that is still streaming."""
+    scores = early.get("scores")
+    if isinstance(scores, dict):
+        p1, p2, p3 = st.columns(3)
+        p1.metric("Overall Score", f"{scores.get('overall', '-')}%")
+        p2.metric("Technical Score", f"{scores.get('technical', '-')}%")
+        p3.metric("Experience Score", f"{scores.get('experience', '-')}%")
+    if early.get("missing_keywords"):
+        st.caption("Missing keywords: " + ", ".join(str(k) for k in early["missing_keywords"]))
+    st.caption("Generating suggestions...")
+
 def jd_optimizer_ui():
     # Top Bar: Description Left, Settings Right
     top_c1, top_c2 = st.columns([3, 1])
@@ -161,15 +174,39 @@ def jd_optimizer_ui():
                     st.error(f"Error reading PDF: {e}")
                     st.stop()
                     
-                # 3. AI Shredding (Better than Regex)
+                # 3. AI Shredding (Better than Regex), streamed so sections show up as they are parsed.
+                # CVs too long for one prompt are shredded section by section in parallel instead.
                 shredder = CVShredder(llm)
-                cv_data = shredder.shred_cv(cv_text)
+                if len(cv_text) > SINGLE_PROMPT_CHARS:
+                    cv_data = shredder.shred_cv_chunked(cv_text)
+                    if cv_data.get('llm_meta', {}).get('failed_sections'):
+                        st.warning(f"Some CV sections could not be parsed: {', '.join(cv_data['llm_meta']['failed_sections'])}")
+                else:
+                    progress = st.empty()
+                    sections = []
+                    for key, value in shredder.stream_shred_cv(cv_text):
+                        if key == STREAM_DONE:
+                            cv_data = value
+                        else:
+                            sections.append(key)
+                            progress.caption(f"Extracted: {', '.join(sections)}")
+                    progress.empty()
                 st.session_state['original_cv_data'] = cv_data
                 
                 with st.spinner("Analyzing match (Step 2: JD Fit)..."):
                     optimizer = JDOptimizer(llm)
-                    # Initial run with perfect target to find all gaps
-                    analysis = optimizer.analyze_match(cv_data, jd_text, target_score=100)
+                    # Initial run with perfect target to find all gaps; scores and
+                    # missing keywords are shown while the suggestions are still generating
+                    preview = st.empty()
+                    early = {}
+                    for key, value in optimizer.stream_analyze_match(cv_data, jd_text, target_score=100):
+                        if key == STREAM_DONE:
+                            analysis = value
+                        elif key in ("scores", "missing_keywords"):
+                            early[key] = value
+                            with preview.container():
+                                _render_analysis_preview(early)
+                    preview.empty()
     
                     if "error" in analysis:
                         st.error(analysis["error"])
@@ -183,6 +220,10 @@ def jd_optimizer_ui():
         
         st.divider()
         
+        llm_meta = analysis.get('llm_meta', {})
+        if llm_meta.get('cached'):
+            st.caption(f"⚡ Served from the local LLM cache ({llm_meta.get('cache_age_seconds', 0):.0f}s old) - no tokens used.")
+        
         # --- SCORE DISPLAY ---
         overall_score = analysis['scores']['overall']
         
@@ -337,7 +378,7 @@ def jd_optimizer_ui():
                         from template_engine.template_manager import get_template_schema
                         from jd_optimizer.core.template_mapper import fill_template
                         from jd_optimizer.core.template_models import TemplateSchema
-                        import tempfile
+                        import io
                         import os
                         
                         # 1. Get Schema & Data
@@ -361,26 +402,20 @@ def jd_optimizer_ui():
                         
                         optimized_data = st.session_state['optimized_cv']
                         
-                        # 2. Run Mapper Locally
-                        # fill_template returns the output file path
-                        # We need a temp path for output
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-                            output_path = tmp.name
-                            
-                        # Override output path in fill_template if possible?
-                        # fill_template(schema, data, output_path) function signature check:
-                        # def fill_template(schema: TemplateSchema, data: dict, output_path: str = None) -> str:
-                        
-                        final_doc_path = fill_template(schema, optimized_data, output_path)
+                        # 2. Run Mapper Locally, into memory
+                        # fill_template saves to any writable stream and logs (swallows) its errors
+                        buffer = io.BytesIO()
+                        fill_template(schema, optimized_data, buffer)
+                        if not buffer.getvalue():
+                            raise RuntimeError("Template fill failed")
                         
-                        # 3. Read & Download
-                        with open(final_doc_path, "rb") as f:
-                            st.download_button(
-                                label="⬇️ Download Optimized CV",
-                                data=f.read(), # Read the content here
-                                file_name=f"Optimized_{selected_temp}",
-                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                            )
+                        # 3. Download
+                        st.download_button(
+                            label="⬇️ Download Optimized CV",
+                            data=buffer.getvalue(),
+                            file_name=f"Optimized_{selected_temp}",
+                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                        )
                         st.balloons()
                         
                     except Exception as e:
@@ -0,0 +1,19 @@
+"""
+Job Queue Package
+Asynchronous CV processing: on-disk job records and an in-process worker queue.
+"""
+
+from .job_store import JobStore, JOBS_DIR, JOB_STATUSES, QUEUED, RUNNING, DONE, FAILED
+from .job_queue import JobQueue, DEFAULT_JOB_WORKERS
+
+__all__ = [
+    'JobStore',
+    'JobQueue',
+    'JOBS_DIR',
+    'JOB_STATUSES',
+    'DEFAULT_JOB_WORKERS',
+    'QUEUED',
+    'RUNNING',
+    'DONE',
+    'FAILED'
+]
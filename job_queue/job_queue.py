@@ -0,0 +1,79 @@
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .job_store import JobStore, QUEUED, RUNNING, DONE, FAILED
+
+logger = logging.getLogger("JobQueue")
+
+DEFAULT_JOB_WORKERS = 2
+
+# handler(job, content) -> result dict stored on the job record
+JobHandler = Callable[[Dict[str, Any], bytes], Dict[str, Any]]
+
+class JobQueue:
+    """
+    In-process work queue over a JobStore.
+    `workers` threads pull job ids and run `handler`; the handler is expected to
+    hand the CPU-bound work to the shared worker pool and block on the result.
+    Unfinished jobs found in the store are re-queued on start().
+    """
+    def __init__(self, store: JobStore, handler: JobHandler, workers: int = DEFAULT_JOB_WORKERS):
+        self.store = store
+        self.handler = handler
+        self.workers = max(1, workers)
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self._threads:
+            return
+        resumed = self.store.unfinished()
+        for job in resumed:
+            self.store.update(job["job_id"], status=QUEUED)
+            self._queue.put(job["job_id"])
+        if resumed:
+            logger.info(f"Resumed {len(resumed)} unfinished job(s)")
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    def submit(self, job_id: str, filename: str, content: bytes, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        job = self.store.create(job_id, filename, content, params)
+        self._queue.put(job_id)
+        return job
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _worker(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                break
+            try:
+                self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id: str):
+        job = self.store.update(job_id, status=RUNNING)
+        if job is None:
+            logger.warning(f"Job {job_id} vanished from the store")
+            return
+        try:
+            result = self.handler(job, self.store.read_upload(job_id))
+            self.store.update(job_id, status=DONE, result=result, error=None)
+            self.store.discard_upload(job_id)
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed: {e}")
+            self.store.update(job_id, status=FAILED, error=str(e))
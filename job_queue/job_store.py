@@ -0,0 +1,93 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("JobStore")
+
+JOBS_DIR = "jobs"
+
+# Job lifecycle: queued -> running -> done | failed
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+JOB_STATUSES = (QUEUED, RUNNING, DONE, FAILED)
+
+class JobStore:
+    """
+    On-disk job records: one `<job_id>.json` per job plus the uploaded file
+    as `<job_id>.upload`, so queued work survives a server restart.
+    Records are rewritten atomically (temp file + os.replace).
+    """
+    def __init__(self, root: str = JOBS_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _record_path(self, job_id: str) -> str:
+        return os.path.join(self.root, f"{job_id}.json")
+
+    def _upload_path(self, job_id: str) -> str:
+        return os.path.join(self.root, f"{job_id}.upload")
+
+    def _write(self, job: Dict[str, Any]):
+        path = self._record_path(job["job_id"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(job, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def create(self, job_id: str, filename: str, content: bytes, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        with open(self._upload_path(job_id), "wb") as f:
+            f.write(content)
+        now = datetime.now().isoformat()
+        job = {
+            "job_id": job_id,
+            "filename": filename,
+            "params": params or {},
+            "status": QUEUED,
+            "created_at": now,
+            "updated_at": now,
+            "error": None,
+            "result": None
+        }
+        with self._lock:
+            self._write(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._record_path(job_id), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def update(self, job_id: str, **fields) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                return None
+            job.update(fields)
+            job["updated_at"] = datetime.now().isoformat()
+            self._write(job)
+            return job
+
+    def read_upload(self, job_id: str) -> bytes:
+        with open(self._upload_path(job_id), "rb") as f:
+            return f.read()
+
+    def discard_upload(self, job_id: str):
+        try:
+            os.remove(self._upload_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Queued or interrupted (running) jobs, oldest first."""
+        jobs = []
+        for name in os.listdir(self.root):
+            if name.endswith(".json"):
+                job = self.get(name[:-len(".json")])
+                if job and job["status"] in (QUEUED, RUNNING):
+                    jobs.append(job)
+        return sorted(jobs, key=lambda j: j["created_at"])
@@ -0,0 +1,84 @@
+"""
+Concurrent upload load test for the FastAPI backend.
+
+Fires N uploads at /process (or /process-to-template) from C client threads and
+reports throughput, plus the latency of a cheap endpoint probed during the run
+(shows whether the event loop stays responsive while CVs are being processed).
+
+Start the server with different pool sizes and compare:
+    CV_WORKERS=1 python -m uvicorn main:app --port 8000
+    CV_WORKERS=4 python -m uvicorn main:app --port 8000
+    python load_test.py --requests 24 --concurrency 8
+"""
+import os
+import glob
+import time
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+API_BASE_URL = "http://localhost:8000"
+INPUT_DIR = "input"
+
+def upload(url, path):
+    with open(path, "rb") as f:
+        files = {"file": (os.path.basename(path), f, "application/pdf")}
+        t0 = time.perf_counter()
+        res = requests.post(url, files=files)
+        return res.status_code, time.perf_counter() - t0
+
+def probe(base_url, stop, latencies):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            requests.get(f"{base_url}/test-upload", timeout=30)
+            latencies.append(time.perf_counter() - t0)
+        except Exception as e:
+            print(f"Probe failed: {e}")
+        time.sleep(0.2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=API_BASE_URL)
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--template", default=None, help="use /process-to-template with this template")
+    args = parser.parse_args()
+
+    cvs = sorted(glob.glob(os.path.join(INPUT_DIR, "*.pdf")))
+    if not cvs:
+        print(f"No PDFs found in {INPUT_DIR}")
+        return
+    if args.template:
+        url = f"{args.base_url}/process-to-template?template_name={args.template}"
+    else:
+        url = f"{args.base_url}/process"
+    jobs = [cvs[i % len(cvs)] for i in range(args.requests)]
+
+    stop, probe_latencies = threading.Event(), []
+    prober = threading.Thread(target=probe, args=(args.base_url, stop, probe_latencies), daemon=True)
+    prober.start()
+
+    print(f"POST {url}  requests={args.requests} concurrency={args.concurrency}")
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda p: upload(url, p), jobs))
+    wall = time.perf_counter() - t0
+    stop.set()
+    prober.join()
+
+    ok = [t for code, t in results if code == 200]
+    failed = len(results) - len(ok)
+    print(f"Completed: {len(ok)} ok, {failed} failed in {wall:.2f}s")
+    print(f"Throughput: {len(ok) / wall:.2f} CVs/s")
+    if ok:
+        print(f"Request latency: median={statistics.median(ok):.2f}s max={max(ok):.2f}s")
+    if probe_latencies:
+        print(f"/test-upload during load: median={statistics.median(probe_latencies)*1000:.0f}ms "
+              f"max={max(probe_latencies)*1000:.0f}ms ({len(probe_latencies)} probes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("OutputRetention")
+
+DEFAULT_SWEEP_SECONDS = 600
+RETAINED_SUFFIXES = (".docx",)
+
+class OutputRetention:
+    """
+    Retention policy for a directory of generated documents (output/).
+    A sweep deletes files older than `ttl_seconds`, then the oldest remaining
+    files until the directory holds at most `max_bytes`. Either limit set to 0
+    (or None) is disabled; with both disabled nothing is ever deleted.
+    start() runs a sweep every `interval` seconds on a daemon thread.
+    Files for which `keep(path)` is true (e.g. the result of a finished job) are
+    never removed to make room; they still expire with the TTL, and
+    `on_remove(path)` is called for every file a sweep deletes.
+    """
+    def __init__(self, root: str, ttl_seconds: Optional[float] = None, max_bytes: Optional[int] = None,
+                 interval: float = DEFAULT_SWEEP_SECONDS, suffixes: Tuple[str, ...] = RETAINED_SUFFIXES,
+                 keep: Optional[Callable[[str], bool]] = None, on_remove: Optional[Callable[[str], None]] = None):
+        self.root = root
+        self.ttl_seconds = ttl_seconds or 0
+        self.max_bytes = max_bytes or 0
+        self.interval = interval
+        self.suffixes = suffixes
+        self.keep = keep
+        self.on_remove = on_remove
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.removed = 0
+        self.removed_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.ttl_seconds or self.max_bytes)
+
+    def _files(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of the retained files, oldest first."""
+        files = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self.suffixes) or not entry.is_file():
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, entry.path))
+        return sorted(files)
+
+    def _remove(self, path: str, size: int) -> bool:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            # e.g. the file is still open on Windows; the next sweep retries it
+            logger.warning(f"Could not remove {path}: {e}")
+            return False
+        self.removed += 1
+        self.removed_bytes += size
+        if self.on_remove:
+            self.on_remove(path)
+        return True
+
+    def sweep(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Applies the policy once. Returns what this sweep removed."""
+        if not self.enabled:
+            return {"removed": 0, "removed_bytes": 0}
+        now = time.time() if now is None else now
+        removed = removed_bytes = 0
+        with self._lock:
+            kept = []
+            for mtime, size, path in self._files():
+                if self.ttl_seconds and now - mtime > self.ttl_seconds:
+                    if self._remove(path, size):
+                        removed, removed_bytes = removed + 1, removed_bytes + size
+                    continue
+                kept.append((size, path))
+            total = sum(size for size, _ in kept)
+            # Oldest first until the directory fits
+            for size, path in kept:
+                if not self.max_bytes or total <= self.max_bytes:
+                    break
+                if self.keep and self.keep(path):
+                    continue
+                if self._remove(path, size):
+                    removed, removed_bytes = removed + 1, removed_bytes + size
+                total -= size
+        if removed:
+            logger.info(f"Removed {removed} file(s) ({removed_bytes} bytes) from {self.root}")
+        return {"removed": removed, "removed_bytes": removed_bytes}
+
+    def start(self):
+        if self._thread is not None or not self.enabled:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="output-retention", daemon=True)
+        self._thread.start()
+        logger.info(f"Output retention on {self.root}: ttl={self.ttl_seconds}s, max_bytes={self.max_bytes}")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.exception(f"Output retention sweep failed: {e}")
+            if self._stop.wait(self.interval):
+                break
+
+    def stats(self) -> Dict[str, int]:
+        return {"ttl_seconds": self.ttl_seconds, "max_bytes": self.max_bytes,
+                "removed": self.removed, "removed_bytes": self.removed_bytes}
@@ -1,14 +1,12 @@
 import streamlit as st
-import tempfile
 import os
 import json
 from PIL import Image
 import io
 
 # Minimal imports for Phase 1 & 2 only
-from template_engine.template_manager import get_template_schema
-from template_engine.template_mapper import fill_template
-from template_engine.template_extractor import extract_template_schema
+from template_engine.template_manager import get_template_schema, register_template
+from template_engine.template_mapper import render_template
 
 st.set_page_config(
     page_title="ResumeAlign - CV Processor",
@@ -45,21 +43,8 @@ with tab2:
                 with open(template_path, "wb") as f:
                     f.write(t_file.read())
                 
-                # Extract schema
-                schema = extract_template_schema(template_path, t_name)
-                
-                # Save to index
-                index_path = os.path.join(template_dir, "index.json")
-                if os.path.exists(index_path):
-                    with open(index_path, "r") as f:
-                        index = json.load(f)
-                else:
-                    index = {}
-                
-                index[t_name] = schema.dict()
-                
-                with open(index_path, "w") as f:
-                    json.dump(index, f, indent=2)
+                # Extract schema and store it in the template registry
+                register_template(template_path, t_name)
                 
                 st.success(f"✅ Template '{t_name}' registered!")
             except Exception as e:
@@ -96,20 +81,15 @@ with tab2:
                         cv_data = json.loads(cv_json_input)
                         schema = get_template_schema(sel_temp)
                         
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-                            output_path = tmp.name
-                        
-                        final_path = fill_template(schema, cv_data, output_path)
+                        docx_bytes = render_template(schema, cv_data)
                         
-                        with open(final_path, "rb") as f:
-                            st.download_button(
-                                "⬇️ Download Filled Document",
-                                f.read(),
-                                file_name=f"Filled_{sel_temp}.docx",
-                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                            )
+                        st.download_button(
+                            "⬇️ Download Filled Document",
+                            docx_bytes,
+                            file_name=f"Filled_{sel_temp}.docx",
+                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                        )
                         
-                        os.remove(final_path)
                         st.success("✅ Document generated!")
                         
                     except json.JSONDecodeError:
@@ -0,0 +1,14 @@
+"""
+Taxonomy Package
+Versioned skill/tool vocabulary shared by CV extraction and template skill bucketing.
+"""
+
+from .skill_taxonomy import SkillTaxonomy, SkillEntry, get_skill_taxonomy, load_taxonomy, normalize_token
+
+__all__ = [
+    'SkillTaxonomy',
+    'SkillEntry',
+    'get_skill_taxonomy',
+    'load_taxonomy',
+    'normalize_token'
+]
@@ -0,0 +1,118 @@
+import os
+import re
+import json
+import logging
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("SkillTaxonomy")
+
+TAXONOMY_FILE = os.path.join(os.path.dirname(__file__), "skills.json")
+
+_BOUNDARY_RE = re.compile(r'\b')
+
+def normalize_token(text: str) -> str:
+    return re.sub(r'\s+', ' ', str(text)).strip().lower()
+
+class SkillEntry(NamedTuple):
+    canonical: str
+    kind: str  # 'tech' or 'tool'
+    categories: Tuple[str, ...]
+    synonyms: Tuple[str, ...]
+    order: int
+
+class SkillBucket(NamedTuple):
+    labels: Tuple[str, ...]    # Template label words that select this bucket
+    keywords: Tuple[str, ...]  # Legacy substring match on the skill name
+    kinds: frozenset
+    categories: frozenset
+
+class SkillTaxonomy:
+    """
+    Immutable skill/tool vocabulary indexed by normalized token.
+    Matching cost depends on the number of word boundaries in the text and the
+    longest synonym, not on the size of the vocabulary.
+    """
+    def __init__(self, data: Dict):
+        self.version = str(data.get("version", "0"))
+        entries = []
+        index = {}
+        for order, raw in enumerate(data.get("skills", [])):
+            canonical = raw["canonical"]
+            terms = [normalize_token(canonical)] + [normalize_token(s) for s in raw.get("synonyms", [])]
+            entry = SkillEntry(
+                canonical=canonical,
+                kind=raw.get("kind", "tech"),
+                categories=tuple(raw.get("categories", [])),
+                synonyms=tuple(dict.fromkeys(t for t in terms if t)),
+                order=order
+            )
+            for term in entry.synonyms:
+                if term in index and index[term] is not entry:
+                    raise ValueError(f"Taxonomy term '{term}' is claimed by both '{index[term].canonical}' and '{canonical}'")
+                index[term] = entry
+            entries.append(entry)
+
+        self.entries: Tuple[SkillEntry, ...] = tuple(entries)
+        self.index = MappingProxyType(index)
+        self._max_term_len = max((len(t) for t in index), default=0)
+        self.buckets = MappingProxyType({
+            name: SkillBucket(
+                labels=tuple(b.get("labels", [name])),
+                keywords=tuple(b.get("keywords", [])),
+                kinds=frozenset(b.get("kinds", [])),
+                categories=frozenset(b.get("categories", []))
+            )
+            for name, b in data.get("buckets", {}).items()
+        })
+
+    def lookup(self, name: str) -> Optional[SkillEntry]:
+        """Exact lookup of a skill name or synonym."""
+        return self.index.get(normalize_token(name))
+
+    def find(self, text: str) -> List[SkillEntry]:
+        """
+        All entries whose term occurs in `text` on word boundaries (same semantics as
+        re.search(r'\\b' + re.escape(term) + r'\\b', text)), in taxonomy order.
+        `text` is expected to be lower-cased already.
+        """
+        if not text or not self._max_term_len: return []
+        bounds = [m.start() for m in _BOUNDARY_RE.finditer(text)]
+        found = {}
+        n = len(bounds)
+        for i in range(n):
+            start = bounds[i]
+            j = i + 1
+            while j < n and bounds[j] - start <= self._max_term_len:
+                entry = self.index.get(text[start:bounds[j]])
+                if entry is not None:
+                    found[entry.order] = entry
+                j += 1
+        return [found[k] for k in sorted(found)]
+
+    def buckets_for_label(self, label_text: str) -> List[str]:
+        """Bucket names selected by a template field label like 'Tools:'."""
+        if not label_text: return []
+        label = label_text.lower()
+        return [name for name, b in self.buckets.items() if any(l in label for l in b.labels)]
+
+    def in_bucket(self, skill: str, bucket_name: str) -> bool:
+        bucket = self.buckets.get(bucket_name)
+        if not bucket: return False
+        entry = self.lookup(skill)
+        if entry and (entry.kind in bucket.kinds or bucket.categories.intersection(entry.categories)):
+            return True
+        s_low = str(skill).lower()
+        return any(k in s_low for k in bucket.keywords)
+
+def load_taxonomy(path: str = TAXONOMY_FILE) -> SkillTaxonomy:
+    with open(path, 'r', encoding='utf-8') as f:
+        taxonomy = SkillTaxonomy(json.load(f))
+    logger.info(f"Loaded skill taxonomy v{taxonomy.version} from {path}: {len(taxonomy.entries)} skills, {len(taxonomy.index)} terms.")
+    return taxonomy
+
+@lru_cache(maxsize=None)
+def get_skill_taxonomy(path: str = TAXONOMY_FILE) -> SkillTaxonomy:
+    """Process-wide taxonomy, parsed and indexed once per file path."""
+    return load_taxonomy(path)
@@ -3,18 +3,41 @@ Template Engine Package
 Handles template extraction, cleaning, and mapping for CV reformatting.
 """
 
-from .template_models import TemplateSchema, TemplateSection, SectionType
-from .template_extractor import extract_template_schema
-from .template_manager import get_template_schema, register_template, list_templates
-from .template_mapper import fill_template
+from .template_models import TemplateSchema, TemplateSection, TemplatePlan, SectionType
+from .template_extractor import extract_template_schema, SectionHeaderCache, header_cache_for, iter_doc_items, DocItem
+from .template_manager import get_template_schema, register_template, list_templates, SchemaRegistry, schema_registry
+from .template_mapper import fill_template, render_template
+from .template_cache import TemplateSkeletonCache, skeleton_cache, load_template_document
+from .template_plan import build_template_plan, build_plan_for_file, HeaderClassifier
+from .table_index import TableIndex, table_index_for
+from .placeholders import replace_placeholders
+from .template_store import TemplateStore
 
 __all__ = [
     'TemplateSchema',
     'TemplateSection', 
+    'TemplatePlan',
     'SectionType',
     'extract_template_schema',
+    'SectionHeaderCache',
+    'header_cache_for',
+    'iter_doc_items',
+    'DocItem',
     'get_template_schema',
     'register_template',
     'list_templates',
-    'fill_template'
+    'SchemaRegistry',
+    'schema_registry',
+    'fill_template',
+    'render_template',
+    'TemplateSkeletonCache',
+    'skeleton_cache',
+    'load_template_document',
+    'build_template_plan',
+    'build_plan_for_file',
+    'HeaderClassifier',
+    'TableIndex',
+    'table_index_for',
+    'replace_placeholders',
+    'TemplateStore'
 ]
@@ -0,0 +1,85 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from docx.oxml.ns import qn
+from .template_extractor import paragraph_text
+from .template_plan import content_parts
+
+_W_P = qn('w:p')
+_W_R = qn('w:r')
+_W_T = qn('w:t')
+_W_HYPERLINK = qn('w:hyperlink')
+_XML_SPACE = qn('xml:space')
+# Run content that renders as text but is not a w:t; a token never spans one of these
+_RUN_BREAK_TAGS = tuple(qn(t) for t in ('w:br', 'w:cr', 'w:noBreakHyphen', 'w:ptab', 'w:tab'))
+_BREAK = "\x00"
+
+def _paragraph_text_nodes(p_el) -> Tuple[str, List[Tuple[int, object]]]:
+    """
+    The paragraph's text as seen through its runs, plus (offset, w:t) for every
+    text node in it. Tabs and breaks become a separator no placeholder can match.
+    """
+    chunks, nodes, pos = [], [], 0
+    for child in p_el.iterchildren(_W_R, _W_HYPERLINK):
+        runs = [child] if child.tag == _W_R else child.iterchildren(_W_R)
+        for r in runs:
+            for e in r.iterchildren(_W_T, *_RUN_BREAK_TAGS):
+                if e.tag == _W_T:
+                    text = e.text or ""
+                    nodes.append((pos, e))
+                else:
+                    text = _BREAK
+                chunks.append(text)
+                pos += len(text)
+    return "".join(chunks), nodes
+
+def _set_text(t, text: str):
+    t.text = text
+    if text != text.strip():
+        t.set(_XML_SPACE, "preserve")
+
+def _apply_matches(nodes, matches, values: Dict[str, str]):
+    """Rewrites the w:t nodes covered by `matches` in place."""
+    texts = [e.text or "" for _, e in nodes]
+    spans = [(offset, offset + len(text)) for (offset, _), text in zip(nodes, texts)]
+    # Right to left, so offsets of earlier matches stay valid while texts shrink or grow
+    for m in reversed(matches):
+        start, end = m.span()
+        first = True
+        for i, (offset, node_end) in enumerate(spans):
+            if node_end <= start or offset >= end:
+                continue
+            lo, hi = max(start, offset) - offset, min(end, node_end) - offset
+            # The value goes where the token starts; the token's other pieces are dropped
+            texts[i] = texts[i][:lo] + (values[m.group(0)] if first else "") + texts[i][hi:]
+            first = False
+    for (_, t), text in zip(nodes, texts):
+        if text != (t.text or ""):
+            _set_text(t, text)
+
+def replace_placeholders(doc, mapping: Dict[str, Optional[str]],
+                         on_edit: Optional[Callable[[object, str], None]] = None) -> int:
+    """
+    Replaces every placeholder key of `mapping` (matched exactly) in the document
+    body, headers and footers with its value, rewriting only the w:t nodes that hold
+    the token, so run formatting is kept. Tokens split across runs are handled.
+    `on_edit(p_el, old_text)` is called for each changed paragraph. Returns the
+    number of paragraphs changed.
+    """
+    if not mapping:
+        return 0
+    values = {k: "" if v is None else str(v) for k, v in mapping.items()}
+    # Longest first, so a key that contains another wins
+    pattern = re.compile("|".join(re.escape(k) for k in sorted(values, key=len, reverse=True)))
+    changed = 0
+    for part in content_parts(doc):
+        for p_el in part.element.iter(_W_P):
+            joined, nodes = _paragraph_text_nodes(p_el)
+            matches = list(pattern.finditer(joined))
+            if not matches:
+                continue
+            old_text = paragraph_text(p_el)
+            _apply_matches(nodes, matches, values)
+            changed += 1
+            if on_edit is not None:
+                on_edit(p_el, old_text)
+    return changed
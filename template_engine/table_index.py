@@ -0,0 +1,100 @@
+import weakref
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from docx.oxml.ns import qn
+from docx.table import Table, _Cell
+
+_W_TBL = qn('w:tbl')
+_W_TC = qn('w:tc')
+
+class TableIndex:
+    """
+    Cell layout of one table, read once from row.cells: each w:tc element's
+    (row, col) position and each row's first cell. A paragraph's row is the row
+    of its parent cell, so finding it no longer scans every row. First-column
+    labels (row.cells[0].text.strip()) are cached for membership checks and
+    refreshed through edited() when a first-column cell changes.
+    """
+    def __init__(self, table: Table):
+        self._positions: Dict[Any, Tuple[int, int]] = {}
+        self._first_tcs: List[Optional[Any]] = []
+        self._label_rows: Dict[Any, List[int]] = {}
+        for r, row in enumerate(table.rows):
+            cells = row.cells
+            for c, cell in enumerate(cells):
+                self._positions.setdefault(cell._tc, (r, c))
+            first = cells[0]._tc if cells else None
+            self._first_tcs.append(first)
+            if first is not None:
+                self._label_rows.setdefault(first, []).append(r)
+        self._labels: Optional[List[Optional[str]]] = None
+        self._label_counts: Dict[str, int] = {}
+
+    @staticmethod
+    def _cell_text(tc) -> str:
+        return _Cell(tc, None).text.strip()
+
+    def position(self, p_el) -> Optional[Tuple[int, int]]:
+        """(row, col) of the first row.cells entry holding paragraph `p_el`, or None."""
+        return self._positions.get(p_el.getparent())
+
+    def row_label(self, row: int) -> str:
+        """Current text of the row's first cell (read live, not from the label cache)."""
+        tc = self._first_tcs[row]
+        return self._cell_text(tc) if tc is not None else ""
+
+    def _build_labels(self):
+        self._labels = [self._cell_text(tc) if tc is not None else None for tc in self._first_tcs]
+        self._label_counts = {}
+        for label in self._labels:
+            if label is not None:
+                self._label_counts[label] = self._label_counts.get(label, 0) + 1
+
+    def is_label(self, text: str) -> bool:
+        """True if `text` equals the first-cell text of any row."""
+        if self._labels is None:
+            self._build_labels()
+        return text in self._label_counts
+
+    def edited(self, tc):
+        """Call after changing the paragraphs of cell `tc`; refreshes its rows' cached labels."""
+        rows = self._label_rows.get(tc)
+        if not rows or self._labels is None:
+            return
+        label = self._cell_text(tc)
+        for r in rows:
+            old = self._labels[r]
+            self._label_counts[old] -= 1
+            if not self._label_counts[old]:
+                del self._label_counts[old]
+            self._labels[r] = label
+            self._label_counts[label] = self._label_counts.get(label, 0) + 1
+
+# Keyed weakly by the w:tbl element: an index lives as long as something holds its table.
+# Indexes never reference their table, or the entry could not be collected.
+_indexes: "weakref.WeakKeyDictionary[Any, TableIndex]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+def table_index_for(table: Table) -> TableIndex:
+    """The shared index of `table`, built on first use by any template_engine pass."""
+    tbl = table._tbl
+    with _indexes_lock:
+        index = _indexes.get(tbl)
+    if index is None:
+        index = TableIndex(table)
+        with _indexes_lock:
+            index = _indexes.setdefault(tbl, index)
+    return index
+
+def cell_edited(p_el):
+    """Call after changing paragraph `p_el`; keeps its table's label cache current."""
+    tc = p_el.getparent()
+    if tc is None or tc.tag != _W_TC:
+        return
+    tbl = tc.getparent().getparent()
+    if tbl is None or tbl.tag != _W_TBL:
+        return
+    with _indexes_lock:
+        index = _indexes.get(tbl)
+    if index is not None:
+        index.edited(tc)
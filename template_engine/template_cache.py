@@ -0,0 +1,76 @@
+import io
+import os
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+from docx import Document
+from docx.document import Document as DocxDocument
+
+logger = logging.getLogger("TemplateCache")
+
+DEFAULT_CACHE_SIZE = 8
+
+class TemplateSkeletonCache:
+    """
+    LRU cache of pristine, parsed template documents keyed by path + mtime + size.
+    Opening a DOCX unzips the package and parses every XML part; a deep copy of
+    the already-parsed document is several times cheaper, so each fill starts
+    from an in-memory clone instead. Editing the template file on disk changes
+    the key, so a stale skeleton is never served.
+    """
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int, int], Tuple[threading.Lock, DocxDocument, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, path: str) -> Tuple[str, int, int]:
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    def get(self, path: str) -> DocxDocument:
+        """A private, mutable copy of the template at `path`."""
+        return self.get_with_digest(path)[0]
+
+    def get_with_digest(self, path: str) -> Tuple[DocxDocument, str]:
+        """Like get(), plus the SHA-256 of the template file the copy was made from."""
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is None:
+            with open(path, "rb") as f:
+                raw = f.read()
+            entry = (threading.Lock(), Document(io.BytesIO(raw)), hashlib.sha256(raw).hexdigest())
+            with self._lock:
+                self.misses += 1
+                # Drop older versions of the same file, then the least recently used
+                for stale in [k for k in self._entries if k[0] == key[0] and k != key]:
+                    del self._entries[stale]
+                entry = self._entries.setdefault(key, entry)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        entry_lock, pristine, digest = entry
+        with entry_lock:
+            return copy.deepcopy(pristine), digest
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._entries)}
+
+skeleton_cache = TemplateSkeletonCache(DEFAULT_CACHE_SIZE)
+
+def load_template_document(path: str) -> DocxDocument:
+    """Document(path) equivalent served from the process-wide skeleton cache."""
+    return skeleton_cache.get(path)
@@ -4,7 +4,8 @@ import logging
 from docx import Document
 from fuzzywuzzy import fuzz
 from .template_models import TemplateSchema, SectionType
-from .template_extractor import iterate_doc_content, is_section_header
+from .template_extractor import iter_doc_items, header_cache_for
+from .table_index import table_index_for, cell_edited
 
 logger = logging.getLogger("NuclearCleaner")
 logger.setLevel(logging.INFO)
@@ -16,15 +17,16 @@ def clean_template_content(doc: Document, schema: TemplateSchema) -> Document:
     - Preserves Headers and Labels.
     - Scrubs Data and replaces with [FILL HERE].
     """
-    content_list = list(iterate_doc_content(doc))
+    content_list = list(iter_doc_items(doc))
+    classify = header_cache_for(doc) # shared with extract_template_schema on the same doc
     to_delete_paras = []
     
     # Pre-scan for headers
     header_found_at = {}
     first_header_idx = 9999
-    for i, (etype, elem) in enumerate(content_list):
-        if etype == 'table': continue
-        stype, score, _ = is_section_header(elem)
+    for i, item in enumerate(content_list):
+        if item.kind == 'table': continue
+        stype, score, _ = classify(item)
         if stype != SectionType.UNKNOWN and score >= 0.7:
             header_found_at[i] = stype
             first_header_idx = min(first_header_idx, i)
@@ -38,16 +40,19 @@ def clean_template_content(doc: Document, schema: TemplateSchema) -> Document:
 
     filled_cells = set()
 
-    for i, (etype, elem) in enumerate(content_list):
+    for i, item in enumerate(content_list):
+        etype = item.kind
         if etype == 'table': continue
-        txt = elem.text.strip()
+        txt = item.text.strip()
         
         # A. Section Header
         if i in header_found_at:
             mtype = header_found_at[i]
             if mtype == SectionType.FULL_NAME:
+                elem = item.wrapper
                 elem.clear()
                 elem.add_run("[fill Name here]")
+                cell_edited(elem._element)
             continue
 
         # B. Global Placeholder protection
@@ -55,7 +60,7 @@ def clean_template_content(doc: Document, schema: TemplateSchema) -> Document:
             continue
 
         # C. Label Detection
-        table_obj = getattr(elem, '_parent_table', None)
+        table_obj = item.table
         is_label = False
         t_clean = txt.lower().rstrip(':').strip()
         
@@ -64,7 +69,7 @@ def clean_template_content(doc: Document, schema: TemplateSchema) -> Document:
         elif ":" in txt and len(txt.split()) < 5:
             if len(txt.split(':', 1)[1].strip()) < 3:
                 is_label = True
-        elif table_obj and any(txt == r.cells[0].text.strip() for r in table_obj.rows):
+        elif table_obj and table_index_for(table_obj).is_label(txt):
             if t_clean in PROTECTED_LABELS or (len(txt.split()) < 4 and t_clean):
                 is_label = True
         
@@ -73,6 +78,7 @@ def clean_template_content(doc: Document, schema: TemplateSchema) -> Document:
 
         # D. Data Scrubbing
         if not txt: continue
+        elem = item.wrapper
         
         if i < first_header_idx:
             # Top Matter
@@ -91,16 +97,19 @@ def clean_template_content(doc: Document, schema: TemplateSchema) -> Document:
         else:
             # Body content
             if etype == "table_cell":
-                cell_id = id(elem._element.getparent())
-                if cell_id not in filled_cells:
+                # Keyed by the cell element itself: id() of a transient lxml proxy can be reused
+                cell_el = elem._element.getparent()
+                if cell_el not in filled_cells:
                     elem.clear()
                     elem.add_run("[FILL HERE]")
-                    filled_cells.add(cell_id)
+                    filled_cells.add(cell_el)
                 else:
                     to_delete_paras.append(elem)
             else:
                 elem.clear()
                 elem.add_run("[FILL HERE]")
+        # Scrubbing a first-column cell changes the labels later rows are checked against
+        cell_edited(elem._element)
 
     for p in to_delete_paras:
         try:
@@ -109,9 +118,9 @@ def clean_template_content(doc: Document, schema: TemplateSchema) -> Document:
             p.clear()
 
     # E. Ensure all non-label cells have at least one [FILL HERE]
-    for etype, elem in content_list:
-        if etype == 'table':
-            for row in elem.rows:
+    for item in content_list:
+        if item.kind == 'table':
+            for row in item.wrapper.rows:
                 first_cell_txt = row.cells[0].text.strip().lower().rstrip(':')
                 is_row_labeled = any(fuzz.partial_ratio(first_cell_txt, lbl) > 85 for lbl in PROTECTED_LABELS) or row.cells[0].text.strip().endswith(':')
                 
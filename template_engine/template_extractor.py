@@ -1,12 +1,16 @@
 
 import logging
+import functools
 import re
+from typing import Any, Dict, Tuple
 from docx import Document
 from docx.table import Table, _Cell
 from docx.text.paragraph import Paragraph
-from docx.document import Document as DocClass
+from docx.oxml.ns import qn
 from fuzzywuzzy import fuzz
+from fuzzywuzzy import utils as fuzz_utils
 from .template_models import SectionType, TemplateSection, TemplateSchema
+from .table_index import table_index_for, cell_edited
 
 logger = logging.getLogger(__name__)
 
@@ -29,58 +33,162 @@ SECTION_SYNONYMS = {
     SectionType.TOOLS: ["Tools & Technologies", "Software Tools", "Key Tools"]
 }
 
-def iterate_doc_content(doc):
+class SectionHeaderMatcher:
     """
-    NUCLEAR TRAVERSAL v3.0:
-    Reliably yields all paragraphs and tables in visual order.
-    Handles headers, footers, and nested tables.
+    Indexed form of the SECTION_SYNONYMS scan in is_section_header.
+    Exact (case-insensitive) headings are a dict lookup; the fuzzy pass processes
+    the paragraph text once and scores it against pre-tokenized synonyms with
+    the same token_set_ratio arithmetic fuzzywuzzy uses, so scores are identical.
     """
-    yielded_ids = set()
+    def __init__(self, synonyms: dict):
+        self._exact = {}
+        self._index = [] # (section type, sorted tokens, token set) in SECTION_SYNONYMS order
+        for stype, syns in synonyms.items():
+            for syn in syns:
+                self._exact.setdefault(syn.lower(), stype)
+                tokens = set(fuzz_utils.full_process(syn.upper(), force_ascii=True).split())
+                self._index.append((stype, tokens))
+
+    def exact(self, text: str):
+        return self._exact.get(text.lower())
+
+    @functools.lru_cache(maxsize=4096)
+    def best_match(self, text_upper: str) -> 'tuple[SectionType, int]':
+        """(section type, token_set_ratio) of the first best-scoring synonym."""
+        processed = fuzz_utils.full_process(text_upper, force_ascii=True)
+        if not processed:
+            return SectionType.UNKNOWN, 0
+        tokens = set(processed.split())
+        best_type, best_score = SectionType.UNKNOWN, 0
+        for stype, syn_tokens in self._index:
+            score = _token_set_score(tokens, syn_tokens)
+            if score > best_score:
+                best_score = score
+                best_type = stype
+        return best_type, best_score
 
-    def _process_container(container, parent_table=None, container_id=None):
-        if container_id is None:
-            container_id = id(container)
+def _ratio(s1: str, s2: str) -> int:
+    # fuzz.ratio without its decorators (same equality/empty-string rules, same matcher)
+    if s1 == s2: return 100
+    if not s1 or not s2: return 0
+    return fuzz_utils.intr(100 * fuzz.SequenceMatcher(None, s1, s2).ratio())
 
-        if hasattr(container, 'element') and hasattr(container.element, 'body'):
-            xml_body = container.element.body
-        elif hasattr(container, '_element'):
-            xml_body = container._element
+def _token_set_score(tokens1: set, tokens2: set) -> int:
+    """fuzz.token_set_ratio on already processed token sets."""
+    if not tokens2: return 0
+    sorted_sect = " ".join(sorted(tokens1 & tokens2))
+    combined_1to2 = (sorted_sect + " " + " ".join(sorted(tokens1 - tokens2))).strip()
+    combined_2to1 = (sorted_sect + " " + " ".join(sorted(tokens2 - tokens1))).strip()
+    return max(_ratio(sorted_sect, combined_1to2), _ratio(sorted_sect, combined_2to1), _ratio(combined_1to2, combined_2to1))
+
+HEADER_MATCHER = SectionHeaderMatcher(SECTION_SYNONYMS)
+
+_W_P = qn('w:p')
+_W_TBL = qn('w:tbl')
+_W_TR = qn('w:tr')
+_W_TC = qn('w:tc')
+_W_SDT = qn('w:sdt')
+_W_R = qn('w:r')
+_W_HYPERLINK = qn('w:hyperlink')
+_RUN_TEXT_TAGS = tuple(qn(t) for t in ('w:br', 'w:cr', 'w:noBreakHyphen', 'w:ptab', 'w:t', 'w:tab'))
+# Same lookup the traversal has always used. It names the wne namespace, so Word's own
+# w:sdtContent (tables of contents, page-number fields) is not descended into.
+_SDT_CONTENT_PATH = './/{http://schemas.microsoft.com/office/word/2006/wordml}sdtContent'
+
+def _run_text(r) -> str:
+    return "".join(str(e) for e in r.iterchildren(*_RUN_TEXT_TAGS))
+
+def paragraph_text(p_el) -> str:
+    """Paragraph.text of a w:p element, read with tag-filtered iteration instead of XPath."""
+    parts = []
+    for child in p_el.iterchildren(_W_R, _W_HYPERLINK):
+        if child.tag == _W_R:
+            parts.append(_run_text(child))
         else:
-            return
+            parts.extend(_run_text(r) for r in child.iterchildren(_W_R))
+    return "".join(parts)
 
-        for child in xml_body.iterchildren():
+class DocItem:
+    """
+    One entry of iter_doc_items: a paragraph ('para' or 'table_cell') or a
+    table ('table'). `table` is the parent table's Table wrapper, shared by every
+    item of that table; `row`/`col` give the grid position of the cell holding
+    the item. Paragraph wrappers are only built when `wrapper` is asked for.
+    """
+    __slots__ = ("kind", "element", "table", "row", "col", "_doc", "_wrapper")
+
+    def __init__(self, kind: str, element, doc, table=None, row=None, col=None, wrapper=None):
+        self.kind = kind
+        self.element = element
+        self.table = table
+        self.row = row
+        self.col = col
+        self._doc = doc
+        self._wrapper = wrapper
+
+    @property
+    def text(self) -> str:
+        """Live paragraph text (same as Paragraph.text); empty for tables."""
+        return paragraph_text(self.element) if self.kind != 'table' else ""
+
+    @property
+    def wrapper(self):
+        """The Paragraph or Table that iterate_doc_content yields for this item."""
+        if self._wrapper is None:
+            p = Paragraph(self.element, self._doc)
+            if self.table is not None: p._parent_table = self.table
+            self._wrapper = p
+        return self._wrapper
+
+def iter_doc_items(doc):
+    """
+    Lean traversal: yields DocItems for all paragraphs and tables in visual
+    order (headers and footers first, then the body, including nested tables
+    and content controls), walking the lxml tree directly. Each table cell is
+    visited once, so merged cells are not repeated.
+    """
+    def _walk(container, table=None, row=None, col=None):
+        for child in container.iterchildren():
             tag = child.tag
-            if tag.endswith('}p'):
-                p = Paragraph(child, container if isinstance(container, DocClass) else doc)
-                full_id = (container_id, id(p._element))
-                if full_id not in yielded_ids:
-                    yielded_ids.add(full_id)
-                    if parent_table: setattr(p, '_parent_table', parent_table)
-                    yield ( 'table_cell' if parent_table else 'para', p)
-            elif tag.endswith('}tbl'):
-                t = Table(child, container if isinstance(container, DocClass) else doc)
-                if id(t._element) not in yielded_ids:
-                    yielded_ids.add(id(t._element))
-                    yield ('table', t)
-                    for row in t.rows:
-                        for cell in row.cells:
-                            yield from _process_container(cell, parent_table=t, container_id=id(cell))
-            elif tag.endswith('}sdt'):
-                sdt_content = child.find('.//{http://schemas.microsoft.com/office/word/2006/wordml}sdtContent')
+            if tag == _W_P:
+                yield DocItem('table_cell' if table is not None else 'para', child, doc, table, row, col)
+            elif tag == _W_TBL:
+                t = Table(child, doc)
+                yield DocItem('table', child, doc, table, row, col, wrapper=t)
+                for r, tr in enumerate(child.iterchildren(_W_TR)):
+                    c = 0
+                    for tc in tr.iterchildren(_W_TC):
+                        # A vertically merged cell is yielded with the row that starts it
+                        if tc.vMerge != "continue":
+                            yield from _walk(tc, t, r, c)
+                        c += tc.grid_span
+            elif tag == _W_SDT:
+                sdt_content = child.find(_SDT_CONTENT_PATH)
                 if sdt_content is not None:
-                    class PseudoContainer:
-                        def __init__(self, element): self._element = element
-                    yield from _process_container(PseudoContainer(sdt_content), parent_table=parent_table, container_id=id(child))
+                    yield from _walk(sdt_content, table, row, col)
 
-    # 1. Headers/Footers
+    # 1. Headers/Footers (accessing a missing one adds an empty definition, as python-docx does)
+    seen_parts = set()
     for section in doc.sections:
-        for h in [section.header, section.first_page_header, section.even_page_header]:
-            if h: yield from _process_container(h)
-        for f in [section.footer, section.first_page_footer, section.even_page_footer]:
-            if f: yield from _process_container(f)
-            
+        for hf in (section.header, section.first_page_header, section.even_page_header,
+                   section.footer, section.first_page_footer, section.even_page_footer):
+            root = hf._element
+            if root not in seen_parts:
+                seen_parts.add(root)
+                yield from _walk(root)
+
     # 2. Body
-    yield from _process_container(doc)
+    yield from _walk(doc.element.body)
+
+def iterate_doc_content(doc):
+    """
+    NUCLEAR TRAVERSAL v4.0:
+    Reliably yields all paragraphs and tables in visual order as
+    (kind, Paragraph | Table) pairs. Handles headers, footers, and nested tables.
+    Built on iter_doc_items; callers that mostly read text should use that directly.
+    """
+    for item in iter_doc_items(doc):
+        yield item.kind, item.wrapper
 
 def is_section_header(element) -> 'tuple[SectionType, float, bool]':
     if not isinstance(element, Paragraph):
@@ -93,10 +201,7 @@ def is_section_header(element) -> 'tuple[SectionType, float, bool]':
     is_label_style = False
     if table_obj:
         # If it's in the first column of ANY row in its parent table, it's likely a label
-        for row in table_obj.rows:
-            if element.text.strip() == row.cells[0].text.strip():
-                is_label_style = True
-                break
+        is_label_style = table_index_for(table_obj).is_label(text_clean)
     
     if not is_label_style and text_clean.endswith(':'):
         is_label_style = True
@@ -125,19 +230,12 @@ def is_section_header(element) -> 'tuple[SectionType, float, bool]':
     if re.search(r"(project|assignment|task|work|experience|employment|job)\s*#?\d+", text_clean.lower()):
         is_record = True
         
-    best_type = SectionType.UNKNOWN
-    best_score = 0
+    # Exact match with top-level synonym means it's NOT a specific record header
+    exact_type = HEADER_MATCHER.exact(text_clean)
+    if exact_type is not None:
+        return exact_type, 1.0, False
     
-    for stype, synonyms in SECTION_SYNONYMS.items():
-        for syn in synonyms:
-            if text_clean.lower() == syn.lower():
-                # Exact match with top-level synonym means it's NOT a specific record header
-                return stype, 1.0, False
-            
-            score = fuzz.token_set_ratio(text_upper, syn.upper())
-            if score > best_score:
-                best_score = score
-                best_type = stype
+    best_type, best_score = HEADER_MATCHER.best_match(text_upper)
             
     if best_score >= 80:
         if is_bold: best_score += 10
@@ -155,6 +253,88 @@ def is_section_header(element) -> 'tuple[SectionType, float, bool]':
     
     return SectionType.UNKNOWN, 0.0, False
 
+def paragraph_element(element):
+    """The w:p behind a Paragraph or a paragraph DocItem; None for tables."""
+    if isinstance(element, DocItem):
+        return element.element if element.kind != 'table' else None
+    return element._element if isinstance(element, Paragraph) else None
+
+class SectionHeaderCache:
+    """
+    Per-document memo of is_section_header, keyed by paragraph element and
+    checked against the paragraph's current text. Every pass over the same
+    document (schema extraction, cleaning, replication, anchor scan) shares one
+    instance, so each paragraph is classified once until its text changes.
+    """
+    def __init__(self):
+        self._memo: Dict[Any, Tuple[str, tuple]] = {}
+        self.calls = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, element) -> 'tuple[SectionType, float, bool]':
+        """Classifies a Paragraph or a DocItem; a DocItem's wrapper is only built on a miss."""
+        self.calls += 1
+        p_el = paragraph_element(element)
+        if p_el is None:
+            return is_section_header(element)
+        text = paragraph_text(p_el)
+        cached = self._memo.get(p_el)
+        if cached is not None and cached[0] == text:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        result = is_section_header(element.wrapper if isinstance(element, DocItem) else element)
+        self._memo[p_el] = (text, result)
+        return result
+
+    def _tracks(self, p_el) -> bool:
+        return p_el in self._memo
+
+    def _forget(self, p_el):
+        self._memo.pop(p_el, None)
+
+    def edited(self, p_el, old_text: str):
+        """
+        Call after changing a paragraph's text. A table paragraph's result also
+        depends on whether its text equals a first-column cell of its table, so
+        editing such a cell drops the paragraphs matching the cell's old or new text.
+        """
+        self._forget(p_el)
+        cell_edited(p_el)
+        tc = p_el.getparent()
+        if tc is None or tc.tag != _W_TC:
+            return
+        tr = tc.getparent()
+        if tr.tag == _W_TR and next(tr.iterchildren(_W_TC), None) is not tc and tc.vMerge != "restart":
+            return # not a row.cells[0] cell
+        cell_paras = [el for el in tc.iterchildren(_W_P)]
+        new_text = "\n".join(Paragraph(el, None).text for el in cell_paras).strip()
+        old_text = "\n".join(old_text if el is p_el else Paragraph(el, None).text for el in cell_paras).strip()
+        tbl = next(tc.iterancestors(_W_TBL))
+        for el in tbl.iter(_W_P):
+            if self._tracks(el) and next(el.iterancestors(_W_TBL), None) is tbl:
+                if Paragraph(el, None).text.strip() in (old_text, new_text):
+                    self._forget(el)
+
+    def alias(self, src_el, dst_el):
+        """A deep copy classifies like its source, paragraph for paragraph."""
+        for src, dst in zip(src_el.iter(_W_P), dst_el.iter(_W_P)):
+            cached = self._memo.get(src)
+            if cached is not None:
+                self._memo[dst] = cached
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "hits": self.hits, "misses": self.misses}
+
+def header_cache_for(doc) -> SectionHeaderCache:
+    """The classification cache shared by every pass over `doc`."""
+    cache = getattr(doc, '_header_cache', None)
+    if cache is None:
+        cache = SectionHeaderCache()
+        doc._header_cache = cache
+    return cache
+
 def _denoise_candidates(candidates: list) -> list:
     if not candidates: return []
     unique_sections = {}
@@ -174,17 +354,18 @@ def _denoise_candidates(candidates: list) -> list:
 
 def extract_template_schema(template_path: str, template_name: str, doc: Document = None) -> TemplateSchema:
     if doc is None: doc = Document(template_path)
+    classify = header_cache_for(doc)
     header_candidates = []
-    content_list = list(iterate_doc_content(doc))
+    content_list = list(iter_doc_items(doc))
     
-    for i, (elem_type, element) in enumerate(content_list):
-        if elem_type == 'table': continue
-        sect_type, score, is_record = is_section_header(element)
+    for i, item in enumerate(content_list):
+        if item.kind == 'table': continue
+        sect_type, score, is_record = classify(item)
         if sect_type != SectionType.UNKNOWN:
             header_candidates.append({
                 'index': i, 'type': sect_type, 'confidence': score,
-                'text': element.text.strip(), 'elem_type': elem_type,
-                'xml_id': id(element._element), 'is_record': is_record
+                'text': item.text.strip(), 'elem_type': item.kind,
+                'xml_id': id(item.element), 'is_record': is_record
             })
             
     final_list = _denoise_candidates(header_candidates)
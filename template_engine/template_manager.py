@@ -1,45 +1,107 @@
+import io
 import os
 import json
-from typing import List, Optional
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+from docx import Document
 from .template_models import TemplateSchema
 from .template_extractor import extract_template_schema
+from .template_plan import build_template_plan
+from .template_store import TemplateStore
 
 TEMPLATE_DIR = "templates"
+REGISTRY_DB = os.path.join(TEMPLATE_DIR, "registry.db")
+# Legacy single-file index; imported into the store once, never written again
 INDEX_FILE = os.path.join(TEMPLATE_DIR, "index.json")
 
-def _load_index() -> List[dict]:
-    if not os.path.exists(INDEX_FILE): return []
-    try:
-        with open(INDEX_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return []
+class SchemaRegistry:
+    """
+    Process-wide front of the template store, keyed by template name.
+    A lookup asks the store only for the row's seq; the schema is re-read and
+    re-parsed only when that changed (e.g. another worker re-registered it).
+    Lookups are counted as hits (served from the cached copy) or misses (the
+    row had to be loaded). The legacy index.json is imported on first use.
+    """
+    def __init__(self, store: TemplateStore, legacy_index: Optional[str] = INDEX_FILE):
+        self.store = store
+        self.legacy_index = legacy_index
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[int, dict]] = {}
+        self._migrated = False
+        self.hits = 0
+        self.misses = 0
 
-def _save_index(data: List[dict]):
-    with open(INDEX_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+    def _migrate(self):
+        if self._migrated:
+            return
+        with self._lock:
+            if not self._migrated:
+                if self.legacy_index:
+                    self.store.import_json_index(self.legacy_index)
+                self._migrated = True
+
+    def get(self, name: str) -> Optional[TemplateSchema]:
+        self._migrate()
+        seq = self.store.version(name)
+        with self._lock:
+            if seq is None:
+                self._entries.pop(name, None)
+                return None
+            cached = self._entries.get(name)
+        if cached is not None and cached[0] == seq:
+            item = cached[1]
+            with self._lock:
+                self.hits += 1
+        else:
+            row = self.store.get_versioned(name)
+            if row is None:
+                return None
+            item = json.loads(row[1])
+            with self._lock:
+                self._entries[name] = (row[0], item)
+                self.misses += 1
+        return TemplateSchema(**item)
+
+    def names(self) -> List[str]:
+        self._migrate()
+        return self.store.names()
+
+    def put(self, schema: TemplateSchema):
+        """Atomically inserts or replaces the schema registered under its template_name."""
+        self._migrate()
+        self.store.upsert(schema.template_name, schema.dict())
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of this process only (each worker process has its own registry)."""
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._entries), "templates": self.store.count()}
+
+schema_registry = SchemaRegistry(TemplateStore(REGISTRY_DB), INDEX_FILE)
 
 def register_template(path: str, name: str) -> TemplateSchema:
     path = os.path.normpath(path)
-    schema = extract_template_schema(path, name)
-    
-    # Update Index
-    index = _load_index()
-    # Remove existing if overwriting
-    index = [i for i in index if i['template_name'] != name]
+    with open(path, "rb") as f:
+        raw = f.read()
+    # One parse serves both passes. The plan is built first, while the document is still
+    # pristine (iter_doc_items adds empty header/footer parts), and the schema
+    # extraction then reuses its header classifications.
+    doc = Document(io.BytesIO(raw))
+    # Header classification is computed once here instead of on every fill
+    plan = build_template_plan(doc, hashlib.sha256(raw).hexdigest())
+    schema = extract_template_schema(path, name, doc=doc)
+    schema.plan = plan
     
-    # Serialize schema
-    index.append(schema.dict())
-    _save_index(index)
+    # One-row upsert; readers never see a partially written registry
+    schema_registry.put(schema)
     
     return schema
 
 def get_template_schema(name: str) -> Optional[TemplateSchema]:
-    index = _load_index()
-    for item in index:
-        if item['template_name'] == name:
-            return TemplateSchema(**item)
-    return None
+    return schema_registry.get(name)
 
 def list_templates() -> List[str]:
-    return [i['template_name'] for i in _load_index()]
+    return schema_registry.names()
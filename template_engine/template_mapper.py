@@ -1,13 +1,20 @@
+import io
 import re
 import os
+import hashlib
 import logging
-from typing import List, Dict, Any
+from typing import BinaryIO, List, Dict, Any, Optional
 from copy import deepcopy
 from docx import Document
 from docx.table import Table
 from docx.text.paragraph import Paragraph
 from .template_models import SectionType, TemplateSchema
-from .template_extractor import iterate_doc_content, normalize_text, is_section_header, SECTION_SYNONYMS
+from taxonomy import get_skill_taxonomy
+from .template_cache import skeleton_cache
+from .template_plan import header_classifier_for
+from .table_index import table_index_for
+from .placeholders import replace_placeholders
+from .template_extractor import iter_doc_items, normalize_text, is_section_header, SECTION_SYNONYMS
 
 logger = logging.getLogger("TemplateMapper")
 logger.setLevel(logging.DEBUG)
@@ -17,278 +24,232 @@ def _fuzzy_compare(s1, s2):
     if not s1 or not s2: return False
     return fuzz.ratio(str(s1).lower(), str(s2).lower()) > 85
 
-def fill_template(schema: TemplateSchema, data: Dict[str, Any], output_path: str):
+def fill_template(schema: TemplateSchema, data: Dict[str, Any], output_path, template_bytes: Optional[bytes] = None):
     """
-    Fills a cleaned template with CV data.
+    Fills a cleaned template with CV data and saves it to `output_path` (a path
+    or a writable stream). Returns `output_path`, or None if the fill failed
+    (the error is logged). `template_bytes` fills an in-memory template instead
+    of schema.template_file.
+    """
+    try:
+        doc = _build_filled_document(schema, data, template_bytes)
+        doc.save(output_path)
+        logger.info(f"SUCCESS: Saved document to {output_path}")
+        return output_path
+    except Exception as e:
+        logger.exception(f"Error in fill_template: {e}")
+        return None
+
+def render_template(schema: TemplateSchema, data: Dict[str, Any], out: Optional[BinaryIO] = None,
+                    template_bytes: Optional[bytes] = None) -> Optional[bytes]:
+    """
+    In-memory fill: returns the filled DOCX as bytes, or writes it into `out`
+    (e.g. a BytesIO) and returns None. Nothing touches the disk; unlike
+    fill_template, errors propagate to the caller.
+    """
+    doc = _build_filled_document(schema, data, template_bytes)
+    if out is not None:
+        doc.save(out)
+        return None
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def _build_filled_document(schema: TemplateSchema, data: Dict[str, Any], template_bytes: Optional[bytes] = None):
+    """
+    Fills a cleaned template with CV data and returns the document.
     Uses dynamic anchor detection to be resilient to document shifts.
     """
+    # Fills start from an in-memory clone of the parsed template (see template_cache)
+    if template_bytes is not None:
+        doc, fingerprint = Document(io.BytesIO(template_bytes)), hashlib.sha256(template_bytes).hexdigest()
+    else:
+        doc, fingerprint = skeleton_cache.get_with_digest(schema.template_file)
+    # Section headers come from the template's precomputed plan; edited paragraphs are re-classified
+    classify = header_classifier_for(schema, doc, fingerprint)
+    
+    # 1. Global Replacements (Personal Info)
+    personal_map = {
+        "[fill Name here]": data.get("full_name", "Applicant"),
+        "[NAME]": data.get("full_name", "Applicant"),
+        "{{name}}": data.get("full_name", "Applicant"),
+        "{{email}}": data.get("email", ""),
+        "{{phone}}": data.get("phone", ""),
+        "{{linkedin}}": data.get("linkedin", "")
+    }
+    
+    # One pass over the text nodes; only the w:t nodes holding a placeholder are rewritten
+    replace_placeholders(doc, personal_map, on_edit=classify.edited)
+
+    # 2. Block Replication (Dynamic Scaling)
     try:
-        doc = Document(schema.template_file)
+        _replicate_dynamic_sections(doc, data, classify)
+    except Exception as e:
+        logger.error(f"Dynamic replication failed (skipping): {e}")
+
+    # 3. Sequential Scanning
+    content_list = list(iter_doc_items(doc))
+    
+    # Detect all section anchors in the LIVE document
+    anchors = [] # List of (index, section_type)
+    for i, item in enumerate(content_list):
+        if item.kind == 'table': continue
+        stype, score, is_record = classify(item)
+        if stype != SectionType.UNKNOWN and score >= 0.7:
+            # Distinguish top-level vs record-level
+            is_top_level = not is_record
+            
+            # If it's a top-level section type, or the first time we see this type
+            if is_top_level or not anchors or anchors[-1][1] != stype:
+                anchors.append((i, stype))
+    
+    logger.info(f"Detected {len(anchors)} anchors in document for mapping: {[a[1].name for a in anchors]}")
+    
+    # Skill buckets for smart mapping (shared taxonomy, indexed once per process)
+    taxonomy = get_skill_taxonomy()
+    
+    allocated_skills = set()
+    section_processed = set() # Track unique anchor indices
+    section_record_index = {} # SectionType -> Current Record Index
+
+    # Loop through each detected anchor
+    last_found_idx = -1
+    for a_idx, (start_idx, stype) in enumerate(anchors):
+        # Define target range (from this anchor to the next anchor)
+        end_idx = anchors[a_idx+1][0] if a_idx + 1 < len(anchors) else len(content_list)
         
-        # 1. Global Replacements (Personal Info)
-        personal_map = {
-            "[fill Name here]": data.get("full_name", "Applicant"),
-            "[NAME]": data.get("full_name", "Applicant"),
-            "{{name}}": data.get("full_name", "Applicant"),
-            "{{email}}": data.get("email", ""),
-            "{{phone}}": data.get("phone", ""),
-            "{{linkedin}}": data.get("linkedin", "")
-        }
+        # Collect targets in this range
+        targets = []
+        for i in range(start_idx + 1, end_idx):
+            item = content_list[i]
+            if item.kind == 'table': continue
+            txt = item.text.strip()
+            if "[FILL HERE]" in txt or "[fill" in txt.lower():
+                targets.append((i, item.kind, item))
         
-        for p in doc.paragraphs:
-            for k, v in personal_map.items():
-                if k.lower() in p.text.lower():
-                    # Preserve formatting if possible
-                    p.text = p.text.replace(k, v)
+        if not targets: continue
         
-        for t in doc.tables:
-            for r in t.rows:
-                for c in r.cells:
-                    for p in c.paragraphs:
-                        for k, v in personal_map.items():
-                            if k.lower() in p.text.lower():
-                                p.text = p.text.replace(k, v)
+        # Fetch relevant data for this section type
+        list_data = [] # List of dicts or list of strings
+        if stype == SectionType.SUMMARY: list_data = [data.get("summary", "")]
+        elif stype == SectionType.SKILLS or stype == SectionType.TOOLS:
+            s_list = data.get("skills", [])
+            t_list = data.get("tools", [])
+            list_data = list(dict.fromkeys(s_list + t_list))
+        elif stype == SectionType.WORK_EXPERIENCE: list_data = data.get("work_experience", [])
+        elif stype == SectionType.PROJECTS: list_data = data.get("projects", [])
+        elif stype == SectionType.EDUCATION: list_data = data.get("education", [])
+        elif stype == SectionType.CERTIFICATIONS: list_data = data.get("certifications", [])
 
-        # 2. Block Replication (Dynamic Scaling)
-        try:
-            _replicate_dynamic_sections(doc, data)
-        except Exception as e:
-            logger.error(f"Dynamic replication failed (skipping): {e}")
+        if not list_data:
+            # Clear all targets if no data
+            for _, _, item in targets: item.wrapper.clear()
+            continue
 
-        # 3. Sequential Scanning
-        content_list = list(iterate_doc_content(doc))
-        from .template_extractor import is_section_header
-        
-        # Detect all section anchors in the LIVE document
-        anchors = [] # List of (index, section_type)
-        for i, (etype, elem) in enumerate(content_list):
-            if etype == 'table': continue
-            stype, score, is_record = is_section_header(elem)
-            if stype != SectionType.UNKNOWN and score >= 0.7:
-                # Distinguish top-level vs record-level
-                is_top_level = not is_record
-                
-                # If it's a top-level section type, or the first time we see this type
-                if is_top_level or not anchors or anchors[-1][1] != stype:
-                    anchors.append((i, stype))
+        # Fill Targets
+        is_skill_section = (stype in [SectionType.SKILLS, SectionType.TOOLS])
         
-        logger.info(f"Detected {len(anchors)} anchors in document for mapping: {[a[1].name for a in anchors]}")
+        if stype not in section_record_index:
+            section_record_index[stype] = {"rec": 0, "field": 0, "last_block": -1}
         
-        # Skill Categories for smart mapping
-        SKILL_CATEGORIES = {
-            "cloud": ["aws", "azure", "gcp", "lambda", "ec2", "s3", "cloud"],
-            "devops": ["docker", "kubernetes", "jenkins", "terraform", "ansible", "git", "github", "gitlab"],
-            "database": ["sql", "mysql", "postgres", "mongodb", "redis", "oracle", "elasticsearch"],
-            "os": ["linux", "windows", "unix", "ubuntu"],
-            "web": ["html", "css", "javascript", "react", "angular", "vue", "node", "express"],
-            "language": ["python", "java", "php", "c#", "ruby", "typescript"],
-            "design": ["figma", "photoshop", "illustrator", "sketch", "xd", "ui", "ux"]
-        }
+        state = section_record_index[stype]
+        is_sequential = (stype in [SectionType.WORK_EXPERIENCE, SectionType.PROJECTS])
         
-        allocated_skills = set()
-        section_processed = set() # Track unique anchor indices
-        section_record_index = {} # SectionType -> Current Record Index
+        for i, (full_idx, etype, item) in enumerate(targets):
+            elem = item.wrapper
+            # ADVANCE RECORD?
+            if is_sequential:
+                look_start = targets[i-1][0] if i > 0 else start_idx
+                for check_idx in range(look_start + 1, full_idx):
+                    c_item = content_list[check_idx]
+                    if c_item.kind != 'table':
+                        c_txt = c_item.text.strip()
+                        # Match "#N" or "Project #N"
+                        match = re.search(r'#(\d+)', c_txt)
+                        if match:
+                            num = int(match.group(1))
+                            if state['last_block'] != check_idx:
+                                state['rec'] = num - 1
+                                state['field'] = 0
+                                state['last_block'] = check_idx
+                                logger.debug(f"Advancing record to index {state['rec']} at '{c_txt}'")
+                        elif "#" in c_txt or (len(c_txt) < 30 and re.match(r"^(project|assignment|task)\s*#?\d*$", c_txt.lower())):
+                            if state['last_block'] != check_idx:
+                                state['rec'] += 1
+                                state['field'] = 0
+                                state['last_block'] = check_idx
+                                logger.debug(f"Advancing record to index {state['rec']} at '{c_txt}'")
 
-        # Loop through each detected anchor
-        last_found_idx = -1
-        for a_idx, (start_idx, stype) in enumerate(anchors):
-            # Define target range (from this anchor to the next anchor)
-            end_idx = anchors[a_idx+1][0] if a_idx + 1 < len(anchors) else len(content_list)
-            
-            # Collect targets in this range
-            targets = []
-            for i in range(start_idx + 1, end_idx):
-                etype, elem = content_list[i]
-                if etype == 'table': continue
-                txt = elem.text.strip()
-                if "[FILL HERE]" in txt or "[fill" in txt.lower():
-                    targets.append((i, etype, elem))
+            # Identify Label
+            label_text = ""
+            table = getattr(elem, '_parent_table', None)
+            t_idx = id(table) if table else -1
             
-            if not targets: continue
+            # Check paragraph above for label
+            if full_idx > start_idx + 1:
+                prev_item = content_list[full_idx - 1]
+                # Tables carry no label text
+                if prev_item.kind != 'table':
+                    prev_txt = prev_item.text.strip()
+                    if prev_txt.endswith(':') or len(prev_txt) < 30:
+                        label_text = prev_txt.lower().rstrip(':').strip()
             
-            # Fetch relevant data for this section type
-            list_data = [] # List of dicts or list of strings
-            if stype == SectionType.SUMMARY: list_data = [data.get("summary", "")]
-            elif stype == SectionType.SKILLS or stype == SectionType.TOOLS:
-                s_list = data.get("skills", [])
-                t_list = data.get("tools", [])
-                list_data = list(dict.fromkeys(s_list + t_list))
-            elif stype == SectionType.WORK_EXPERIENCE: list_data = data.get("work_experience", [])
-            elif stype == SectionType.PROJECTS: list_data = data.get("projects", [])
-            elif stype == SectionType.EDUCATION: list_data = data.get("education", [])
-            elif stype == SectionType.CERTIFICATIONS: list_data = data.get("certifications", [])
-
-            if not list_data:
-                # Clear all targets if no data
-                for _, _, elem in targets: elem.clear()
-                continue
-
-            # Fill Targets
-            is_skill_section = (stype in [SectionType.SKILLS, SectionType.TOOLS])
+            # Check Col 0 of table for label
+            if not label_text and etype == "table_cell" and table:
+                table_index = table_index_for(table)
+                pos = table_index.position(elem._element)
+                if pos is not None:
+                    label_text = table_index.row_label(pos[0]).lower().rstrip(':').strip()
+                        
+            # Check element for label in its own text (e.g. "Title: [FILL HERE]")
+            if not label_text:
+                if ":" in elem.text and "[" in elem.text and elem.text.find(":") < elem.text.find("["):
+                    label_text = elem.text.split(":", 1)[0].strip().lower()
             
-            if stype not in section_record_index:
-                section_record_index[stype] = {"rec": 0, "field": 0, "last_block": -1}
+            # Record Advancement (Sequential for non-skills)
+            if not is_skill_section and state["field"] > 0:
+                is_new_block = (t_idx != -1 and state["last_block"] != -1 and t_idx != state["last_block"])
+                # More specific repeat check: only increment if it's a primary identification field
+                is_repeat_title = False
+                if label_text:
+                    lt_clean = label_text.lower()
+                    # MUST contain title/name/employer OR project/company as a key word
+                    if any(k in lt_clean for k in ["title", "project name", "company", "employer"]):
+                        is_repeat_title = True
+                    elif "project" in lt_clean and ("title" in lt_clean or "name" in lt_clean):
+                        is_repeat_title = True
+                        
+                if is_new_block or is_repeat_title:
+                    state["rec"] += 1; state["field"] = 0
+                    logger.info(f"Advancing record for {stype} to index {state['rec']} (Label: {label_text})")
             
-            state = section_record_index[stype]
-            is_sequential = (stype in [SectionType.WORK_EXPERIENCE, SectionType.PROJECTS])
+            state["last_block"] = t_idx
+            val = None
             
-            for i, (full_idx, etype, elem) in enumerate(targets):
-                # ADVANCE RECORD?
-                if is_sequential:
-                    look_start = targets[i-1][0] if i > 0 else start_idx
-                    for check_idx in range(look_start + 1, full_idx):
-                        c_etype, c_elem = content_list[check_idx]
-                        if c_etype != 'table':
-                            c_txt = c_elem.text.strip()
-                            # Match "#N" or "Project #N"
-                            match = re.search(r'#(\d+)', c_txt)
-                            if match:
-                                num = int(match.group(1))
-                                if state['last_block'] != check_idx:
-                                    state['rec'] = num - 1
-                                    state['field'] = 0
-                                    state['last_block'] = check_idx
-                                    logger.debug(f"Advancing record to index {state['rec']} at '{c_txt}'")
-                            elif "#" in c_txt or (len(c_txt) < 30 and re.match(r"^(project|assignment|task)\s*#?\d*$", c_txt.lower())):
-                                if state['last_block'] != check_idx:
-                                    state['rec'] += 1
-                                    state['field'] = 0
-                                    state['last_block'] = check_idx
-                                    logger.debug(f"Advancing record to index {state['rec']} at '{c_txt}'")
-
-                # Identify Label
-                label_text = ""
-                table = getattr(elem, '_parent_table', None)
-                t_idx = id(table) if table else -1
-                
-                # Check paragraph above for label
-                if full_idx > start_idx + 1:
-                    prev_etype, prev_elem = content_list[full_idx - 1]
-                    # Table objects don't have .text attribute
-                    if prev_etype != 'table' and hasattr(prev_elem, 'text'):
-                        if prev_elem.text.strip().endswith(':') or len(prev_elem.text.strip()) < 30:
-                            label_text = prev_elem.text.strip().lower().rstrip(':').strip()
-                
-                # Check Col 0 of table for label
-                if not label_text and etype == "table_cell" and table:
-                    target_id = id(elem._element)
-                    for row in table.rows:
-                        if any(id(p._element) == target_id for cell in row.cells for p in cell.paragraphs):
-                            label_text = row.cells[0].text.strip().lower().rstrip(':').strip()
-                            break
-                            
-                # Check element for label in its own text (e.g. "Title: [FILL HERE]")
-                if not label_text:
-                    if ":" in elem.text and "[" in elem.text and elem.text.find(":") < elem.text.find("["):
-                        label_text = elem.text.split(":", 1)[0].strip().lower()
-                
-                # Record Advancement (Sequential for non-skills)
-                if not is_skill_section and state["field"] > 0:
-                    is_new_block = (t_idx != -1 and state["last_block"] != -1 and t_idx != state["last_block"])
-                    # More specific repeat check: only increment if it's a primary identification field
-                    is_repeat_title = False
-                    if label_text:
-                        lt_clean = label_text.lower()
-                        # MUST contain title/name/employer OR project/company as a key word
-                        if any(k in lt_clean for k in ["title", "project name", "company", "employer"]):
-                            is_repeat_title = True
-                        elif "project" in lt_clean and ("title" in lt_clean or "name" in lt_clean):
-                            is_repeat_title = True
-                            
-                    if is_new_block or is_repeat_title:
-                        state["rec"] += 1; state["field"] = 0
-                        logger.info(f"Advancing record for {stype} to index {state['rec']} (Label: {label_text})")
-                
-                state["last_block"] = t_idx
-                val = None
-                
-                if is_skill_section:
-                    # Skill Filtering Logic
-                    SKILL_CATEGORIES = {
-                        "category": ["category", "key skills"],
-                        "tools": ["tools", "technologies", "software"],
-                        "environment": ["environment", "tech stack", "stack"]
-                    }
-                    if label_text and any(k in label_text for k in ["category", "tools", "technologies", "environment"]):
-                        matches = []
-                        for cat_key, keywords in SKILL_CATEGORIES.items():
-                            if cat_key in label_text:
-                                for s in list_data:
-                                    if s not in allocated_skills and any(k in s.lower() for k in keywords):
-                                        matches.append(s)
-                                        allocated_skills.add(s)
-                        if matches: val = ", ".join(matches)
-                    else:
-                        # Generic skill list for the section
-                        remaining = [s for s in list_data if s not in allocated_skills]
-                        if remaining and start_idx not in section_processed:
-                            has_table = any(t[1] == "table_cell" for t in targets)
-                            if etype == "table_cell" or not has_table or i == len(targets) - 1:
-                                val = ", ".join(remaining)
-                                allocated_skills.update(remaining)
-                                section_processed.add(start_idx)
+            if is_skill_section:
+                # Skill Filtering Logic
+                buckets = taxonomy.buckets_for_label(label_text)
+                if buckets:
+                    matches = []
+                    for bucket in buckets:
+                        for s in list_data:
+                            if s not in allocated_skills and taxonomy.in_bucket(s, bucket):
+                                matches.append(s)
+                                allocated_skills.add(s)
+                    if matches: val = ", ".join(matches)
                 else:
-                    # Complex Record Mapping
-                    if state["rec"] >= len(list_data):
-                        # Empty data: If it's a paragraph, remove it to avoid empty bullets
-                        if etype == "para":
-                            try:
-                                p_elem = elem._element
-                                p_elem.getparent().remove(p_elem)
-                            except:
-                                elem.clear()
-                        else:
-                            elem.clear()
-                        continue
-                        
-                    rec = list_data[state["rec"]]
-                    if isinstance(rec, str):
-                        val = rec
-                    else:
-                        lt = label_text
-                        if not lt: val = None
-                        elif any(k in lt for k in ["role", "designation", "position"]): val = rec.get("role", "")
-                        elif any(k in lt for k in ["duration", "period", "date", "year"]): val = rec.get("duration", "")
-                        elif "client" in lt: val = rec.get("client", "")
-                        elif any(k in lt for k in ["title", "project", "name", "company", "employer"]): 
-                            val = rec.get("title", rec.get("project_name", rec.get("company", "")))
-                        elif any(k in lt for k in ["tech", "stack", "env", "tool", "technologies"]): 
-                            val = rec.get("tech", rec.get("tech_stack", rec.get("environment", "")))
-                        elif any(k in lt for k in ["resp", "desc", "detail", "overview", "task"]):
-                            # Try both "details" and "description"
-                            val = rec.get("details", rec.get("responsibilities", rec.get("description", "")))
-                        elif any(k in lt for k in ["inst", "univ", "school"]): val = rec.get("institution", "")
-                        elif any(k in lt for k in ["deg", "qual"]): val = rec.get("degree", "")
-
-                    if val is None and state["field"] == 0:
-                        has_table_targets = any(t[1] == "table_cell" for t in targets)
-                        if not is_sequential or not has_table_targets:
-                            if start_idx not in section_processed:
-                                _fill_list_to_paragraph(elem, stype, list_data)
-                                val = "DONE"; section_processed.add(start_idx)
-
-                # Inject Value
-                if val == "DONE": 
-                    val = None
-                    state["field"] += 1 
-                
-                if val:
-                    logger.debug(f"Injecting into {stype.name} rec {state['rec']} field {state['field']}: '{label_text}' -> '{str(val)[:50]}'")
-                    # If label was in-place, preserve it
-                    if ":" in elem.text and "[" in elem.text:
-                        label_part = elem.text.split("[", 1)[0]
-                        elem.clear()
-                        elem.add_run(label_part + str(val))
-                    else:
-                        elem.clear()
-                        elem.add_run(str(val))
-                    state["field"] += 1
-                    
-                    if not is_sequential and not is_skill_section:
-                        state["rec"] += 1
-                        state["field"] = 0
-                else:
-                    # If it's a bulleted paragraph, remove it if empty
+                    # Generic skill list for the section
+                    remaining = [s for s in list_data if s not in allocated_skills]
+                    if remaining and start_idx not in section_processed:
+                        has_table = any(t[1] == "table_cell" for t in targets)
+                        if etype == "table_cell" or not has_table or i == len(targets) - 1:
+                            val = ", ".join(remaining)
+                            allocated_skills.update(remaining)
+                            section_processed.add(start_idx)
+            else:
+                # Complex Record Mapping
+                if state["rec"] >= len(list_data):
+                    # Empty data: If it's a paragraph, remove it to avoid empty bullets
                     if etype == "para":
                         try:
                             p_elem = elem._element
@@ -297,11 +258,67 @@ def fill_template(schema: TemplateSchema, data: Dict[str, Any], output_path: str
                             elem.clear()
                     else:
                         elem.clear()
+                    continue
+                    
+                rec = list_data[state["rec"]]
+                if isinstance(rec, str):
+                    val = rec
+                else:
+                    lt = label_text
+                    if not lt: val = None
+                    elif any(k in lt for k in ["role", "designation", "position"]): val = rec.get("role", "")
+                    elif any(k in lt for k in ["duration", "period", "date", "year"]): val = rec.get("duration", "")
+                    elif "client" in lt: val = rec.get("client", "")
+                    elif any(k in lt for k in ["title", "project", "name", "company", "employer"]): 
+                        val = rec.get("title", rec.get("project_name", rec.get("company", "")))
+                    elif any(k in lt for k in ["tech", "stack", "env", "tool", "technologies"]): 
+                        val = rec.get("tech", rec.get("tech_stack", rec.get("environment", "")))
+                    elif any(k in lt for k in ["resp", "desc", "detail", "overview", "task"]):
+                        # Try both "details" and "description"
+                        val = rec.get("details", rec.get("responsibilities", rec.get("description", "")))
+                    elif any(k in lt for k in ["inst", "univ", "school"]): val = rec.get("institution", "")
+                    elif any(k in lt for k in ["deg", "qual"]): val = rec.get("degree", "")
 
-        doc.save(output_path)
-        logger.info(f"SUCCESS: Saved document to {output_path}")
-    except Exception as e:
-        logger.exception(f"Error in fill_template: {e}")
+                if val is None and state["field"] == 0:
+                    has_table_targets = any(t[1] == "table_cell" for t in targets)
+                    if not is_sequential or not has_table_targets:
+                        if start_idx not in section_processed:
+                            _fill_list_to_paragraph(elem, stype, list_data)
+                            val = "DONE"; section_processed.add(start_idx)
+
+            # Inject Value
+            if val == "DONE": 
+                val = None
+                state["field"] += 1 
+            
+            if val:
+                logger.debug(f"Injecting into {stype.name} rec {state['rec']} field {state['field']}: '{label_text}' -> '{str(val)[:50]}'")
+                # If label was in-place, preserve it
+                if ":" in elem.text and "[" in elem.text:
+                    label_part = elem.text.split("[", 1)[0]
+                    elem.clear()
+                    elem.add_run(label_part + str(val))
+                else:
+                    elem.clear()
+                    elem.add_run(str(val))
+                state["field"] += 1
+                
+                if not is_sequential and not is_skill_section:
+                    state["rec"] += 1
+                    state["field"] = 0
+            else:
+                # If it's a bulleted paragraph, remove it if empty
+                if etype == "para":
+                    try:
+                        p_elem = elem._element
+                        p_elem.getparent().remove(p_elem)
+                    except:
+                        elem.clear()
+                else:
+                    elem.clear()
+
+    logger.info(f"Header classification for this fill: {classify.stats()}")
+    return doc
 
 def _fill_list_to_paragraph(target_p, section_type, items):
     for item in reversed(items):
@@ -343,10 +360,11 @@ def _sanitize_xml(element):
             if attr in e.attrib:
                 del e.attrib[attr]
 
-def _replicate_dynamic_sections(doc, data):
+def _replicate_dynamic_sections(doc, data, classify=is_section_header):
     """
     Identifies 'blueprint' blocks in repeatable sections and clones them
     to match the number of records in the data.
+    `classify` is is_section_header or a plan-backed HeaderClassifier.
     """
     SECTION_RECORDS = {
         SectionType.PROJECTS: data.get("projects", []),
@@ -370,7 +388,7 @@ def _replicate_dynamic_sections(doc, data):
     element_sections = []
     current_section = SectionType.UNKNOWN
     for elem in top_elements:
-        stype, score, is_record = is_section_header(elem)
+        stype, score, is_record = classify(elem)
         
         # Check if the current element is a top-level section header
         is_top_level_section_header = (stype != SectionType.UNKNOWN and score >= 0.7 and not is_record)
@@ -394,7 +412,7 @@ def _replicate_dynamic_sections(doc, data):
         curr_block = []
         for e in section_elements:
             elem = e['elem']
-            stype_check, score, is_record_check = is_section_header(elem)
+            stype_check, score, is_record_check = classify(elem)
             txt = elem.text.lower() if isinstance(elem, Paragraph) else ""
             
             # A block starts if it's a section/sub-section header OR the very first item
@@ -432,12 +450,15 @@ def _replicate_dynamic_sections(doc, data):
                     new_xml = deepcopy(b_elem._element)
                     _sanitize_xml(new_xml)
                     last_elem._element.addnext(new_xml)
+                    if hasattr(classify, 'alias'): classify.alias(b_elem._element, new_xml)
                     
                     if isinstance(b_elem, Paragraph):
                         new_obj = Paragraph(new_xml, doc)
                         # Increment number if present (e.g., Project #1 -> Project #2)
                         if "#" in new_obj.text:
+                            old_text = new_obj.text
                             new_obj.text = re.sub(r'#\d+', f'#{i}', new_obj.text)
+                            if hasattr(classify, 'edited'): classify.edited(new_xml, old_text)
                     else:
                         new_obj = Table(new_xml, doc)
                     
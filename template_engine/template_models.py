@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Tuple
 from pydantic import BaseModel
 
 class SectionType(str, Enum):
@@ -26,7 +26,15 @@ class TemplateSection(BaseModel):
     header_element_type: Optional[str] = None # 'para' or 'table_cell'
     is_record_header: bool = False # e.g. "Project #1" instead of "PROJECTS"
 
+class TemplatePlan(BaseModel):
+    """Header classification of every paragraph, computed once per template file (see template_plan)."""
+    version: int
+    fingerprint: str # SHA-256 of the template file the plan was built from
+    paragraph_counts: Dict[str, int] # part name -> number of w:p elements
+    headers: Dict[str, Tuple[SectionType, float, bool]] # "part#index" -> is_section_header result; absent = not a header
+
 class TemplateSchema(BaseModel):
     template_name: str
     template_file: str
     sections: List[TemplateSection]
+    plan: Optional[TemplatePlan] = None # Precomputed at registration; stale plans are rebuilt on first fill
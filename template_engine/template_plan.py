@@ -0,0 +1,153 @@
+import io
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from .template_models import SectionType, TemplatePlan, TemplateSchema
+from .template_extractor import SectionHeaderCache, header_cache_for, paragraph_element
+
+logger = logging.getLogger("TemplatePlan")
+
+# Bump when is_section_header changes behaviour so persisted plans are rebuilt
+PLAN_VERSION = 1
+PLAN_MEMO_SIZE = 32
+
+_W_P = qn('w:p')
+_W_TBL = qn('w:tbl')
+_NOT_A_HEADER = (SectionType.UNKNOWN, 0.0, False)
+
+def content_parts(doc) -> List[Any]:
+    """Main document part plus its header/footer parts, in a stable order."""
+    parts, seen = [doc.part], {str(doc.part.partname)}
+    rels = sorted((r for r in doc.part.rels.values() if not r.is_external and r.reltype in (RT.HEADER, RT.FOOTER)),
+                  key=lambda r: str(r.target_part.partname))
+    for rel in rels:
+        name = str(rel.target_part.partname)
+        if name not in seen:
+            seen.add(name)
+            parts.append(rel.target_part)
+    return parts
+
+def _paragraph_in_context(p_el, doc) -> Paragraph:
+    """The Paragraph as iterate_doc_content yields it (table-cell paragraphs know their table)."""
+    p = Paragraph(p_el, doc)
+    tbl = next(p_el.iterancestors(_W_TBL), None)
+    if tbl is not None:
+        setattr(p, '_parent_table', Table(tbl, doc))
+    return p
+
+def build_template_plan(doc, fingerprint: str) -> TemplatePlan:
+    """Runs is_section_header once over every paragraph of a pristine template."""
+    classify = header_cache_for(doc)
+    counts, headers = {}, {}
+    for part in content_parts(doc):
+        name = str(part.partname)
+        paragraphs = list(part.element.iter(_W_P))
+        counts[name] = len(paragraphs)
+        for i, p_el in enumerate(paragraphs):
+            result = classify(_paragraph_in_context(p_el, doc))
+            if result[0] != SectionType.UNKNOWN:
+                headers[f"{name}#{i}"] = result
+    return TemplatePlan(version=PLAN_VERSION, fingerprint=fingerprint, paragraph_counts=counts, headers=headers)
+
+def build_plan_for_file(path: str) -> TemplatePlan:
+    with open(path, "rb") as f:
+        raw = f.read()
+    return build_template_plan(Document(io.BytesIO(raw)), hashlib.sha256(raw).hexdigest())
+
+class HeaderClassifier(SectionHeaderCache):
+    """
+    Drop-in for is_section_header on one live document. Paragraphs covered by
+    the plan are answered from it; anything else (edited or new paragraphs) is
+    classified dynamically and memoized like any SectionHeaderCache.
+    """
+    def __init__(self, results: Dict[Any, Tuple[SectionType, float, bool]] = None):
+        super().__init__()
+        self._results = results or {}
+        self.planned = 0
+
+    def __call__(self, element) -> 'tuple[SectionType, float, bool]':
+        p_el = paragraph_element(element)
+        if p_el is not None:
+            result = self._results.get(p_el)
+            if result is not None:
+                self.calls += 1
+                self.planned += 1
+                return result
+        return super().__call__(element)
+
+    def _tracks(self, p_el) -> bool:
+        return p_el in self._results or super()._tracks(p_el)
+
+    def _forget(self, p_el):
+        self._results.pop(p_el, None)
+        super()._forget(p_el)
+
+    def alias(self, src_el, dst_el):
+        for src, dst in zip(src_el.iter(_W_P), dst_el.iter(_W_P)):
+            result = self._results.get(src)
+            if result is not None:
+                self._results[dst] = result
+        super().alias(src_el, dst_el)
+
+    def stats(self) -> Dict[str, int]:
+        return {**super().stats(), "planned": self.planned}
+
+def bind_plan(plan: TemplatePlan, doc) -> Optional[HeaderClassifier]:
+    """Maps the plan onto a freshly loaded copy of its template; None if the layout does not match."""
+    results = {}
+    parts = content_parts(doc)
+    if {str(part.partname) for part in parts} != set(plan.paragraph_counts):
+        return None
+    for part in parts:
+        name = str(part.partname)
+        paragraphs = list(part.element.iter(_W_P))
+        if len(paragraphs) != plan.paragraph_counts[name]:
+            return None
+        for i, p_el in enumerate(paragraphs):
+            results[p_el] = plan.headers.get(f"{name}#{i}", _NOT_A_HEADER)
+    return HeaderClassifier(results)
+
+_plan_memo: "OrderedDict[str, TemplatePlan]" = OrderedDict()
+_plan_memo_lock = threading.Lock()
+
+def plan_for(schema: TemplateSchema, doc, fingerprint: str) -> TemplatePlan:
+    """
+    The schema's persisted plan if it was built from this exact file, otherwise a
+    plan detected dynamically from `doc` (which must still be pristine), memoized
+    per file fingerprint.
+    """
+    plan = schema.plan
+    if plan is not None and plan.version == PLAN_VERSION and plan.fingerprint == fingerprint:
+        return plan
+    with _plan_memo_lock:
+        plan = _plan_memo.get(fingerprint)
+        if plan is not None:
+            _plan_memo.move_to_end(fingerprint)
+            return plan
+    logger.info(f"No current plan for template '{schema.template_name}'; detecting headers dynamically")
+    plan = build_template_plan(doc, fingerprint)
+    with _plan_memo_lock:
+        _plan_memo[fingerprint] = plan
+        while len(_plan_memo) > PLAN_MEMO_SIZE:
+            _plan_memo.popitem(last=False)
+    return plan
+
+def header_classifier_for(schema: TemplateSchema, doc, fingerprint: str) -> HeaderClassifier:
+    """Classifier for a pristine copy of the schema's template; falls back to fully dynamic detection."""
+    try:
+        classifier = bind_plan(plan_for(schema, doc, fingerprint), doc)
+    except Exception as e:
+        logger.error(f"Template plan failed (using dynamic detection): {e}")
+        classifier = None
+    if classifier is None:
+        classifier = HeaderClassifier()
+    # Later passes over this document share the classifier through header_cache_for
+    doc._header_cache = classifier
+    return classifier
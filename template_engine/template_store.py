@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("TemplateStore")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS templates (
+    name TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+class TemplateStore:
+    """
+    SQLite-backed template registry: one row per template name holding its
+    serialized schema. Upserts replace a single row in one transaction, so
+    registration cost does not grow with the number of templates, and WAL mode
+    lets readers in any thread or worker process see either the old or the new
+    row, never a half-written index. Each row carries a `seq` that changes on
+    every write (it doubles as the listing order: most recently registered last).
+    """
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._enable_wal(conn)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def _enable_wal(self, conn: sqlite3.Connection):
+        # WAL is persistent, so this only switches a freshly created file. The switch
+        # does not wait on the busy timeout when processes open a new file together.
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def _write(self, fn):
+        """Runs fn(conn) in an IMMEDIATE transaction (one writer at a time across processes)."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _next_seq(conn) -> int:
+        return conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM templates").fetchone()[0]
+
+    @classmethod
+    def _upsert(cls, conn, name: str, data: Dict[str, Any]):
+        conn.execute(
+            "INSERT INTO templates (name, seq, data, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET seq = excluded.seq, data = excluded.data, updated_at = excluded.updated_at",
+            (name, cls._next_seq(conn), json.dumps(data), datetime.now().isoformat()))
+
+    def upsert(self, name: str, data: Dict[str, Any]):
+        """Inserts or replaces the schema stored under `name`."""
+        self._write(lambda conn: self._upsert(conn, name, data))
+
+    def delete(self, name: str) -> bool:
+        return self._write(lambda conn: conn.execute("DELETE FROM templates WHERE name = ?", (name,)).rowcount > 0)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT data FROM templates WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_versioned(self, name: str) -> Optional[Tuple[int, str]]:
+        """(seq, serialized schema) of `name`, or None."""
+        row = self._connect().execute("SELECT seq, data FROM templates WHERE name = ?", (name,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def version(self, name: str) -> Optional[int]:
+        """The row's seq; cheaper than get() for checking whether a cached copy is current."""
+        row = self._connect().execute("SELECT seq FROM templates WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def names(self) -> List[str]:
+        return [r[0] for r in self._connect().execute("SELECT name FROM templates ORDER BY seq")]
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM templates").fetchone()[0]
+
+    def import_json_index(self, index_file: str) -> int:
+        """
+        One-time migration of a legacy index.json (a list of schema dicts; the
+        dict-shaped {name: schema} files some UIs wrote are accepted too).
+        Recorded in the meta table, so it runs once per store even when several
+        processes start together. Names already in the store are kept. Returns
+        the number of templates imported.
+        """
+        key = f"imported:{os.path.abspath(index_file)}"
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+            return 0
+        try:
+            with open(index_file, "r") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            index = []
+        except ValueError as e:
+            logger.error(f"Legacy index {index_file} is not valid JSON; nothing imported: {e}")
+            index = []
+        items = list(index.values()) if isinstance(index, dict) else index if isinstance(index, list) else []
+
+        def migrate(conn) -> int:
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+                return 0
+            imported = 0
+            for item in items:
+                if not isinstance(item, dict) or 'template_name' not in item:
+                    continue
+                name = item['template_name']
+                # First entry wins, as in the old linear scan
+                if conn.execute("SELECT 1 FROM templates WHERE name = ?", (name,)).fetchone():
+                    continue
+                self._upsert(conn, name, item)
+                imported += 1
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, datetime.now().isoformat()))
+            return imported
+
+        imported = self._write(migrate)
+        if imported:
+            logger.info(f"Imported {imported} template(s) from {index_file}")
+        return imported
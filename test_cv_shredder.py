@@ -0,0 +1,79 @@
+"""
+Checks chunked CV shredding against a fake LLM that answers from the prompt
+text: every job and project in the CV must reach the merged result, whichever
+headings get_cv_segments recognises.
+
+    python -m pytest -q test_cv_shredder.py
+    python test_cv_shredder.py
+"""
+import re
+import json
+
+from jd_optimizer.cv_shredder import CVShredder, SYSTEM_PROMPT
+
+JOBS = 6
+PROJECTS = 3
+
+class FakeLLM:
+    """Returns the jobs, projects and skills named in the prompt, under the keys its system prompt asks for."""
+    def __init__(self):
+        self.prompts = []
+
+    async def acall_llm_with_meta(self, prompt, system_prompt):
+        self.prompts.append((prompt, system_prompt))
+        found = {
+            "full_name": "Jane Doe" if "Jane Doe" in prompt else "",
+            "work_experience": [{"role": "Engineer", "company": c}
+                                for c in re.findall(r"Engineer at (Company \d+)", prompt)],
+            "projects": [{"title": t} for t in re.findall(r"^(Project \w+)$", prompt, re.M)],
+            "skills": ["Python"] if "Python" in prompt else [],
+        }
+        asked = {key: value for key, value in found.items() if f'"{key}"' in system_prompt}
+        return json.dumps(asked), {"provider": "fake", "model": "fake", "cached": False}
+
+def _cv(experience_heading, projects_heading):
+    return ("Jane Doe\njane@example.com\nBackend engineer with ten years of services work.\n"
+            f"{experience_heading}\n"
+            + "\n".join(f"Engineer at Company {i}\n2010 - 2011\nBuilt and ran services." for i in range(JOBS))
+            + f"\n{projects_heading}\n"
+            + "\n".join(f"Project {name}\nA service." for name in ("Alpha", "Beta", "Gamma")[:PROJECTS])
+            + "\nSKILLS\nPython, Go, SQL\n")
+
+def _shred(cv):
+    llm = FakeLLM()
+    return CVShredder(llm).shred_cv_chunked(cv), llm
+
+def _check(result):
+    assert "failed_sections" not in result["llm_meta"]
+    assert result["full_name"] == "Jane Doe"
+    assert [j["company"] for j in result["work_experience"]] == [f"Company {i}" for i in range(JOBS)]
+    assert len(result["projects"]) == PROJECTS
+    assert result["skills"] == ["Python"]
+
+def test_recognised_headings():
+    result, llm = _shred(_cv("WORK EXPERIENCE", "KEY PROJECTS"))
+    _check(result)
+    # Each heading gets its own section prompt
+    assert sum(system == SYSTEM_PROMPT for _, system in llm.prompts) == 1
+
+def test_plain_headings():
+    # A bare EXPERIENCE heading is not one get_cv_segments knows, so its jobs stay in the summary segment
+    result, _ = _shred(_cv("EXPERIENCE", "PROJECTS"))
+    _check(result)
+
+def test_no_headings():
+    cv = _cv("", "").replace("SKILLS\n", "")
+    result, llm = _shred(cv)
+    _check(result)
+    assert all(system == SYSTEM_PROMPT for _, system in llm.prompts)
+
+def test_blank_cv():
+    result, llm = _shred(" \n\t" * 40)
+    assert result["full_name"] == "Error: Empty CV Text"
+    assert result["work_experience"] == [] and not llm.prompts
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"{name}: ok")
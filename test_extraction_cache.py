@@ -0,0 +1,96 @@
+"""
+Checks the on-disk extraction cache against a throwaway SQLite file: what the
+key depends on, that extract_cv_data re-parses when the key changes, and LRU
+eviction by stored size.
+
+    python -m pytest -q test_extraction_cache.py
+"""
+import os
+import glob
+import json
+import time
+
+import pytest
+
+import cv_pipeline
+from extraction_engine import ExtractionCache, extraction_key
+
+def _result(i, size=2000):
+    # Incompressible enough that every entry stores about the same number of bytes
+    return {"full_name": f"CV {i}", "summary": os.urandom(size).hex()}
+
+def _last_used(cache, key):
+    return cache._connect().execute("SELECT last_used FROM results WHERE key = ?", (key,)).fetchone()[0]
+
+def test_key_depends_on_content_version_and_options():
+    key = extraction_key(b"cv", "a.pdf", "1", table_strategy="always", table_pages=2)
+    assert key == extraction_key(b"cv", "renamed.PDF", "1", table_strategy="always", table_pages=2)
+    assert key != extraction_key(b"cv2", "a.pdf", "1", table_strategy="always", table_pages=2)
+    assert key != extraction_key(b"cv", "a.pdf", "2", table_strategy="always", table_pages=2)
+    assert key != extraction_key(b"cv", "a.pdf", "1", table_strategy="heuristic", table_pages=2)
+    assert key != extraction_key(b"cv", "a.pdf", "1", table_strategy="always", table_pages=3)
+    assert key != extraction_key(b"cv", "a.png", "1", table_strategy="always", table_pages=2)
+
+def test_extract_cv_data_reparses_when_key_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(cv_pipeline, "extraction_cache", ExtractionCache(str(tmp_path / "extraction.db"), 10 * 1024 * 1024))
+    parses = []
+    real_parse = cv_pipeline.parse_document
+    monkeypatch.setattr(cv_pipeline, "parse_document", lambda *a, **kw: parses.append(kw) or real_parse(*a, **kw))
+    path = sorted(glob.glob(os.path.join("input", "*.pdf")))[0]
+    with open(path, "rb") as f:
+        content = f.read()
+
+    first = cv_pipeline.extract_cv_data(content, "cv.pdf")
+    assert cv_pipeline.extract_cv_data(content, "other-name.pdf") == json.loads(json.dumps(first))
+    assert len(parses) == 1
+
+    cv_pipeline.extract_cv_data(content, "cv.pdf", table_strategy="never")
+    assert len(parses) == 2
+
+    monkeypatch.setattr(cv_pipeline, "EXTRACTOR_VERSION", cv_pipeline.EXTRACTOR_VERSION + "-next")
+    cv_pipeline.extract_cv_data(content, "cv.pdf")
+    assert len(parses) == 3
+
+    cv_pipeline.extract_cv_data(content, "cv.pdf", use_cache=False)
+    assert len(parses) == 4
+
+def test_evicts_least_recently_used_by_size(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "lru.db"), max_bytes=10 * 1024 * 1024, touch_interval=0)
+    cache.put("a", _result("a"))
+    entry = cache.usage()["bytes"]
+    cache.max_bytes = int(entry * 2.5)
+    time.sleep(0.01)
+    cache.put("b", _result("b"))
+    time.sleep(0.01)
+    assert cache.get("a")["full_name"] == "CV a"  # a is now the most recently used
+    time.sleep(0.01)
+    cache.put("c", _result("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.evictions == 1
+    usage = cache.usage()
+    assert usage["entries"] == 2 and usage["bytes"] <= cache.max_bytes
+
+def test_hits_touch_last_used_only_after_the_interval(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "touch.db"), max_bytes=1024 * 1024, touch_interval=60)
+    cache.put("a", _result("a", 10))
+    stored = _last_used(cache, "a")
+    assert cache.get("a") is not None
+    assert _last_used(cache, "a") == stored
+    cache.touch_interval = 0
+    assert cache.get("a") is not None
+    assert _last_used(cache, "a") > stored
+
+def test_disabled_and_broken_caches_miss(tmp_path):
+    disabled = ExtractionCache(str(tmp_path / "off.db"), max_bytes=0)
+    disabled.put("a", _result("a"))
+    assert disabled.get("a") is None and not os.path.exists(disabled.path)
+
+    broken = tmp_path / "broken.db"
+    broken.write_bytes(b"not a database" * 100)
+    cache = ExtractionCache(str(broken), max_bytes=1024 * 1024)
+    cache.put("a", _result("a"))
+    assert cache.get("a") is None
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main(["-q", __file__]))
@@ -0,0 +1,102 @@
+"""
+Checks the LLM response cache against a throwaway SQLite file: what the key
+depends on, which replies LLMService stores, TTL expiry and LRU eviction by size.
+
+    python -m pytest -q test_llm_cache.py
+"""
+import os
+import time
+
+import pytest
+
+from jd_optimizer.llm_cache import LLMResponseCache, llm_cache_key
+from jd_optimizer.llm_service import LLMService, _is_cacheable
+
+def _last_used(cache, key):
+    return cache._connect().execute("SELECT last_used FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+def _service(cache, replies):
+    """LLMService whose provider call returns `replies` in turn and records each call."""
+    service = LLMService(cache=cache)
+    calls = []
+    def dispatch(prompt, system_prompt):
+        calls.append(prompt)
+        return replies[len(calls) - 1]
+    service._dispatch = dispatch
+    return service, calls
+
+def test_key_depends_on_every_request_setting():
+    key = llm_cache_key("ollama", "llama3.1", "system", "prompt", {"format": "json"})
+    assert key == llm_cache_key("ollama", "llama3.1", "system", "prompt", {"format": "json"})
+    assert key != llm_cache_key("gemini", "llama3.1", "system", "prompt", {"format": "json"})
+    assert key != llm_cache_key("ollama", "llama3.2", "system", "prompt", {"format": "json"})
+    assert key != llm_cache_key("ollama", "llama3.1", "other system", "prompt", {"format": "json"})
+    assert key != llm_cache_key("ollama", "llama3.1", "system", "other prompt", {"format": "json"})
+    assert key != llm_cache_key("ollama", "llama3.1", "system", "prompt", {"format": "json", "stream": True})
+
+@pytest.mark.parametrize("text, cacheable", [
+    ('{"scores": {"overall": 70}}', True),
+    ('```json\n{"scores": {"overall": 70}}\n```', True),
+    ('{"error": "model returned nothing", "raw": ""}', False),
+    ('{"scores": {"overall": 7', False),
+    ('["not", "an", "object"]', False),
+    ('"just a string"', False),
+    ('42', False),
+    ('Sure! Here is the JSON you asked for.', False),
+    ('', False),
+    (None, False),
+])
+def test_is_cacheable(text, cacheable):
+    assert _is_cacheable(text) is cacheable
+
+def test_service_stores_only_json_objects(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.db"))
+    service, calls = _service(cache, ['["truncated"', '{"ok": true}', "unused"])
+    assert service.call_llm_with_meta("p", "s")[0] == '["truncated"'
+    text, meta = service.call_llm_with_meta("p", "s")
+    assert text == '{"ok": true}' and not meta["cached"]
+    text, meta = service.call_llm_with_meta("p", "s")
+    assert text == '{"ok": true}' and meta["cached"]
+    assert len(calls) == 2
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "ttl.db"), ttl_seconds=3600)
+    cache.put("a", '{"a": 1}')
+    assert cache.get("a")[0] == '{"a": 1}'
+    cache._connect().execute("UPDATE responses SET created = created - 7200")
+    assert cache.get("a") is None
+    assert cache.misses == 1
+
+def test_evicts_least_recently_used_by_size(tmp_path):
+    reply = lambda name: '{"%s": "%s"}' % (name, "x" * 1000)
+    cache = LLMResponseCache(str(tmp_path / "lru.db"), max_bytes=int(len(reply("a")) * 2.5), touch_interval=0)
+    cache.put("a", reply("a"))
+    time.sleep(0.01)
+    cache.put("b", reply("b"))
+    time.sleep(0.01)
+    assert cache.get("a") is not None  # a is now the most recently used
+    time.sleep(0.01)
+    cache.put("c", reply("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.evictions == 1
+
+def test_hits_touch_last_used_only_after_the_interval(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "touch.db"), touch_interval=60)
+    cache.put("a", '{"a": 1}')
+    stored = _last_used(cache, "a")
+    assert cache.get("a") is not None
+    assert _last_used(cache, "a") == stored
+    cache.touch_interval = 0
+    assert cache.get("a") is not None
+    assert _last_used(cache, "a") > stored
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "off.db"), max_bytes=0)
+    service, calls = _service(cache, ['{"ok": 1}', '{"ok": 2}'])
+    service.call_llm_with_meta("p", "s")
+    assert service.call_llm_with_meta("p", "s")[0] == '{"ok": 2}'
+    assert not os.path.exists(cache.path)
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main(["-q", __file__]))
@@ -0,0 +1,65 @@
+"""
+Checks the API's process-pool path end to end, without a running server:
+the stages run in spawned workers, the workers never import main.py, and
+their output matches the in-process result.
+
+    python -m pytest -q test_worker_pool.py
+    python test_worker_pool.py
+"""
+import os
+import sys
+import glob
+import zipfile
+import io
+
+# Must be set before main is imported
+os.environ["CV_POOL"] = "process"
+os.environ.setdefault("CV_WORKERS", "2")
+
+TEMPLATE = "Corp_Dev"
+
+def _loaded_modules():
+    """Runs in a worker: which server modules did it import?"""
+    return sorted(m for m in ("main", "fastapi", "job_queue", "transformers") if m in sys.modules)
+
+def _sample_cv():
+    path = sorted(glob.glob(os.path.join("input", "*.pdf")))[0]
+    with open(path, "rb") as f:
+        return os.path.basename(path), f.read()
+
+def test_workers_do_not_import_main():
+    import main
+    pool = main.get_work_pool()
+    assert type(pool).__name__ == "ProcessPoolExecutor"
+    assert pool.submit(_loaded_modules).result(timeout=120) == []
+
+def test_stages_match_in_process():
+    import main
+    filename, content = _sample_cv()
+    local = main.extract_cv_data(content, filename, use_cache=False)
+    remote = main.get_work_pool().submit(main.extract_cv_data, content, filename, use_cache=False).result(timeout=120)
+    assert remote == local
+
+def test_endpoints_through_process_pool():
+    from fastapi.testclient import TestClient
+    import main
+    filename, content = _sample_cv()
+    with TestClient(main.app) as client:
+        res = client.post(f"/process-to-template?template_name={TEMPLATE}",
+                          files={"file": (filename, content, "application/pdf")})
+        assert res.status_code == 200, res.text
+        assert res.headers["content-type"] == main.DOCX_MEDIA_TYPE
+        assert res.content[:2] == b"PK"
+
+        res = client.post(f"/process-batch?template_name={TEMPLATE}",
+                          files=[("files", (filename, content, "application/pdf")),
+                                 ("files", ("copy.pdf", content, "application/pdf"))])
+        assert res.status_code == 200, res.text
+        with zipfile.ZipFile(io.BytesIO(res.content)) as zf:
+            assert len([n for n in zf.namelist() if n.endswith(".docx")]) == 2
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"{name}: ok")
@@ -3,6 +3,7 @@ import time
 import requests
 import logging
 import shutil
+import threading
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from datetime import datetime, timedelta
@@ -15,8 +16,10 @@ logger = logging.getLogger("CV-Watcher")
 WATCH_DIR = "input"
 DONE_DIR = os.path.join("output", "done")
 REVIEW_DIR = os.path.join("output", "review")
-API_URL = "http://localhost:8000/process"
-RATE_LIMIT_SECONDS = 5 # Reduced for demo processing speed
+API_BASE = "http://localhost:8000"
+API_URL = f"{API_BASE}/jobs" # Queued processing: returns a job_id right away
+RATE_LIMIT_SECONDS = 0 # The backend job queue absorbs bursts; no client-side throttling needed
+POLL_SECONDS = 2 # How often a queued job's status is checked
 
 # Ensure directories exist
 os.makedirs(DONE_DIR, exist_ok=True)
@@ -27,6 +30,7 @@ class CVHandler(FileSystemEventHandler):
         self.last_processed_time = datetime.min
         self.processed_count = 0
         self.start_time = datetime.now()
+        self.stats_lock = threading.Lock()
 
     def on_created(self, event):
         if event.is_directory:
@@ -59,22 +63,12 @@ class CVHandler(FileSystemEventHandler):
                 files = {'file': (os.path.basename(file_path), f, 'application/octet-stream')}
                 response = requests.post(API_URL, files=files)
             
-            if response.status_code == 200:
-                result = response.json()
-                status = result.get('status', 'review')
-                confidence = result.get('confidence_score', 0)
-                
-                logger.info(f"Successfully processed {os.path.basename(file_path)} | Status: {status} | Confidence: {confidence:.2f}")
-                
-                # Move to appropriate directory
-                target_dir = DONE_DIR if status == 'auto' else REVIEW_DIR
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                new_name = f"{timestamp}_{os.path.basename(file_path)}"
-                shutil.move(file_path, os.path.join(target_dir, new_name))
-                
-                self.processed_count += 1
+            if response.status_code in (200, 202):
+                job = response.json()
+                logger.info(f"Queued {os.path.basename(file_path)} | Job: {job['job_id']} | Poll: {job['status_url']}")
                 self.last_processed_time = datetime.now()
-                self.log_stats()
+                # The file stays in the watch folder until the job finishes, then is routed by its outcome
+                threading.Thread(target=self.follow_job, args=(file_path, job), daemon=True).start()
             else:
                 logger.error(f"Backend error ({response.status_code}): {response.text}")
         
@@ -83,6 +77,44 @@ class CVHandler(FileSystemEventHandler):
         except Exception as e:
             logger.error(f"Error processing {file_path}: {str(e)}")
 
+    def follow_job(self, file_path, job):
+        """Polls the job until it finishes, then moves the file like the synchronous flow did."""
+        name = os.path.basename(file_path)
+        while True:
+            time.sleep(POLL_SECONDS)
+            try:
+                status = requests.get(API_BASE + job['status_url']).json()
+                if status['status'] == 'failed':
+                    logger.error(f"Job {job['job_id']} for {name} failed: {status.get('error')}")
+                    target = self.move_file(file_path, REVIEW_DIR)
+                    # Leave the reason next to the file for whoever reviews it
+                    with open(f"{target}.error.txt", "w", encoding="utf-8") as f:
+                        f.write(f"Job {job['job_id']} failed: {status.get('error')}\n")
+                    return
+                if status['status'] == 'done':
+                    result = requests.get(API_BASE + job['result_url']).json()
+                    outcome = result.get('status', 'review')
+                    confidence = result.get('confidence_score', 0)
+                    logger.info(f"Successfully processed {name} | Status: {outcome} | Confidence: {confidence:.2f}")
+                    self.move_file(file_path, DONE_DIR if outcome == 'auto' else REVIEW_DIR)
+                    with self.stats_lock:
+                        self.processed_count += 1
+                        self.log_stats()
+                    return
+            except requests.exceptions.ConnectionError:
+                logger.error(f"Lost the FastAPI server while waiting for {name}; retrying in {POLL_SECONDS}s")
+            except Exception as e:
+                logger.error(f"Error following job {job['job_id']} for {name}: {str(e)}")
+                return
+
+    @staticmethod
+    def move_file(file_path, target_dir):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        new_name = f"{timestamp}_{os.path.basename(file_path)}"
+        target = os.path.join(target_dir, new_name)
+        shutil.move(file_path, target)
+        return target
+
     def log_stats(self):
         uptime = datetime.now() - self.start_time
         hours = uptime.total_seconds() / 3600